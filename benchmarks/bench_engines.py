@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:37:12 2026
+
+@author: Scott Tuttle
+
+Compare the per call cost of the time_box engines.
+
+Run with:
+
+    python benchmarks/bench_engines.py
+
+The same function is wrapped with engine='fast' (the functools.wraps based
+wrapper used by default for plain functions) and engine='wrapt' (the
+wrapt.decorator proxy), enabled, with a threshold that is never exceeded
+(so no messages are built), disabled by a callable, and as a method. The
+time_box output goes to a null sink so the difference in the wrappers is
+not hidden by I/O. The import time of wrapt, which the fast engine avoids,
+is shown as well.
+
+On the development machine the fast engine saves about 1 us per enabled
+call and the 100 ms wrapt import, while a call disabled by a callable costs
+about 100 ns more than with the wrapt C extension proxy.
+"""
+
+import os
+import subprocess
+import sys
+from typing import Any, Callable, List, Tuple
+
+from sbt_utils.bench import Benchmark
+from sbt_utils.time_hdr import time_box
+
+
+class NullSink():
+    """A file object that discards everything written to it."""
+
+    def write(self, text: str) -> int:
+        return 0
+
+    def flush(self) -> None:
+        pass
+
+
+null: Any = NullSink()
+
+
+def work() -> None:
+    pass
+
+
+def variants() -> List[Tuple[str, Callable[[], None]]]:
+    result = []
+    for engine in ('fast', 'wrapt'):
+        class Boxed():
+            @time_box(file=null, engine=engine)
+            def method(self) -> None:
+                pass
+
+        result += [
+            (engine + ' enabled', time_box(work, file=null, engine=engine)),
+            (engine + ' threshold', time_box(work, file=null, threshold=10,
+                                             engine=engine)),
+            (engine + ' callable disabled',
+             time_box(work, file=null, time_box_enabled=lambda: False,
+                      engine=engine)),
+            (engine + ' method', Boxed().method)]
+    return result
+
+
+def import_time(module: str) -> float:
+    # run from this directory so that the wrapt stub in the repo root does
+    # not shadow the installed package
+    code = ('import time; s = time.perf_counter(); import ' + module
+            + '; print(time.perf_counter() - s)')
+    return min(float(subprocess.run([sys.executable, '-c', code],
+                                    check=True, stdout=subprocess.PIPE,
+                                    universal_newlines=True,
+                                    cwd=os.path.dirname(__file__)).stdout)
+               for _ in range(5))
+
+
+def main() -> None:
+    benchmark = Benchmark('time_box engine benchmarks')
+    for name, func in variants():
+        benchmark.add(func, name=name)
+    benchmark.run()
+    print('wrapt.decorators import: {:.2f} ms'.format(
+        import_time('wrapt.decorators') * 1000))
+
+
+if __name__ == '__main__':
+    main()
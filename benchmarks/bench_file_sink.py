@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 17:48:12 2026
+
+@author: Scott Tuttle
+
+Measure the cost of writing flower boxes to a log file.
+
+Run with:
+
+    python benchmarks/bench_file_sink.py
+
+A three line flower box is printed with flush=True to a file opened with
+open and to a RotatingFileSink (with and without size rotation). The open
+file makes one write system call per line; the sink buffers the lines and
+writes them in large chunks, so most calls never leave python. On a local
+disk, where a write only copies into the page cache, the two cost about
+the same (the sink's python write and flush methods cost as much as the
+system calls they save); the sink wins when each write is expensive, as
+on network file systems, and adds rotation. The files are written to a
+temporary directory.
+"""
+
+import os
+import tempfile
+from typing import Any
+
+from sbt_utils.bench import Benchmark
+from sbt_utils.file_sink import RotatingFileSink
+from sbt_utils.flower_box import print_flower_box_msg
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        plain = open(os.path.join(directory, 'plain.log'), 'a')
+        sink = RotatingFileSink(os.path.join(directory, 'sink.log'))
+        rotating = RotatingFileSink(os.path.join(directory, 'rotating.log'),
+                                    max_bytes=1 << 20, backup_count=2)
+        msgs = ['Benchmark message', 'second line', 'third line']
+
+        def box(file: Any) -> None:
+            print_flower_box_msg(msgs, file=file, flush=True)
+
+        benchmark = Benchmark('file sink benchmarks')
+        benchmark.add(box, name='open file, flush=True', args=(plain,))
+        benchmark.add(box, name='RotatingFileSink, flush=True',
+                      args=(sink,))
+        benchmark.add(box, name='RotatingFileSink 1 MiB rotation, '
+                      'flush=True', args=(rotating,))
+        benchmark.run()
+
+        plain.close()
+        sink.close()
+        rotating.close()
+
+
+if __name__ == '__main__':
+    main()
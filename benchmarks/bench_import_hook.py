@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:40:55 2026
+
+@author: Scott Tuttle
+
+Measure what the import hook adds to interpreter startup and imports.
+
+Run with:
+
+    python benchmarks/bench_import_hook.py
+
+Three numbers are reported:
+
+    1) the cost of importing sbt_utils.import_hook itself, from
+       python -X importtime in a fresh interpreter
+    2) the cost of a find_spec call for a module that matches no rule, which
+       is what every other import pays while the hook is installed
+    3) the wall time of a fresh interpreter importing a set of stdlib
+       modules with and without the hook installed (with rules that do not
+       match them)
+"""
+
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+from sbt_utils.import_hook import AutoTimeBoxConfig, TimeBoxFinder
+
+STDLIB_IMPORTS = ('import json, csv, decimal, fractions, argparse, '
+                  'logging, email.message, http.client, xml.dom.minidom')
+
+WITH_HOOK = ('from sbt_utils.import_hook import install_import_hook; '
+             'install_import_hook(); ')
+
+
+def module_import_us() -> int:
+    """Return the cumulative import time of sbt_utils.import_hook in us."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import sbt_utils.import_hook'],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in result.stderr.splitlines():
+        if line.rstrip().endswith('sbt_utils.import_hook'):
+            return int(line.split('|')[1])
+    return -1
+
+
+def startup_ms(code: str, env: dict, repeat: int = 20) -> float:
+    """Return the best wall time of running code in a fresh interpreter."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], env=env, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    print('import sbt_utils.import_hook: {} us (cumulative)'.format(
+        module_import_us()))
+
+    finder = TimeBoxFinder(AutoTimeBoxConfig.from_string(
+        'legacy.*:load_*;thirdparty.client'))
+    number = 200_000
+    best = min(timeit.repeat(lambda: finder.find_spec('json.decoder', None),
+                             number=number, repeat=5))
+    print('find_spec miss: {:.0f} ns'.format(best / number * 1e9))
+
+    env = dict(os.environ, SBT_UTILS_AUTO_TIME_BOX='legacy.*:load_*')
+    without = startup_ms(STDLIB_IMPORTS, env)
+    with_hook = startup_ms(WITH_HOOK + STDLIB_IMPORTS, env)
+    print('startup + stdlib imports without hook: {:.1f} ms'.format(without))
+    print('startup + stdlib imports with hook:    {:.1f} ms'.format(
+        with_hook))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 16:44:05 2026
+
+@author: Scott Tuttle
+
+Measure what importing sbt_utils.time_hdr costs a short-lived program.
+
+Run with:
+
+    python benchmarks/bench_import_time.py
+
+A fresh interpreter is started for each measurement with -X importtime,
+and the cumulative import time of sbt_utils.time_hdr is taken from its
+report. The best of several runs is shown, followed by the modules each
+step loads: the import itself, the first decoration, and the first call.
+One run is made first with bytecode writing enabled so that compiling the
+source is not counted.
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+STEPS = {
+    'import': 'from sbt_utils.time_hdr import time_box',
+    'decorate': 'from sbt_utils.time_hdr import time_box\n'
+                'f = time_box(lambda: None)',
+    'call': 'import os\n'
+            'from sbt_utils.time_hdr import time_box\n'
+            'f = time_box(lambda: None, file=open(os.devnull, "w"))\n'
+            'f()',
+}
+
+WATCHED = ('datetime', 'functools', 'inspect', 'typing',
+           'sbt_utils.flower_box', 'wrapt')
+
+REPORT = ('import sys\n'
+          'print(" ".join(m for m in {!r} if m in sys.modules))')
+
+
+def run(code: str, env: Dict[str, str]
+        ) -> 'subprocess.CompletedProcess[str]':
+    # run from this directory so that the wrapt stub in the repo root does
+    # not shadow the installed package
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True,
+                          env=env, cwd=os.path.dirname(__file__))
+
+
+def import_us(stderr: str, module: str) -> int:
+    for line in stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise ValueError(module + ' not found in the importtime report')
+
+
+def main() -> None:
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    run(STEPS['call'], env)
+
+    times: List[int] = [
+        import_us(run(STEPS['import'], env).stderr, 'sbt_utils.time_hdr')
+        for _ in range(10)]
+    print('import sbt_utils.time_hdr: best {} us, median {} us'.format(
+        min(times), sorted(times)[len(times) // 2]))
+
+    for step, code in STEPS.items():
+        loaded = run(code + '\n' + REPORT.format(WATCHED), env).stdout
+        print('{:<10} loads: {}'.format(step, loaded.strip() or 'nothing'))
+
+
+if __name__ == '__main__':
+    main()
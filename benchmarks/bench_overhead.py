@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 14:21:37 2026
+
+@author: Scott Tuttle
+
+Measure the per call overhead of the flower box and time_box output.
+
+Run with:
+
+    python benchmarks/bench_overhead.py
+    python benchmarks/bench_overhead.py --save \
+        benchmarks/baselines/overhead.json
+    python benchmarks/bench_overhead.py --compare \
+        benchmarks/baselines/overhead.json --threshold 0.10
+
+Each variant is measured with the bench module (see sbt_utils.bench), and
+all output goes to a null sink whose write method does nothing, so the
+numbers are the cost of building and printing the messages rather than of
+terminal or disk I/O. The time_box variants cover a plain function, a
+method, format='jsonl', an overhead_budget (measured after the governor
+has downgraded the function, since the warmup exceeds the budget),
+explicitly enabled, disabled, and callable enabled (both True and False);
+the undecorated call is included as the reference.
+
+With --compare, the run is checked against a stored baseline with
+find_regressions and the script exits with status 1 if any variant got
+slower by more than the threshold (and by more than the noise), or is
+missing from the baseline. Save the baseline again whenever a variant is
+added or the default engine changes. Baselines are only comparable on
+the same machine and python version, which are recorded in the JSON file.
+"""
+
+import argparse
+import sys
+from typing import Any, Callable, List, Tuple
+
+from sbt_utils.bench import Benchmark, find_regressions, load_json
+from sbt_utils.flower_box import print_flower_box_msg
+from sbt_utils.time_hdr import StartStopHeader, time_box
+
+
+class NullSink():
+    """A file object that discards everything written to it."""
+
+    def write(self, text: str) -> int:
+        return 0
+
+    def flush(self) -> None:
+        pass
+
+
+null: Any = NullSink()
+
+
+def plain() -> None:
+    pass
+
+
+@time_box(file=null)
+def boxed() -> None:
+    pass
+
+
+@time_box(file=null, format='jsonl')
+def jsonl() -> None:
+    pass
+
+
+@time_box(file=null, overhead_budget=0.01)
+def governed() -> None:
+    pass
+
+
+@time_box(file=null, time_box_enabled=True)
+def enabled() -> None:
+    pass
+
+
+@time_box(file=null, time_box_enabled=False)
+def disabled() -> None:
+    pass
+
+
+@time_box(file=null, time_box_enabled=lambda: True)
+def callable_enabled() -> None:
+    pass
+
+
+@time_box(file=null, time_box_enabled=lambda: False)
+def callable_disabled() -> None:
+    pass
+
+
+class Boxed():
+    @time_box(file=null)
+    def method(self) -> None:
+        pass
+
+
+header = StartStopHeader('bench')
+
+
+def flower_box() -> None:
+    print_flower_box_msg(['Benchmark message'], file=null)
+
+
+def start_msg() -> None:
+    header.print_start_msg(file=null)
+
+
+def end_msg() -> None:
+    header.print_end_msg(file=null)
+
+
+def variants() -> List[Tuple[str, Callable[[], None]]]:
+    return [('plain', plain),
+            ('print_flower_box_msg', flower_box),
+            ('StartStopHeader.print_start_msg', start_msg),
+            ('StartStopHeader.print_end_msg', end_msg),
+            ('time_box', boxed),
+            ('time_box method', Boxed().method),
+            ('time_box jsonl', jsonl),
+            ('time_box overhead_budget', governed),
+            ('time_box enabled', enabled),
+            ('time_box disabled', disabled),
+            ('time_box callable enabled', callable_enabled),
+            ('time_box callable disabled', callable_disabled)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Measure the per call overhead of the flower box and '
+                    'time_box output.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--save', metavar='PATH',
+                        help='save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare the results to a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed relative slowdown (default 0.10)')
+    args = parser.parse_args()
+
+    benchmark = Benchmark('overhead benchmarks', repeat=args.repeat)
+    for name, func in variants():
+        benchmark.add(func, name=name)
+    benchmark.run()
+
+    if args.save:
+        benchmark.save_json(args.save)
+    if args.compare:
+        regressions = find_regressions(load_json(args.compare),
+                                       benchmark.results, args.threshold)
+        if regressions:
+            print_flower_box_msg(['Overhead regressions'] + regressions)
+            return 1
+        print('No overhead regressions beyond '
+              + '{:.0%}'.format(args.threshold))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
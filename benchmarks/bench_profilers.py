@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:02:19 2026
+
+@author: Scott Tuttle
+
+Measure the overhead of the time_box profilers.
+
+Run with:
+
+    python benchmarks/bench_profilers.py
+
+A CPU bound function is timed undecorated and with each profiler, and the
+overhead is reported as a percentage of the undecorated time. The time_box
+output goes to os.devnull and the profilers keep their data in memory.
+"""
+
+import os
+import time
+from typing import Callable, Dict
+
+from sbt_utils.profilers import CProfileProfiler, SampleProfiler
+from sbt_utils.time_hdr import time_box
+
+
+def fib(n: int) -> int:
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def work() -> int:
+    return fib(25)
+
+
+def best_of(func: Callable[[], int], repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    with open(os.devnull, 'w') as null:
+        variants: Dict[str, Callable[[], int]] = {
+            'sample (5 ms)': time_box(
+                file=null,
+                profile=SampleProfiler(output_dir=None))(work),
+            'sample (1 ms)': time_box(
+                file=null,
+                profile=SampleProfiler(interval=0.001,
+                                       output_dir=None))(work),
+            'cprofile': time_box(
+                file=null,
+                profile=CProfileProfiler(output_dir=None))(work),
+        }
+        base = best_of(work)
+        print('{:<20} {:>10.2f} ms'.format('plain', base * 1000))
+        for name, func in variants.items():
+            elapsed = best_of(func)
+            print('{:<20} {:>10.2f} ms  {:+.1f}%'.format(
+                name, elapsed * 1000, (elapsed / base - 1) * 100))
+
+
+if __name__ == '__main__':
+    main()
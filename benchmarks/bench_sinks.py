@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:40:18 2026
+
+@author: Scott Tuttle
+
+Measure the cost of the time_box span sinks on the caller's thread.
+
+Run with:
+
+    python benchmarks/bench_sinks.py
+
+A function is wrapped with time_box in threshold mode (so that no messages
+are printed) without a sink and with each sink. Called in a tight loop, the
+writer thread is busy all the time and its work competes with the caller
+for the GIL, so these numbers include the full cost of writing each span.
+The emit method is also timed with a sink whose writer stays idle during
+the measurement, which is the cost on the caller's thread when calls
+arrive at a more usual rate. The SQLite sink writes to a temporary
+directory and the StatsD sink sends to the default local port, whether or
+not an agent is listening.
+"""
+
+import os
+import tempfile
+from typing import Any, Callable, List, Tuple
+
+from sbt_utils.bench import Benchmark
+from sbt_utils.sinks import SQLiteSink, Span, SpanSink, StatsDSink
+from sbt_utils.time_hdr import time_box
+
+
+def work() -> None:
+    pass
+
+
+def make_sinks(directory: str, idle: bool = False
+               ) -> List[Tuple[str, SpanSink]]:
+    options: Any = {}
+    if idle:
+        options = {'batch_size': 1 << 62, 'flush_interval': 3600}
+    return [('sqlite', SQLiteSink(os.path.join(directory, 'spans.db'),
+                                  **options)),
+            ('statsd', StatsDSink(**options))]
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        sinks = make_sinks(directory)
+        idle_sinks = make_sinks(directory, idle=True)
+        span = Span('work', 0.0, 1000, 'MainThread', os.getpid(), 'ok')
+
+        benchmark = Benchmark('sink benchmarks')
+        benchmark.add(time_box(work, threshold=10), name='no sink')
+        for name, sink in sinks:
+            benchmark.add(time_box(work, threshold=10, sink=sink),
+                          name=name + ' sink')
+        for name, sink in idle_sinks:
+            emit: Callable[[Any], None] = sink.emit
+            benchmark.add(emit, name=name + ' emit (writer idle)',
+                          args=(span,))
+        benchmark.run()
+
+        for _, sink in sinks + idle_sinks:
+            sink.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:05:38 2026
+
+@author: Scott Tuttle
+
+Measure the cost of time_box(track_memory=True).
+
+Run with:
+
+    python benchmarks/bench_track_memory.py
+
+Three variants of the same allocating function are timed: undecorated,
+decorated with time_box, and decorated with time_box(track_memory=True).
+The time_box output goes to os.devnull so that terminal I/O does not hide
+the cost of the tracking itself.
+"""
+
+import os
+import timeit
+from typing import List
+
+from sbt_utils.time_hdr import time_box
+
+
+def work() -> List[str]:
+    return [str(i) for i in range(1000)]
+
+
+def main() -> None:
+    with open(os.devnull, 'w') as null:
+        boxed = time_box(file=null)(work)
+        tracked = time_box(file=null, track_memory=True)(work)
+
+        number = 2000
+        for name, func in (('plain', work),
+                           ('time_box', boxed),
+                           ('time_box(track_memory=True)', tracked)):
+            best = min(timeit.repeat(func, number=number, repeat=5))
+            print('{:<30} {:>10.2f} us per call'.format(
+                name, best / number * 1_000_000))
+
+
+if __name__ == '__main__':
+    main()
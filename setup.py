@@ -23,17 +23,18 @@ setup(
       url='https://github.com/ScottBrian/sbt_utils.git',
       classifiers=[
           'Programming Language :: Python :: 3',
-          'Programming Language :: Python :: 3.6',
           'Programming Language :: Python :: 3.7',
           'Licence :: OSI Approved :: MIT Licence',
           'Operating System :: POSIX :: Linux'
                   ],
       project_urls={
           'Source': 'https://github.com/ScottBrian/sbt_utils.git'},
-      python_requires='>=3.6',
+      python_requires='>=3.7',
       packages=find_packages('src'),
       package_dir={'': 'src'},
       install_requires=['wrapt'],
       package_data={"sbt_utils": ["__init__.pyi", "py.typed"]},
+      entry_points={
+          'pytest11': ['sbt_utils.pytest_plugin = sbt_utils.pytest_plugin']},
       zip_safe=False
      )
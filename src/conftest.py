@@ -6,90 +6,32 @@ Created on Sun Jun 28 19:54:08 2020
 @author: Scott Tuttle
 """
 
-from doctest import OutputChecker
-from unittest import mock
+import time
+from datetime import datetime
+from typing import Any, Iterator
 
 import pytest
+from _pytest.doctest import DoctestItem
 
-# import sys
-
-
-class DateTimeOutputChecker(OutputChecker):
-    """ This class is used to intercept the output of the doctest examples
-    and change the datetime fields so they match the expected datetimes that
-    are documented in the time_hdr.py module examples.
-    """
-    num_entered = 0
-
-    def check_output(self, want: str, got: str, optionFlags: int) -> bool:
-        """
-        :param want : the expected output described in the time_hdr module
-            example
-        :type func_name: str
-
-        :param got : the output collected by doctest when the example is run
-        :type func_name: str
-
-        :param optionFlags : provides some customization options - see doctest
-            documentation for details
-        :type func_name: int
-
-        :returns: True if the example want matches the got, False if not
-        :rtype: bool
-        """
-
-        new_got = got
-        DateTimeOutputChecker.num_entered += 1
-
-        # handle starting case
-        if (('Starting' in want)
-           and ('Starting' in new_got)):
-            DT_idx_want_start = want.find('Starting')
-            DT_idx_got_start = new_got.find('Starting')
-            DT_idx_want_stop = want.find('*', DT_idx_want_start)
-            DT_idx_got_stop = new_got.find('*', DT_idx_got_start)
-
-            new_got = new_got[0:DT_idx_got_start] \
-                + want[DT_idx_want_start:DT_idx_want_stop] \
-                + new_got[DT_idx_got_stop:]
-
-        # handle ending case
-        if (('Ending aFunc' in want)
-           and ('Ending aFunc' in new_got)):
-            DT_idx_want_start = want.find('Ending aFunc')
-            DT_idx_got_start = new_got.find('Ending aFunc')
-            DT_idx_want_stop = want.find('*', DT_idx_want_start)
-            DT_idx_got_stop = new_got.find('*', DT_idx_got_start)
-
-            new_got = new_got[0:DT_idx_got_start] \
-                + want[DT_idx_want_start:DT_idx_want_stop] \
-                + new_got[DT_idx_got_stop:]
-
-        # handle elapsed time case
-        if (('Elapsed time:' in want)
-           and ('Elapsed time:' in new_got)):
-            DT_idx_want_start = want.find('Elapsed time:')
-            DT_idx_got_start = new_got.find('Elapsed time:')
-            DT_idx_want_stop = want.find('*', DT_idx_want_start)
-            DT_idx_got_stop = new_got.find('*', DT_idx_got_start)
-
-            new_got = new_got[0:DT_idx_got_start] \
-                + want[DT_idx_want_start:DT_idx_want_stop] \
-                + new_got[DT_idx_got_stop:]
-
-        # print('DateTimeOutputChecker.num_entered:',
-        #       DateTimeOutputChecker.num_entered, file=sys.stderr)
-        # print('sbt want:', file=sys.stderr)
-        # print(want, file=sys.stderr)
-        # print('sbt got:', file=sys.stderr)
-        # print(got, file=sys.stderr)
-        # print('sbt new_got:', file=sys.stderr)
-        # print(new_got, file=sys.stderr)
-
-        return OutputChecker.check_output(self, want, new_got, optionFlags)
+from sbt_utils.clock import SimulatedClock, set_clock
 
 
 @pytest.fixture(autouse=True)
-def DateTime_out():
-    with mock.patch('doctest.OutputChecker', DateTimeOutputChecker):
+def simulated_clock(request: Any, monkeypatch: Any) -> Iterator[None]:
+    """Run the doctest examples of the time_hdr module with a simulated clock.
+
+    The examples in the time_hdr module show the times of the day they were
+    written. The clock starts at that time, each reading advances it by
+    40 microseconds (so that the elapsed times are not zero), and
+    time.sleep advances it instead of sleeping, so the examples get the
+    same times on every run.
+    """
+    if not (isinstance(request.node, DoctestItem)
+            and request.node.dtest.name.startswith('sbt_utils.time_hdr')):
         yield
+        return
+    clock = SimulatedClock(datetime(2020, 6, 29, 18, 22, 50), tick=0.00004)
+    monkeypatch.setattr(time, 'sleep', clock.sleep)
+    previous = set_clock(clock)
+    yield
+    set_clock(previous)
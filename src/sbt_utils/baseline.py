@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 19:12:05 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+========
+baseline
+========
+
+With **save_baseline** and **check_baseline**, you can catch slowdowns of
+the functions wrapped by time_box(stats=...) between releases:
+
+:Example: compare a run against a saved baseline
+
+>>> from sbt_utils.baseline import save_baseline, check_baseline
+>>> from sbt_utils.stats import StatsRegistry
+>>> import os, tempfile
+
+>>> path = os.path.join(tempfile.mkdtemp(), 'baseline.json')
+>>> before = StatsRegistry()
+>>> for i in range(200):
+...     before.get('aFunc11').record(1_000_000 + i * 1_000)
+>>> save_baseline(before, path)
+
+>>> after = StatsRegistry()
+>>> for i in range(200):
+...     after.get('aFunc11').record(3_000_000 + i * 1_000)
+>>> regressions = check_baseline(after, path)
+<BLANKLINE>
+********************************************************
+* Latency regressions (threshold 10%, alpha 0.01)      *
+* aFunc11 p50: 1.099ms -> 3.099ms (+182.0%, p=7.5e-89) *
+* aFunc11 p99: 1.197ms -> 3.197ms (+167.1%, p=2.8e-89) *
+********************************************************
+>>> len(regressions)
+2
+
+
+A baseline is a JSON file with the python version and platform (see the
+bench module) and, for each function, the call count, error count, total,
+minimum, and maximum elapsed time, and the latency histogram of its
+FuncStats. The p50 and p99 are estimated from the histogram by
+interpolating within the bucket that holds them (bounded by the minimum
+and maximum), so their precision is that of the histogram bounds.
+
+A function has regressed at a quantile when its estimate grew by more than
+the threshold and a one-sided test rejects, at level alpha, that the calls
+got no slower:
+
+    1) p50: the Mann-Whitney U test on the histogram buckets (with the
+       correction for ties), which detects a shift of the whole
+       distribution.
+    2) p99: a two-proportion test of the share of calls above the bucket
+       holding the baseline p99, which detects a longer tail even when the
+       typical call is unchanged.
+
+Functions with fewer than min_count calls in either run, or present in only
+one of them, are not compared. The bucket bounds of the two runs must be
+the same.
+
+The module can also be run to compare two saved files, exiting with status
+1 when a function regressed:
+
+    python -m sbt_utils.baseline baseline.json current.json --exit-code 1
+
+"""
+
+import argparse
+import json
+import math
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, \
+    TextIO, Union
+
+from sbt_utils.bench import environment_info
+from sbt_utils.flower_box import print_flower_box_msg
+from sbt_utils.stats import FuncStats, StatsRegistry, format_ns
+
+QUANTILES = (('p50', 0.50), ('p99', 0.99))
+
+
+class LatencySummary():
+    """Class LatencySummary holds the latency histogram of one function."""
+
+    def __init__(self, name: str, *,
+                 count: int,
+                 error_count: int,
+                 total_ns: int,
+                 min_ns: int,
+                 max_ns: int,
+                 bounds_ns: Sequence[int],
+                 histogram: Sequence[int]) -> None:
+        """Stores the statistics.
+
+        Args:
+            name: The name of the function
+
+            count: The number of calls
+
+            error_count: The number of calls that raised an exception
+
+            total_ns: The total elapsed time
+
+            min_ns: The shortest elapsed time
+
+            max_ns: The longest elapsed time
+
+            bounds_ns: The upper bounds of the histogram buckets
+
+            histogram: The calls per bucket, with one more bucket than
+                bounds_ns for the calls above the highest bound
+
+        """
+        self.name = name
+        self.count = count
+        self.error_count = error_count
+        self.total_ns = total_ns
+        self.min_ns = min_ns
+        self.max_ns = max_ns
+        self.bounds_ns = list(bounds_ns)
+        self.histogram = list(histogram)
+
+    @classmethod
+    def from_func_stats(cls, func_stats: FuncStats) -> 'LatencySummary':
+        """Return the summary of the statistics of a function."""
+        # copy the histogram first, as calls may be recorded meanwhile
+        histogram = list(func_stats.histogram)
+        return cls(func_stats.name, count=sum(histogram),
+                   error_count=func_stats.error_count,
+                   total_ns=func_stats.total_ns,
+                   min_ns=func_stats.min_ns, max_ns=func_stats.max_ns,
+                   bounds_ns=[int(bound * 1_000_000_000)
+                              for bound in func_stats.histogram_bounds],
+                   histogram=histogram)
+
+    def quantile_ns(self, fraction: float) -> float:
+        """Return the estimated elapsed time at a quantile.
+
+        Args:
+            fraction: The quantile, from 0.0 to 1.0
+
+        Returns:
+            The elapsed time in nanoseconds, 0.0 if there were no calls
+
+        """
+        rank = fraction * self.count
+        below = 0
+        for index, calls in enumerate(self.histogram):
+            if calls and below + calls >= rank:
+                lower = self.bounds_ns[index - 1] if index else 0
+                upper = (self.bounds_ns[index]
+                         if index < len(self.bounds_ns) else self.max_ns)
+                lower = max(lower, self.min_ns)
+                upper = min(upper, self.max_ns)
+                return lower + (upper - lower) * (rank - below) / calls
+            below += calls
+        return 0.0
+
+    def bucket_of(self, fraction: float) -> int:
+        """Return the index of the bucket that holds a quantile."""
+        rank = fraction * self.count
+        below = 0
+        for index, calls in enumerate(self.histogram):
+            below += calls
+            if calls and below >= rank:
+                return index
+        return len(self.histogram) - 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the summary as a dictionary suitable for JSON."""
+        return {'name': self.name,
+                'count': self.count,
+                'error_count': self.error_count,
+                'total_ns': self.total_ns,
+                'min_ns': self.min_ns,
+                'max_ns': self.max_ns,
+                'p50_ns': self.quantile_ns(0.50),
+                'p99_ns': self.quantile_ns(0.99),
+                'bounds_ns': self.bounds_ns,
+                'histogram': self.histogram}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencySummary':
+        """Return the summary for a dictionary created by *to_dict*."""
+        return cls(data['name'], count=data['count'],
+                   error_count=data['error_count'],
+                   total_ns=data['total_ns'], min_ns=data['min_ns'],
+                   max_ns=data['max_ns'], bounds_ns=data['bounds_ns'],
+                   histogram=data['histogram'])
+
+
+class Regression(NamedTuple):
+    """A quantile of a function that got slower than allowed."""
+    function: str
+    quantile: str
+    baseline_ns: float
+    current_ns: float
+    p_value: float
+
+    def msg(self) -> str:
+        """Return the line that describes the regression in a report."""
+        if self.baseline_ns:
+            change = '{:+.1%}'.format(self.current_ns / self.baseline_ns - 1)
+        else:
+            # no ratio to a zero baseline, so the absolute change is shown
+            change = '+' + format_ns(self.current_ns - self.baseline_ns)
+        return (self.function + ' ' + self.quantile + ': '
+                + format_ns(self.baseline_ns) + ' -> '
+                + format_ns(self.current_ns) + ' (' + change
+                + ', p=' + '{:.2g}'.format(self.p_value) + ')')
+
+
+Summaries = Union[StatsRegistry, Sequence[LatencySummary]]
+
+
+def summarize(stats: Summaries) -> List[LatencySummary]:
+    """Return the summaries of the functions of a registry.
+
+    Args:
+        stats: A StatsRegistry, or summaries, which are returned as a list
+
+    Returns:
+        The summaries, sorted by function name
+
+    """
+    if isinstance(stats, StatsRegistry):
+        summaries = [LatencySummary.from_func_stats(func_stats)
+                     for func_stats in stats]
+    else:
+        summaries = list(stats)
+    return sorted(summaries, key=lambda summary: summary.name)
+
+
+def save_baseline(stats: Summaries, path: str) -> None:
+    """Write the latency summaries of the functions to a JSON file.
+
+    Args:
+        stats: A StatsRegistry or its summaries
+
+        path: The path of the file
+
+    """
+    with open(path, 'w') as out:
+        json.dump({'info': environment_info(),
+                   'functions': [summary.to_dict()
+                                 for summary in summarize(stats)]},
+                  out, indent=1)
+
+
+def load_baseline(path: str) -> List[LatencySummary]:
+    """Read the summaries written by save_baseline.
+
+    Args:
+        path: The path of the file
+
+    Returns:
+        The summaries
+
+    """
+    with open(path) as json_file:
+        data = json.load(json_file)
+    return [LatencySummary.from_dict(entry) for entry in data['functions']]
+
+
+def _normal_sf(z: float) -> float:
+    """Return the upper tail probability of the standard normal at z."""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_p(baseline: Sequence[int], current: Sequence[int]) -> float:
+    """Return the p-value that the current calls are not slower.
+
+    This is the one-sided Mann-Whitney U test with the normal
+    approximation, computed from the calls per histogram bucket. The calls
+    in a bucket are treated as ties.
+
+    Args:
+        baseline: The calls per bucket of the baseline run
+
+        current: The calls per bucket of the current run
+
+    Returns:
+        The p-value; small values mean the current calls are slower
+
+    """
+    n1 = sum(baseline)
+    n2 = sum(current)
+    total = n1 + n2
+    if not n1 or not n2 or total < 3:
+        return 1.0
+    u_current = 0.0
+    below = 0
+    ties = 0
+    for old, new in zip(baseline, current):
+        u_current += new * (below + old / 2)
+        below += old
+        tied = old + new
+        ties += tied ** 3 - tied
+    variance = n1 * n2 / 12 * ((total + 1) - ties / (total * (total - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u_current - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return _normal_sf(z)
+
+
+def exceedance_p(baseline: Sequence[int], current: Sequence[int],
+                 bucket: int) -> float:
+    """Return the p-value that no larger share of calls is above a bucket.
+
+    This is the one-sided two-proportion z test of the share of calls in
+    the buckets above the given one.
+
+    Args:
+        baseline: The calls per bucket of the baseline run
+
+        current: The calls per bucket of the current run
+
+        bucket: The index of the bucket
+
+    Returns:
+        The p-value; small values mean more current calls are above
+
+    """
+    n1 = sum(baseline)
+    n2 = sum(current)
+    if not n1 or not n2:
+        return 1.0
+    above1 = sum(baseline[bucket + 1:])
+    above2 = sum(current[bucket + 1:])
+    pooled = (above1 + above2) / (n1 + n2)
+    error = math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+    if error == 0:
+        return 1.0
+    return _normal_sf((above2 / n2 - above1 / n1) / error)
+
+
+def find_latency_regressions(baseline: Summaries,
+                             current: Summaries, *,
+                             threshold: float = 0.10,
+                             alpha: float = 0.01,
+                             min_count: int = 30) -> List[Regression]:
+    """Return the p50 and p99 regressions of the current run.
+
+    Args:
+        baseline: The baseline registry or summaries
+
+        current: The current registry or summaries
+
+        threshold: The allowed relative increase of a quantile. The default
+            is 0.10 (10 percent).
+
+        alpha: The significance level of the tests. The default is 0.01.
+
+        min_count: The fewest calls in each run for a function to be
+            compared. The default is 30.
+
+    Returns:
+        The regressions, by function name and quantile
+
+    Raises:
+        ValueError: A function has different histogram bounds in the two
+            runs
+
+    """
+    by_name = {summary.name: summary for summary in summarize(baseline)}
+    regressions = []
+    for new in summarize(current):
+        old = by_name.get(new.name)
+        if old is None or old.count < min_count or new.count < min_count:
+            continue
+        if old.bounds_ns != new.bounds_ns:
+            raise ValueError('the histogram bounds of ' + new.name
+                             + ' differ from those of the baseline')
+        for label, fraction in QUANTILES:
+            old_ns = old.quantile_ns(fraction)
+            new_ns = new.quantile_ns(fraction)
+            if new_ns <= old_ns * (1 + threshold):
+                continue
+            if fraction == 0.50:
+                p_value = mann_whitney_p(old.histogram, new.histogram)
+            else:
+                p_value = exceedance_p(old.histogram, new.histogram,
+                                       old.bucket_of(fraction))
+            if p_value < alpha:
+                regressions.append(Regression(new.name, label, old_ns,
+                                              new_ns, p_value))
+    return regressions
+
+
+def print_regression_report(regressions: Sequence[Regression], *,
+                            threshold: float = 0.10,
+                            alpha: float = 0.01,
+                            file: Optional[TextIO] = None) -> None:
+    """Print the regressions, or that there are none, in a flower box.
+
+    Args:
+        regressions: The regressions to report
+
+        threshold: The threshold used to find them, for the title
+
+        alpha: The significance level used to find them, for the title
+
+        file: Specifies the argument to use on the print statement *file*
+            parameter. The default is sys.stdout (via None).
+
+    """
+    if file is None:
+        file = sys.stdout
+    if regressions:
+        msgs = ['Latency regressions (threshold '
+                + '{:.0%}'.format(threshold) + ', alpha '
+                + str(alpha) + ')']
+        msgs.extend(regression.msg() for regression in regressions)
+    else:
+        msgs = ['No latency regressions beyond '
+                + '{:.0%}'.format(threshold)]
+    print_flower_box_msg(msgs, file=file)
+
+
+def check_baseline(stats: Summaries, path: str, *,
+                   threshold: float = 0.10,
+                   alpha: float = 0.01,
+                   min_count: int = 30,
+                   file: Optional[TextIO] = None,
+                   exit_code: Optional[int] = None) -> List[Regression]:
+    """Compare a run with a saved baseline and print the report.
+
+    Args:
+        stats: The registry or summaries of the current run
+
+        path: The path of the baseline written by save_baseline
+
+        threshold: As described for find_latency_regressions. The default
+            is 0.10.
+
+        alpha: As described for find_latency_regressions. The default is
+            0.01.
+
+        min_count: As described for find_latency_regressions. The default
+            is 30.
+
+        file: Specifies the argument to use on the print statement *file*
+            parameter. The default is sys.stdout (via None).
+
+        exit_code: The status to exit with (by raising SystemExit) when
+            there are regressions. The default is None, which returns them.
+
+    Returns:
+        The regressions
+
+    Raises:
+        SystemExit: There are regressions and exit_code was specified
+
+    """
+    regressions = find_latency_regressions(load_baseline(path), stats,
+                                           threshold=threshold, alpha=alpha,
+                                           min_count=min_count)
+    print_regression_report(regressions, threshold=threshold, alpha=alpha,
+                            file=file)
+    if regressions and exit_code is not None:
+        raise SystemExit(exit_code)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compare two saved baselines from the command line.
+
+    Args:
+        argv: The arguments. The default is None, which uses sys.argv.
+
+    Returns:
+        The exit status: the --exit-code value if there are regressions,
+        otherwise 0
+
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m sbt_utils.baseline',
+        description='Compare the latency of the functions in a current '
+                    'run with a baseline saved by save_baseline.')
+    parser.add_argument('baseline', help='the baseline JSON file')
+    parser.add_argument('current', help='the current JSON file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed relative slowdown (default 0.10)')
+    parser.add_argument('--alpha', type=float, default=0.01,
+                        help='significance level (default 0.01)')
+    parser.add_argument('--min-count', type=int, default=30,
+                        help='fewest calls to compare (default 30)')
+    parser.add_argument('--exit-code', type=int, default=1,
+                        help='status when a function regressed (default 1)')
+    args = parser.parse_args(argv)
+    try:
+        check_baseline(load_baseline(args.current), args.baseline,
+                       threshold=args.threshold, alpha=args.alpha,
+                       min_count=args.min_count, exit_code=args.exit_code)
+    except SystemExit as exc:
+        return int(exc.code or 0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Tue Oct 20 13:26:50 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=====
+bench
+=====
+
+With **bench**, you can benchmark a function properly instead of timing a
+single call:
+
+:Example: benchmark a small function
+
+>>> from sbt_utils.bench import bench
+>>> result = bench(sorted, args=([3, 1, 2],), repeat=5, min_time=0.001)
+>>> result.name
+'sorted'
+>>> result.loops > 1 and len(result.times_ns) == 5
+True
+>>> result.ci_low_ns <= result.mean_ns <= result.ci_high_ns
+True
+
+
+A benchmark is run as follows:
+
+    1) The inner loop count is calibrated (unless loops is specified) by
+       increasing it in 1, 2, 5 steps until one repetition takes at least
+       min_time seconds, so that timer resolution and overhead do not
+       matter.
+    2) The function is run warmup repetitions, which are not measured.
+    3) The function is run repeat repetitions of loops calls each, timed
+       with time.perf_counter_ns. Each repetition yields one time per call.
+    4) Repetitions outside the Tukey fences (more than 1.5 times the
+       interquartile range beyond the quartiles), typically caused by other
+       activity on the machine, are rejected as outliers.
+    5) The mean, standard deviation, and a Student's t confidence interval
+       of the mean are computed from the remaining repetitions.
+
+A **Benchmark** runs a set of functions and prints a summary in a flower box
+(see the flower_box module), and the results can be saved as JSON together
+with the python version and platform so that runs can be compared later
+with compare_results, or checked against a stored baseline with
+find_regressions.
+
+"""
+
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO, \
+    Tuple
+
+from sbt_utils.flower_box import print_flower_box_msg
+from sbt_utils.stats import format_ns
+from sbt_utils.time_hdr import StartStopHeader
+
+# two-sided Student's t critical values by degrees of freedom (1 to 30);
+# larger degrees of freedom use the normal value
+_T_TABLE = {
+    0.95: (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+           2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+           2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052,
+           2.048, 2.045, 2.042),
+    0.99: (63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250,
+           3.169, 3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878,
+           2.861, 2.845, 2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771,
+           2.763, 2.756, 2.750)}
+_Z_VALUES = {0.95: 1.960, 0.99: 2.576}
+
+
+def t_critical(df: int, confidence: float = 0.95) -> float:
+    """Return the two-sided Student's t critical value.
+
+    Args:
+        df: The degrees of freedom (at least 1)
+
+        confidence: The confidence level, either 0.95 or 0.99
+
+    Returns:
+        The critical value
+
+    Raises:
+        ValueError: The confidence level is not supported
+
+    """
+    if confidence not in _T_TABLE:
+        raise ValueError('confidence must be 0.95 or 0.99, not '
+                         + repr(confidence))
+    if df <= len(_T_TABLE[confidence]):
+        return _T_TABLE[confidence][df - 1]
+    return _Z_VALUES[confidence]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Return a percentile of sorted values by linear interpolation.
+
+    Args:
+        sorted_values: The values, in ascending order (at least one)
+
+        fraction: The percentile as a fraction between 0 and 1
+
+    Returns:
+        The percentile
+
+    """
+    position = (len(sorted_values) - 1) * fraction
+    low = math.floor(position)
+    high = math.ceil(position)
+    if low == high:
+        return float(sorted_values[low])
+    return (sorted_values[low] * (high - position)
+            + sorted_values[high] * (position - low))
+
+
+def reject_outliers(values: Sequence[float]
+                    ) -> Tuple[List[float], List[float]]:
+    """Split values into those within the Tukey fences and the outliers.
+
+    Args:
+        values: The values
+
+    Returns:
+        The kept values and the outliers, each in the original order
+
+    """
+    if len(values) < 4:
+        return list(values), []
+    ordered = sorted(values)
+    q1 = percentile(ordered, 0.25)
+    q3 = percentile(ordered, 0.75)
+    fence = 1.5 * (q3 - q1)
+    kept = [v for v in values if q1 - fence <= v <= q3 + fence]
+    outliers = [v for v in values if not q1 - fence <= v <= q3 + fence]
+    return kept, outliers
+
+
+class BenchResult():
+    """Class BenchResult holds the measurements and statistics of one run.
+
+    All times are nanoseconds per call of the benchmarked function.
+    """
+
+    def __init__(self, name: str, *,
+                 loops: int,
+                 warmup: int,
+                 times_ns: Sequence[float],
+                 confidence: float = 0.95,
+                 outliers: bool = True,
+                 info: Optional[Dict[str, Any]] = None) -> None:
+        """Stores the measurements and computes the statistics.
+
+        Args:
+            name: The name of the benchmark
+
+            loops: The number of calls per repetition
+
+            warmup: The number of warmup repetitions that were run
+
+            times_ns: The time per call of each repetition
+
+            confidence: The confidence level of the interval, 0.95 or 0.99
+
+            outliers: Specifies whether outlier repetitions are rejected
+
+            info: The python version and platform information. The default
+                is None, which uses the current ones.
+
+        """
+        self.name = name
+        self.loops = loops
+        self.warmup = warmup
+        self.times_ns = list(times_ns)
+        self.confidence = confidence
+        self.outliers = outliers
+        self.info = dict(info) if info is not None else environment_info()
+        if outliers:
+            self.kept_ns, self.outliers_ns = reject_outliers(self.times_ns)
+        else:
+            self.kept_ns, self.outliers_ns = list(self.times_ns), []
+
+        kept = self.kept_ns
+        self.mean_ns = statistics.mean(kept)
+        self.median_ns = statistics.median(kept)
+        self.min_ns = min(kept)
+        self.max_ns = max(kept)
+        if len(kept) > 1:
+            self.stdev_ns = statistics.stdev(kept)
+            margin = (t_critical(len(kept) - 1, confidence)
+                      * self.stdev_ns / math.sqrt(len(kept)))
+        else:
+            self.stdev_ns = 0.0
+            margin = 0.0
+        self.ci_low_ns = self.mean_ns - margin
+        self.ci_high_ns = self.mean_ns + margin
+
+    def summary_msg(self) -> str:
+        """Return a one line summary for the flower box."""
+        return (self.name + ': ' + format_ns(self.mean_ns)
+                + ' +- ' + format_ns(self.ci_high_ns - self.mean_ns)
+                + ' (' + '{:.0%}'.format(self.confidence) + ' CI), stdev '
+                + format_ns(self.stdev_ns) + ', median '
+                + format_ns(self.median_ns) + ', min '
+                + format_ns(self.min_ns) + ', ' + str(self.loops) + ' loops x '
+                + str(len(self.times_ns)) + ' runs, '
+                + str(len(self.outliers_ns)) + ' outliers')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as a dictionary suitable for JSON."""
+        return {'name': self.name,
+                'loops': self.loops,
+                'warmup': self.warmup,
+                'confidence': self.confidence,
+                'outliers': self.outliers,
+                'times_ns': self.times_ns,
+                'outliers_ns': self.outliers_ns,
+                'mean_ns': self.mean_ns,
+                'stdev_ns': self.stdev_ns,
+                'median_ns': self.median_ns,
+                'min_ns': self.min_ns,
+                'max_ns': self.max_ns,
+                'ci_low_ns': self.ci_low_ns,
+                'ci_high_ns': self.ci_high_ns,
+                'info': self.info}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BenchResult':
+        """Return the result for a dictionary created by *to_dict*."""
+        return cls(data['name'], loops=data['loops'], warmup=data['warmup'],
+                   times_ns=data['times_ns'],
+                   confidence=data['confidence'],
+                   outliers=data['outliers'],
+                   info=data['info'])
+
+
+def environment_info() -> Dict[str, Any]:
+    """Return the facts about this machine that affect the results."""
+    clock = time.get_clock_info('perf_counter')
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'timer_resolution_ns': clock.resolution * 1_000_000_000,
+            'date': datetime.now().isoformat(timespec='seconds')}
+
+
+def calibrate_loops(func: Callable[..., Any], args: Sequence[Any] = (),
+                    min_time: float = 0.02) -> int:
+    """Return the number of calls that take at least min_time seconds.
+
+    Args:
+        func: The function to call
+
+        args: The positional arguments for func
+
+        min_time: The minimum duration of one repetition in seconds
+
+    Returns:
+        The loop count, found by trying 1, 2, 5, 10, 20, 50, ...
+
+    """
+    min_time_ns = min_time * 1_000_000_000
+    loops = 1
+    while True:
+        for multiplier in (1, 2, 5):
+            count = loops * multiplier
+            if _run_loops(func, args, count) >= min_time_ns:
+                return count
+        loops *= 10
+
+
+def _run_loops(func: Callable[..., Any], args: Sequence[Any],
+               loops: int) -> int:
+    """Return the nanoseconds taken by loops calls of func."""
+    loop_range = range(loops)
+    timer = time.perf_counter_ns
+    start = timer()
+    for _ in loop_range:
+        func(*args)
+    return timer() - start
+
+
+def bench(func: Callable[..., Any], *,
+          args: Sequence[Any] = (),
+          name: Optional[str] = None,
+          warmup: int = 1,
+          repeat: int = 20,
+          loops: int = 0,
+          min_time: float = 0.02,
+          confidence: float = 0.95,
+          outliers: bool = True) -> BenchResult:
+    """Benchmark a function.
+
+    Args:
+        func: The function to benchmark
+
+        args: The positional arguments to call func with. The default is
+            no arguments.
+
+        name: The name of the benchmark. The default is None, which uses
+            the name of func.
+
+        warmup: The number of unmeasured repetitions to run first. The
+            default is 1.
+
+        repeat: The number of measured repetitions. The default is 20.
+
+        loops: The number of calls per repetition. The default is 0, which
+            calibrates the count using min_time.
+
+        min_time: The minimum duration in seconds of one repetition when
+            calibrating. The default is 0.02.
+
+        confidence: The confidence level of the interval, 0.95 or 0.99.
+            The default is 0.95.
+
+        outliers: Specifies whether outlier repetitions are rejected. The
+            default is True.
+
+    Returns:
+        The BenchResult
+
+    """
+    if name is None:
+        name = getattr(func, '__qualname__', None) or repr(func)
+    if loops <= 0:
+        loops = calibrate_loops(func, args, min_time)
+    for _ in range(warmup):
+        _run_loops(func, args, loops)
+    times_ns = [_run_loops(func, args, loops) / loops
+                for _ in range(repeat)]
+    return BenchResult(name, loops=loops, warmup=warmup, times_ns=times_ns,
+                       confidence=confidence, outliers=outliers)
+
+
+class Benchmark():
+    """Class Benchmark runs a set of benchmarks and reports the results.
+
+    Functions are added with *add*, which can also be used as a decorator,
+    and *run* benchmarks them all between the start and end messages of a
+    StartStopHeader (see the time_hdr module), followed by a summary box.
+    """
+
+    def __init__(self, name: str = 'benchmarks', **bench_options: Any
+                 ) -> None:
+        """Stores the options shared by all benchmarks in the set.
+
+        Args:
+            name: The name to appear in the start and end messages
+
+            bench_options: Any of the bench keyword arguments other than
+                args and name (for example, repeat or min_time)
+
+        """
+        self.name = name
+        self.bench_options = bench_options
+        self._entries: List[Tuple[str, Callable[..., Any],
+                                  Sequence[Any]]] = []
+        self.results: List[BenchResult] = []
+
+    def add(self, func: Callable[..., Any], *,
+            name: Optional[str] = None,
+            args: Sequence[Any] = ()) -> Callable[..., Any]:
+        """Add a function to benchmark.
+
+        Args:
+            func: The function to benchmark
+
+            name: The name of the benchmark. The default is None, which
+                uses the name of func.
+
+            args: The positional arguments to call func with
+
+        Returns:
+            func, so that add can be used as a decorator
+
+        """
+        if name is None:
+            name = func.__qualname__
+        self._entries.append((name, func, args))
+        return func
+
+    def run(self, *, file: Optional[TextIO] = None) -> List[BenchResult]:
+        """Run all benchmarks and print the summary.
+
+        Args:
+            file: Specifies the argument to use on the print statement
+                *file* parameter. The default is sys.stdout (via None).
+
+        Returns:
+            The results, which are also kept in the results attribute
+
+        """
+        if file is None:
+            file = sys.stdout
+        header = StartStopHeader(self.name)
+        header.print_start_msg(file=file)
+        self.results = [bench(func, args=args, name=name,
+                              **self.bench_options)
+                        for name, func, args in self._entries]
+        header.print_end_msg(file=file)
+        print_summary(self.results, file=file)
+        return self.results
+
+    def save_json(self, path: str) -> None:
+        """Write the results of the last run to a JSON file."""
+        save_json(self.results, path)
+
+
+def print_summary(results: Sequence[BenchResult], *,
+                  file: Optional[TextIO] = None) -> None:
+    """Print one summary line per result in a flower box.
+
+    Args:
+        results: The results to summarize
+
+        file: Specifies the argument to use on the print statement *file*
+            parameter. The default is sys.stdout (via None).
+
+    """
+    if file is None:
+        file = sys.stdout
+    msgs = ['Benchmark results (time per call)']
+    msgs.extend(result.summary_msg() for result in results)
+    print_flower_box_msg(msgs, file=file)
+
+
+def save_json(results: Sequence[BenchResult], path: str) -> None:
+    """Write results to a JSON file.
+
+    Args:
+        results: The results to write
+
+        path: The path of the file
+
+    """
+    with open(path, 'w') as out:
+        json.dump({'results': [result.to_dict() for result in results]},
+                  out, indent=1)
+
+
+def load_json(path: str) -> List[BenchResult]:
+    """Read results written by save_json.
+
+    Args:
+        path: The path of the file
+
+    Returns:
+        The results
+
+    """
+    with open(path) as json_file:
+        data = json.load(json_file)
+    return [BenchResult.from_dict(entry) for entry in data['results']]
+
+
+def compare_results(baseline: Sequence[BenchResult],
+                    current: Sequence[BenchResult]) -> List[str]:
+    """Return one line per benchmark comparing two runs.
+
+    A change is only called slower or faster when the confidence intervals
+    of the two runs do not overlap; otherwise it is within the noise.
+
+    Args:
+        baseline: The results of the earlier run
+
+        current: The results of the later run
+
+    Returns:
+        The comparison lines, for the benchmarks present in both runs
+
+    """
+    by_name = {result.name: result for result in baseline}
+    msgs = []
+    for result in current:
+        old = by_name.get(result.name)
+        if old is None:
+            continue
+        change = result.mean_ns / old.mean_ns - 1
+        if result.ci_low_ns > old.ci_high_ns:
+            verdict = 'slower'
+        elif result.ci_high_ns < old.ci_low_ns:
+            verdict = 'faster'
+        else:
+            verdict = 'no significant change'
+        msgs.append(result.name + ': ' + format_ns(old.mean_ns) + ' -> '
+                    + format_ns(result.mean_ns) + ' ('
+                    + '{:+.1%}'.format(change) + ', ' + verdict + ')')
+    return msgs
+
+
+def find_regressions(baseline: Sequence[BenchResult],
+                     current: Sequence[BenchResult],
+                     threshold: float = 0.10) -> List[str]:
+    """Return a line for each benchmark that got slower than allowed.
+
+    A benchmark has regressed when its mean grew by more than threshold
+    and the confidence intervals of the two runs do not overlap, so that
+    noise alone does not fail a comparison. A benchmark that is missing
+    from the baseline is also reported, since it cannot be checked until
+    the baseline is saved again.
+
+    Args:
+        baseline: The results of the earlier run
+
+        current: The results of the later run
+
+        threshold: The allowed relative increase of the mean. The default
+            is 0.10 (10 percent).
+
+    Returns:
+        The lines describing the regressions, empty if there are none
+
+    """
+    by_name = {result.name: result for result in baseline}
+    msgs = []
+    for result in current:
+        old = by_name.get(result.name)
+        if old is None:
+            msgs.append(result.name + ': not in the baseline')
+            continue
+        change = result.mean_ns / old.mean_ns - 1
+        if change > threshold and result.ci_low_ns > old.ci_high_ns:
+            msgs.append(result.name + ': ' + format_ns(old.mean_ns) + ' -> '
+                        + format_ns(result.mean_ns) + ' ('
+                        + '{:+.1%}'.format(change) + ' exceeds '
+                        + '{:.0%}'.format(threshold) + ')')
+    return msgs
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 22:31:26 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+===========
+calibration
+===========
+
+With **time_box(compensate=True)**, you can have the elapsed time of very
+short functions reported without the fixed cost of time_box itself:
+
+:Example: compensate elapsed times with a known calibration
+
+>>> from sbt_utils.calibration import Calibration
+>>> calibration = Calibration(resolution_ns=1, timer_ns=40, fixed_ns=1_500,
+...                           uncertainty_ns=60)
+>>> calibration.compensate(13_845)
+12345
+>>> calibration.format_elapsed(13_845)
+'12.345us +- 61ns'
+>>> calibration.format_elapsed(1_900)
+'below resolution'
+
+
+The elapsed time of a call wrapped by time_box is the difference of two
+time.perf_counter_ns readings, and everything time_box does between them
+is included. The largest part is writing the start message, which depends
+on the file, so with compensate=True it is timed on each call (as
+start_cost_ns of the StartStopHeader) and subtracted. The rest (returning
+to the wrapper, calling the function, and taking the end time) is a fixed
+cost, which **calibrate** measures on the current machine by timing an
+empty function with time_box many times, together with the cost of one
+perf_counter_ns call and the clock resolution from time.get_clock_info:
+
+    1) fixed_ns is the median elapsed time of the empty calls, less their
+       start_cost_ns.
+    2) uncertainty_ns is half the interquartile range of those times, and
+       the clock resolution is added to it when an elapsed time is shown.
+    3) A compensated time below one microsecond (or below the clock
+       resolution, if coarser) is shown as "below resolution", since it is
+       within the noise of the measurement.
+
+The calibration of the current process is computed once, on first use, by
+**get_calibration** (it takes a few milliseconds). The memory tracking and
+profiling of time_box are not part of the fixed cost, so the compensated
+times with *track_memory* or *profile* still include some of their cost.
+
+"""
+
+import time
+from typing import Any, List, NamedTuple, Optional
+
+from sbt_utils.stats import format_ns
+
+
+class Calibration(NamedTuple):
+    """The measured timing costs of time_box on this machine."""
+    resolution_ns: float
+    timer_ns: float
+    fixed_ns: float
+    uncertainty_ns: float
+
+    def compensate(self, elapsed_ns: int) -> int:
+        """Return an elapsed time without the fixed cost.
+
+        Args:
+            elapsed_ns: The measured elapsed time
+
+        Returns:
+            The elapsed time less fixed_ns, but not less than 0
+
+        """
+        return max(elapsed_ns - round(self.fixed_ns), 0)
+
+    def format_elapsed(self, elapsed_ns: int) -> str:
+        """Return the compensated elapsed time with its uncertainty.
+
+        Args:
+            elapsed_ns: The measured elapsed time
+
+        Returns:
+            The compensated time, or "below resolution"
+
+        """
+        compensated_ns = self.compensate(elapsed_ns)
+        if compensated_ns < max(1_000, self.resolution_ns):
+            return 'below resolution'
+        return (format_ns(compensated_ns) + ' +- '
+                + format_ns(self.uncertainty_ns + self.resolution_ns))
+
+    def summary_msg(self) -> str:
+        """Return a one line description of the calibration."""
+        return ('perf_counter resolution ' + format_ns(self.resolution_ns)
+                + ', perf_counter_ns call ' + format_ns(self.timer_ns)
+                + ', time_box fixed cost ' + format_ns(self.fixed_ns)
+                + ' +- ' + format_ns(self.uncertainty_ns))
+
+
+def _median(values: List[int]) -> float:
+    """Return the median of sorted values."""
+    middle = len(values) // 2
+    if len(values) % 2:
+        return float(values[middle])
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def calibrate(samples: int = 1000) -> Calibration:
+    """Measure the timing costs of time_box.
+
+    Args:
+        samples: The number of timed empty calls. The default is 1000.
+
+    Returns:
+        The calibration
+
+    """
+    from sbt_utils.time_hdr import _BoxRunner
+
+    class _NullFile():
+        def write(self, text: str) -> int:
+            return 0
+
+        def flush(self) -> None:
+            pass
+
+    perf_counter_ns = time.perf_counter_ns
+    timer = []
+    for _ in range(samples):
+        timer.append(-perf_counter_ns() + perf_counter_ns())
+    timer.sort()
+
+    def empty() -> None:
+        pass
+
+    resolution_ns = time.get_clock_info('perf_counter').resolution * 1e9
+    null: Any = _NullFile()
+    runner = _BoxRunner('calibrate', file=null)
+    # a calibration without a fixed cost has the start cost measured
+    runner.calibration = Calibration(resolution_ns, _median(timer), 0, 0)
+    runner(empty, (), {})  # load the deferred imports first
+    elapsed = []
+    for _ in range(samples):
+        call = runner.start()
+        empty()
+        runner.finish(call)
+        header = call.header
+        elapsed.append(header.elapsed_ns - header.start_cost_ns)
+    elapsed.sort()
+
+    quarter = len(elapsed) // 4
+    return Calibration(
+        resolution_ns=resolution_ns,
+        timer_ns=_median(timer),
+        fixed_ns=_median(elapsed),
+        uncertainty_ns=(elapsed[-1 - quarter] - elapsed[quarter]) / 2)
+
+
+_calibration: Optional[Calibration] = None
+
+
+def get_calibration() -> Calibration:
+    """Return the calibration of this process, measuring it on first use.
+
+    Returns:
+        The calibration
+
+    """
+    global _calibration
+    if _calibration is None:
+        _calibration = calibrate()
+    return _calibration
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 23:12:40 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=====
+clock
+=====
+
+With **time_box(clock=...)**, **StartStopHeader(clock=...)**, or
+**set_clock**, you can choose the clock that time_box reads, for example a
+simulated clock that makes the messages of a test predictable:
+
+:Example: time a function with a simulated clock
+
+>>> from datetime import datetime
+>>> from sbt_utils.clock import SimulatedClock
+>>> from sbt_utils.time_hdr import time_box
+
+>>> clock = SimulatedClock(datetime(2026, 10, 19, 9, 30))
+>>> @time_box(clock=clock)
+... def aFunc13() -> None:
+...      clock.sleep(1.5)
+
+>>> aFunc13()
+<BLANKLINE>
+************************************************
+* Starting aFunc13 on Mon Oct 19 2026 09:30:00 *
+************************************************
+<BLANKLINE>
+**********************************************
+* Ending aFunc13 on Mon Oct 19 2026 09:30:01 *
+* Elapsed time: 0:00:01.500000               *
+**********************************************
+
+
+A clock provides three readings: **now**, the wall clock time as a
+datetime for the messages, **time_ns**, the wall clock time in nanoseconds
+since the epoch for the JSON events, and **monotonic_ns**, for the elapsed
+times recorded in the stats and sinks. The clock module contains:
+
+    1) Clock, the abstract base class of the clocks.
+    2) SystemClock class, the default, which reads datetime.now,
+       time.time_ns, and time.perf_counter_ns.
+    3) CoarseClock class, which reads CLOCK_REALTIME_COARSE and
+       CLOCK_MONOTONIC_COARSE with time.clock_gettime_ns. These only
+       advance every few milliseconds, so they are meant for functions that
+       run long enough for millisecond precision. They are cheap to read
+       because they do not read the clock hardware, which helps where the
+       clock source is slow to read (such as hpet, or virtual machines
+       whose clock source needs a system call). With the tsc clock source
+       of most current machines, the cost of the python call dominates and
+       both clocks cost about the same. Where the coarse clocks are not
+       available (they are specific to Linux), time.time_ns and
+       time.monotonic_ns are read.
+    4) SimulatedClock class, which only advances when told to, so that
+       tests and examples get the same times on every run.
+    5) set_clock function, which sets the clock of the StartStopHeaders that
+       are not given one, including those created by time_box.
+
+"""
+
+import abc
+import functools
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+
+class Clock(abc.ABC):
+    """Class Clock is the base class of the clocks used by time_box."""
+
+    @abc.abstractmethod
+    def now(self) -> datetime:
+        """Return the wall clock time for the messages."""
+
+    @abc.abstractmethod
+    def time_ns(self) -> int:
+        """Return the wall clock time in nanoseconds since the epoch."""
+
+    @abc.abstractmethod
+    def monotonic_ns(self) -> int:
+        """Return a monotonic time in nanoseconds for elapsed times."""
+
+
+class SystemClock(Clock):
+    """Class SystemClock reads the usual system clocks."""
+
+    # the readings are the functions themselves, so reading this clock
+    # costs no more than calling them directly
+    now = staticmethod(datetime.now)
+    time_ns = staticmethod(time.time_ns)
+    monotonic_ns = staticmethod(time.perf_counter_ns)
+
+
+# the time module does not name the coarse clocks, so the Linux clock ids
+# are used
+CLOCK_REALTIME_COARSE = 5
+CLOCK_MONOTONIC_COARSE = 6
+
+_coarse_time_ns: Callable[[], int]
+_coarse_monotonic_ns: Callable[[], int]
+if sys.platform.startswith('linux'):
+    _coarse_time_ns = functools.partial(time.clock_gettime_ns,
+                                        CLOCK_REALTIME_COARSE)
+    _coarse_monotonic_ns = functools.partial(time.clock_gettime_ns,
+                                             CLOCK_MONOTONIC_COARSE)
+else:
+    _coarse_time_ns = time.time_ns
+    _coarse_monotonic_ns = time.monotonic_ns
+
+
+class CoarseClock(Clock):
+    """Class CoarseClock reads the cheap, millisecond precision clocks."""
+
+    time_ns = staticmethod(_coarse_time_ns)
+    monotonic_ns = staticmethod(_coarse_monotonic_ns)
+
+    def now(self) -> datetime:
+        """Return the coarse wall clock time for the messages."""
+        return datetime.fromtimestamp(_coarse_time_ns() / 1_000_000_000)
+
+
+class SimulatedClock(Clock):
+    """Class SimulatedClock is a deterministic clock for tests."""
+
+    def __init__(self, start: datetime = datetime(2020, 1, 1), *,
+                 tick: float = 0.0) -> None:
+        """Stores the start time of the clock.
+
+        Args:
+            start: The wall clock time of the first reading. The default
+                is midnight, January 1, 2020 (local time).
+
+            tick: The seconds that the clock advances after each reading,
+                so that back to back readings differ. The default is 0.0.
+
+        """
+        self.start = start
+        self.tick_ns = round(tick * 1_000_000_000)
+        self.elapsed_ns = 0
+        self._start_ns = round(start.timestamp() * 1_000_000_000)
+
+    def advance(self, seconds: float) -> None:
+        """Advance the clock.
+
+        Args:
+            seconds: The time to advance by
+
+        """
+        self.elapsed_ns += round(seconds * 1_000_000_000)
+
+    def sleep(self, seconds: float) -> None:
+        """Advance the clock, for use in place of time.sleep.
+
+        Args:
+            seconds: The time to advance by
+
+        """
+        self.advance(seconds)
+
+    def _read(self) -> int:
+        """Return the elapsed time and advance it by the tick."""
+        elapsed_ns = self.elapsed_ns
+        self.elapsed_ns += self.tick_ns
+        return elapsed_ns
+
+    def now(self) -> datetime:
+        """Return the simulated wall clock time."""
+        return self.start + timedelta(microseconds=self._read() // 1000)
+
+    def time_ns(self) -> int:
+        """Return the simulated time in nanoseconds since the epoch."""
+        return self._start_ns + self._read()
+
+    def monotonic_ns(self) -> int:
+        """Return the simulated time in nanoseconds since the start."""
+        return self._read()
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+def set_clock(clock: Optional[Clock]) -> Clock:
+    """Set the clock of the StartStopHeaders not given one.
+
+    Args:
+        clock: The clock to use, or None for the SystemClock
+
+    Returns:
+        The clock that was used before, to restore later
+
+    """
+    from sbt_utils.time_hdr import StartStopHeader
+    previous = StartStopHeader.clock
+    StartStopHeader.clock = SYSTEM_CLOCK if clock is None else clock
+    return SYSTEM_CLOCK if previous is None else previous
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 17:02:44 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=========
+file_sink
+=========
+
+With **RotatingFileSink**, you can send the flower boxes of
+print_flower_box_msg and time_box to a long-lived log file that is written
+in large chunks and rotated by size or age:
+
+:Example: write a flower box to a log file
+
+>>> from sbt_utils.flower_box import print_flower_box_msg
+>>> from sbt_utils.file_sink import RotatingFileSink
+>>> import os, tempfile
+
+>>> path = os.path.join(tempfile.mkdtemp(), 'boxes.log')
+>>> with RotatingFileSink(path, max_bytes=1_000_000) as log_file:
+...     print_flower_box_msg('Hello', file=log_file, flush=True)
+>>> with open(path) as f:
+...     print(f.read(), end='')
+<BLANKLINE>
+*********
+* Hello *
+*********
+
+
+A RotatingFileSink is a text file object, so it can be passed as the *file*
+argument of print_flower_box_msg, StartStopHeader, and time_box. Writes go
+to an in-memory buffer, which is written to the file:
+
+    1) when buffer_size characters are waiting,
+    2) by a background thread every flush_interval seconds,
+    3) when flush is called and flush_interval seconds have passed since
+       the last write (so flush=True, which calls flush once per line,
+       costs one write per interval rather than one per line), and
+    4) when the sink is closed, which also happens at exit.
+
+Before a write, the file is rotated when it would grow beyond max_bytes or
+when it has been open for rotate_interval seconds. Rotation renames the
+file to path.1 (shifting older files to path.2 and so on, keeping
+backup_count of them) and, with compress=True, gzips it to path.1.gz.
+
+"""
+
+import atexit
+import gzip
+import io
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Optional, TextIO
+
+
+class RotatingFileSink(io.TextIOBase, TextIO):
+    """Class RotatingFileSink is a buffered, rotating text log file."""
+
+    def __init__(self, path: str, *,
+                 buffer_size: int = 64 * 1024,
+                 flush_interval: float = 1.0,
+                 max_bytes: int = 0,
+                 rotate_interval: float = 0.0,
+                 backup_count: int = 5,
+                 compress: bool = False,
+                 encoding: str = 'utf-8') -> None:
+        """Opens the file for append and starts the flush thread.
+
+        Args:
+            path: The path of the log file
+
+            buffer_size: The number of buffered characters that causes a
+                write. The default is 64 KiB.
+
+            flush_interval: The longest time in seconds that written text
+                stays in the buffer. The default is 1.0. With 0, every
+                flush writes the buffer and no thread is started.
+
+            max_bytes: The size in bytes beyond which the file is rotated.
+                The default is 0, which does not rotate by size.
+
+            rotate_interval: The age in seconds at which the file is
+                rotated. The default is 0.0, which does not rotate by age.
+
+            backup_count: The number of rotated files to keep. The default
+                is 5. With 0, the file is started over on rotation.
+
+            compress: If True, rotated files are compressed with gzip. The
+                default is False.
+
+            encoding: The encoding of the file. The default is 'utf-8'.
+
+        """
+        super().__init__()
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self._encoding = encoding
+        self._parts: Deque[str] = deque()
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        self._size = self._file.tell()
+        self._opened = self._last_write = time.monotonic()
+        self._stopped = False
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._thread = threading.Thread(target=self._run,
+                                            name='RotatingFileSink',
+                                            daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def name(self) -> str:
+        """Return the path of the file."""
+        return self.path
+
+    @property
+    def mode(self) -> str:
+        """Return the mode of the file, which is always 'a'."""
+        return 'a'
+
+    @property
+    def buffer(self) -> Any:
+        """The sink has no binary buffer to expose."""
+        raise io.UnsupportedOperation('buffer')
+
+    def writable(self) -> bool:
+        """Return True, since the sink can be written."""
+        return True
+
+    def write(self, text: str) -> int:
+        """Add text to the buffer, writing the buffer when it is full.
+
+        Args:
+            text: The text to write
+
+        Returns:
+            The number of characters written
+
+        Raises:
+            ValueError: The sink is closed
+
+        """
+        if self._stopped:
+            raise ValueError('I/O operation on closed file.')
+        # deque.append is atomic, so writers only take the lock to write
+        self._parts.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            with self._lock:
+                self._write_buffer()
+        return len(text)
+
+    def flush(self) -> None:
+        """Write the buffer if flush_interval has passed since the last."""
+        if time.monotonic() - self._last_write >= self.flush_interval:
+            with self._lock:
+                self._write_buffer()
+
+    def close(self) -> None:
+        """Stop the flush thread, write the buffer, and close the file.
+
+        Closing a sink more than once has no effect.
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        atexit.unregister(self.close)
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._write_buffer()
+            self._file.close()
+        super().close()
+
+    def _write_buffer(self) -> None:
+        """Write the buffered text to the file (lock held)."""
+        parts = self._parts
+        count = len(parts)
+        if not count:
+            return
+        self._buffered = 0
+        # popleft is atomic, so text written meanwhile stays buffered
+        data = ''.join([parts.popleft() for _ in range(count)]
+                       ).encode(self._encoding)
+        if self._size and (
+                (self.max_bytes and self._size + len(data) > self.max_bytes)
+                or (self.rotate_interval and time.monotonic() - self._opened
+                    >= self.rotate_interval)):
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        self._last_write = time.monotonic()
+
+    def _rotate(self) -> None:
+        """Move the file to the first backup and start a new one."""
+        self._file.close()
+        if self.backup_count > 0:
+            suffix = '.gz' if self.compress else ''
+            oldest = self.path + '.' + str(self.backup_count) + suffix
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for number in range(self.backup_count - 1, 0, -1):
+                source = self.path + '.' + str(number) + suffix
+                if os.path.exists(source):
+                    os.replace(source, self.path + '.' + str(number + 1)
+                               + suffix)
+            if self.compress:
+                with open(self.path, 'rb') as source_file, \
+                        gzip.open(self.path + '.1.gz', 'wb') as gz_file:
+                    shutil.copyfileobj(source_file, gz_file)
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.path + '.1')
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'ab')
+        self._size = 0
+        self._opened = time.monotonic()
+
+    def _run(self) -> None:
+        """Write the buffer every flush_interval seconds until closed."""
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            with self._lock:
+                if not self._stopped:
+                    self._write_buffer()
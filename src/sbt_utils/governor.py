@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 21:05:17 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+========
+governor
+========
+
+With **time_box(overhead_budget=...)**, you can keep the instrumentation of
+a function that turns out to be called very often from dominating its run
+time:
+
+:Example: let time_box back off from a hot function
+
+>>> from sbt_utils.time_hdr import time_box
+>>> import io
+
+>>> log = io.StringIO()
+>>> @time_box(overhead_budget=0.01, file=log)
+... def aFunc12() -> int:
+...      return 42
+
+>>> for _ in range(1000):
+...     _ = aFunc12()
+>>> aFunc12._time_box_runner.governor.level
+'sample'
+>>> 'Overhead budget exceeded for aFunc12' in log.getvalue()
+True
+
+
+The OverheadGovernor of a function times the work that time_box does
+around each call (the messages, statistics, sinks, and so on) and the call
+itself. After every *window* timed calls it compares the two, and when the
+instrumentation costs more than the budget (a fraction of the run time of
+the function) it downgrades the function:
+
+    1) 'full': every call is handled by time_box (the initial level).
+    2) 'sample': only 1 in sample_every calls is handled, where
+       sample_every is chosen to bring the cost within the budget (at most
+       max_sample_every). The other calls are only counted.
+    3) 'count': calls are only counted. This level is reached when the
+       budget is still exceeded while sampling 1 in max_sample_every calls.
+
+Each downgrade is reported once, in a flower box (or as a "downgrade"
+event with format='jsonl') on the file of time_box. A function is never
+upgraded again. The calls that are only counted are added to the
+untimed_count of the FuncStats when time_box has *stats*, and to the
+untimed_calls of the governor otherwise.
+
+"""
+
+import itertools
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple, TYPE_CHECKING
+
+from sbt_utils.flower_box import print_flower_box_msg
+
+if TYPE_CHECKING:
+    from sbt_utils.time_hdr import _BoxRunner
+
+LEVEL_FULL = 'full'
+LEVEL_SAMPLE = 'sample'
+LEVEL_COUNT = 'count'
+
+
+class OverheadGovernor():
+    """Class OverheadGovernor downgrades the time_box handling of a function.
+
+    One OverheadGovernor is created for each function wrapped by time_box
+    with an overhead_budget, and is available as the governor attribute
+    of its runner.
+    """
+
+    def __init__(self, runner: '_BoxRunner', budget: float, *,
+                 window: int = 100,
+                 max_sample_every: int = 1000) -> None:
+        """Stores the budget and starts at the full level.
+
+        Args:
+            runner: The _BoxRunner of the function
+
+            budget: The largest acceptable cost of the instrumentation, as a
+                fraction of the run time of the function (0.01 is 1%)
+
+            window: The number of timed calls between the checks of the
+                cost. The default is 100.
+
+            max_sample_every: The sparsest sampling before only counting.
+                The default is 1000.
+
+        """
+        self.runner = runner
+        self.budget = budget
+        self.window = window
+        self.max_sample_every = max_sample_every
+        self.level = LEVEL_FULL
+        self.sample_every = 1
+        self.untimed_calls = 0
+        self._calls = itertools.count(1)
+        self._count_untimed = (self._record_untimed
+                               if runner.func_stats is None
+                               else runner.func_stats.record_untimed)
+        self._skip = True
+        self._timed = 0
+        self._overhead_ns = 0
+        self._run_ns = 0
+        self._lock = threading.Lock()
+
+    def _record_untimed(self) -> None:
+        """Count an untimed call when time_box has no stats."""
+        with self._lock:
+            self.untimed_calls += 1
+
+    def call(self, wrapped: Callable[..., Any],
+             args: Tuple[Any, ...],
+             kwargs: Dict[str, Any]) -> Any:
+        """Call wrapped, with the time_box handling the level allows."""
+        # the level check is repeated inline in both call methods since the
+        # untimed calls should cost as little as possible
+        level = self.level
+        if level != LEVEL_FULL and (
+                level == LEVEL_COUNT
+                or next(self._calls) % self.sample_every):
+            self._count_untimed()
+            return wrapped(*args, **kwargs)
+        runner = self.runner
+        perf_counter_ns = time.perf_counter_ns
+        before_ns = perf_counter_ns()
+        call = runner.start()
+        start_ns = perf_counter_ns()
+        try:
+            ret_value = wrapped(*args, **kwargs)
+        except BaseException:
+            runner.fail(call)
+            raise
+        end_ns = perf_counter_ns()
+        runner.finish(call)
+        self._measure(start_ns - before_ns + perf_counter_ns() - end_ns,
+                      end_ns - start_ns)
+        return ret_value
+
+    async def call_async(self, wrapped: Callable[..., Any],
+                         args: Tuple[Any, ...],
+                         kwargs: Dict[str, Any]) -> Any:
+        """Await wrapped, with the time_box handling the level allows."""
+        level = self.level
+        if level != LEVEL_FULL and (
+                level == LEVEL_COUNT
+                or next(self._calls) % self.sample_every):
+            self._count_untimed()
+            return await wrapped(*args, **kwargs)
+        runner = self.runner
+        perf_counter_ns = time.perf_counter_ns
+        before_ns = perf_counter_ns()
+        call = runner.start()
+        start_ns = perf_counter_ns()
+        try:
+            ret_value = await wrapped(*args, **kwargs)
+        except BaseException:
+            runner.fail(call)
+            raise
+        end_ns = perf_counter_ns()
+        runner.finish(call)
+        self._measure(start_ns - before_ns + perf_counter_ns() - end_ns,
+                      end_ns - start_ns)
+        return ret_value
+
+    def _measure(self, overhead_ns: int, run_ns: int) -> None:
+        """Add one timed call, and check the cost when a window is full.
+
+        Args:
+            overhead_ns: The time spent in time_box around the call
+
+            run_ns: The time spent in the call
+
+        """
+        if self._skip:
+            # the first call pays for the deferred imports of time_box
+            self._skip = False
+            return
+        self._overhead_ns += overhead_ns
+        self._run_ns += run_ns
+        self._timed += 1
+        if self._timed >= self.window:
+            self._check()
+
+    def _check(self) -> None:
+        """Downgrade the level if the last window was over the budget."""
+        with self._lock:
+            if self._timed < self.window:
+                return  # checked by another thread
+            ratio = self._overhead_ns / max(self._run_ns, 1)
+            self._timed = self._overhead_ns = self._run_ns = 0
+            if (self.level == LEVEL_COUNT
+                    or ratio / self.sample_every <= self.budget):
+                return
+            needed = math.ceil(ratio / self.budget)
+            if self.level == LEVEL_FULL or (
+                    self.sample_every < self.max_sample_every):
+                sample_every = min(needed, self.max_sample_every)
+                downgrade = self.level == LEVEL_FULL
+                self.level = LEVEL_SAMPLE
+                self.sample_every = sample_every
+                if not downgrade:
+                    return  # sparser sampling is not a new level
+            else:
+                self.level = LEVEL_COUNT
+        self._report(ratio)
+
+    def _report(self, ratio: float) -> None:
+        """Report a downgrade on the file of time_box."""
+        runner = self.runner
+        if runner.jsonl:
+            import json
+            runner._write('{"event":"downgrade","function":'
+                          + json.dumps(runner.qualname) + ',"level":"'
+                          + self.level + '","sample_every":'
+                          + str(self.sample_every) + ',"overhead":'
+                          + repr(round(ratio, 6)) + ',"budget":'
+                          + repr(self.budget) + '}\n')
+            return
+        if self.level == LEVEL_SAMPLE:
+            action = ('now timing 1 in ' + str(self.sample_every)
+                      + ' calls and counting the others')
+        else:
+            action = 'now only counting calls'
+        print_flower_box_msg(['Overhead budget exceeded for '
+                              + runner.func_name,
+                              'time_box overhead ' + '{:.1%}'.format(ratio)
+                              + ' of run time (budget '
+                              + '{:.1%}'.format(self.budget) + ')',
+                              action],
+                             end=runner.end, file=runner.file,
+                             flush=runner.flush)
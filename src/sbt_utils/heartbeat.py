@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Tue Oct 20 01:14:52 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=========
+heartbeat
+=========
+
+With **time_box(heartbeat=...)**, a function that runs for a long time
+reports that it is still running every *heartbeat* seconds between its
+start and end messages:
+
+:Example: report a long running call every 0.1 seconds
+
+>>> from sbt_utils.time_hdr import time_box
+>>> import io, time
+
+>>> log = io.StringIO()
+>>> @time_box(heartbeat=0.1, file=log)
+... def aFunc14() -> None:
+...      time.sleep(0.25)
+
+>>> aFunc14()
+>>> log.getvalue().count('Still running aFunc14')
+2
+
+
+All the calls with a heartbeat share one HeartbeatScheduler, whose thread
+sleeps until the next heartbeat is due:
+
+    1) The pending heartbeats are kept in a heap ordered by the time they
+       are due, so that starting a call or issuing a heartbeat costs
+       O(log n) for n running calls, however many there are.
+    2) Ending a call only marks its heartbeat as cancelled. The cancelled
+       heartbeats are dropped when they reach the top of the heap, and the
+       heap is compacted when it has doubled since the last compaction,
+       which keeps it in proportion to the running calls.
+    3) The thread is started for the first heartbeat and ends when no call
+       with a heartbeat is running.
+    4) A heartbeat that raises an exception (such as a write to a closed
+       file) is reported with threading.excepthook and cancelled, and the
+       other calls keep their heartbeats.
+
+A heartbeat is a flower box with the function name, its start time and the
+elapsed time (or a "heartbeat" event with format='jsonl'), written to the
+file of time_box with a single write. No heartbeat is written for a call
+after its end message.
+
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sbt_utils.time_hdr import _BoxCall, _BoxRunner
+
+
+class Heartbeat():
+    """The pending heartbeat of one call."""
+
+    __slots__ = ('runner', 'call', 'interval_ns', 'cancelled', 'lock')
+
+    def __init__(self, runner: '_BoxRunner', call: '_BoxCall',
+                 interval_ns: int) -> None:
+        self.runner = runner
+        self.call = call
+        self.interval_ns = interval_ns
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def cancel(self) -> None:
+        """Stop the heartbeats of the call.
+
+        This waits for a heartbeat being written, so that none follows the
+        end message of the call.
+        """
+        with self.lock:
+            self.cancelled = True
+
+    def beat(self) -> None:
+        """Write the heartbeat message unless the call has ended."""
+        with self.lock:
+            if not self.cancelled:
+                self.runner.write_heartbeat(self.call)
+
+
+class HeartbeatScheduler():
+    """Class HeartbeatScheduler issues the heartbeats of all running calls."""
+
+    def __init__(self) -> None:
+        """Creates the empty schedule."""
+        self._heap: List[Tuple[int, int, Heartbeat]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._compact_size = 64
+
+    def __len__(self) -> int:
+        """Return the number of pending heartbeats, including cancelled."""
+        return len(self._heap)
+
+    def schedule(self, runner: '_BoxRunner', call: '_BoxCall',
+                 interval: float) -> Heartbeat:
+        """Schedule the heartbeats of a call that has started.
+
+        Args:
+            runner: The _BoxRunner of the function
+
+            call: The state of the call
+
+            interval: The seconds between heartbeats
+
+        Returns:
+            The heartbeat, to cancel when the call ends
+
+        """
+        interval_ns = int(interval * 1_000_000_000)
+        heartbeat = Heartbeat(runner, call, interval_ns)
+        entry = (time.monotonic_ns() + interval_ns, next(self._seq),
+                 heartbeat)
+        with self._cond:
+            heap = self._heap
+            if len(heap) >= self._compact_size:
+                heap[:] = [item for item in heap if not item[2].cancelled]
+                heapq.heapify(heap)
+                self._compact_size = max(64, 2 * len(heap))
+            heapq.heappush(heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='time_box_heartbeat',
+                                                daemon=True)
+                self._thread.start()
+            elif heap[0] is entry:
+                self._cond.notify()  # due before the one being waited for
+        return heartbeat
+
+    def _next_due(self) -> Optional[Tuple[int, int, Heartbeat]]:
+        """Wait for the next heartbeat that is due (with the lock held).
+
+        Returns:
+            The entry of the heartbeat, or None when there are no more
+            calls with heartbeats
+
+        """
+        heap = self._heap
+        while True:
+            while heap and heap[0][2].cancelled:
+                heapq.heappop(heap)
+            if not heap:
+                self._thread = None
+                return None
+            wait_ns = heap[0][0] - time.monotonic_ns()
+            if wait_ns <= 0:
+                return heapq.heappop(heap)
+            self._cond.wait(wait_ns / 1_000_000_000)
+
+    def _run(self) -> None:
+        """Issue the heartbeats as they become due."""
+        try:
+            while True:
+                with self._cond:
+                    entry = self._next_due()
+                if entry is None:
+                    return
+                due_ns, _, heartbeat = entry
+                # written without the lock so that calls can start meanwhile
+                try:
+                    heartbeat.beat()
+                except Exception as exc:
+                    heartbeat.cancel()
+                    threading.excepthook(threading.ExceptHookArgs(
+                        (type(exc), exc, exc.__traceback__,
+                         threading.current_thread())))
+                if heartbeat.cancelled:
+                    continue
+                # a heartbeat that was late is not repeated to catch up
+                due_ns = max(due_ns + heartbeat.interval_ns,
+                             time.monotonic_ns())
+                with self._cond:
+                    heapq.heappush(self._heap,
+                                   (due_ns, next(self._seq), heartbeat))
+        finally:
+            # let the next schedule start a thread even if this one failed
+            with self._cond:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+
+_scheduler: Optional[HeartbeatScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> HeartbeatScheduler:
+    """Return the HeartbeatScheduler shared by all functions.
+
+    Returns:
+        The scheduler
+
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = HeartbeatScheduler()
+        return _scheduler
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 15:11:06 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+===========
+import_hook
+===========
+
+With **install_import_hook**, you can have time_box applied to functions in
+modules you can not (or do not want to) edit. A finder is placed on
+sys.meta_path, and each module whose name matches a configured glob pattern
+is instrumented (see the instrument module) right after it is imported:
+
+:Example: time the functions of a module when it is imported
+
+>>> from sbt_utils.import_hook import AutoTimeBoxConfig, install_import_hook
+>>> from sbt_utils.import_hook import uninstall_import_hook
+
+>>> config = AutoTimeBoxConfig.from_string('legacy.reports:build_*,save')
+>>> finder = install_import_hook(config)
+>>> # import legacy.reports  # build_* and save are now wrapped by time_box
+>>> uninstall_import_hook(finder)
+
+
+The configuration comes from one of two environment variables, which are
+read by install_import_hook when no config is passed:
+
+    1) SBT_UTILS_AUTO_TIME_BOX holds either inline rules or a JSON document.
+       Inline rules are separated by semicolons, and each rule is a module
+       glob pattern optionally followed by a colon and comma separated
+       function glob patterns, for example:
+
+           legacy.*:load_*,save_*;thirdparty.client
+
+       Without function patterns, all public functions (and the public
+       methods of public classes) of the matching modules are wrapped.
+
+    2) SBT_UTILS_AUTO_TIME_BOX_FILE holds the path of a JSON file.
+
+The JSON form adds the time_box mode to use:
+
+    {"rules": [{"module": "legacy.*",
+                "functions": ["load_*", "save_*"],
+                "exclude": ["save_temp"]}],
+     "options": {"threshold": 0.5, "file": "stderr"}}
+
+The options are time_box keyword arguments; file may be "stdout" or
+"stderr".
+
+To instrument a program without editing it, call install_import_hook from a
+sitecustomize module (or a .pth file) so it runs at interpreter startup.
+Imports of modules that do not match any rule pay one regular expression
+match, and the instrument module itself is only imported when the first
+matching module is loaded. See benchmarks/bench_import_hook.py for the
+measured costs. Modules that are already imported when the hook is
+installed are not instrumented.
+
+"""
+
+import os
+import re
+import sys
+from fnmatch import translate
+from types import ModuleType
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, \
+    TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sbt_utils.stats import StatsRegistry
+
+ENV_VAR = 'SBT_UTILS_AUTO_TIME_BOX'
+ENV_FILE_VAR = 'SBT_UTILS_AUTO_TIME_BOX_FILE'
+
+PUBLIC_NAMES = '[!_]*'
+
+
+class HookRule(NamedTuple):
+    """One module glob pattern and the function patterns to wrap in it."""
+    module: str
+    functions: Tuple[str, ...] = (PUBLIC_NAMES,)
+    exclude: Tuple[str, ...] = ()
+
+
+class AutoTimeBoxConfig():
+    """Class AutoTimeBoxConfig holds the rules and time_box options."""
+
+    def __init__(self, rules: Sequence[HookRule],
+                 options: Optional[Dict[str, Any]] = None) -> None:
+        """Stores the rules and options.
+
+        Args:
+            rules: The rules selecting the modules and functions to wrap
+
+            options: The time_box keyword arguments to use for the wrapped
+                functions. The default is None, which uses the time_box
+                defaults.
+
+        """
+        self.rules = list(rules)
+        self.options = dict(options or {})
+        file = self.options.get('file')
+        if file == 'stdout':
+            self.options['file'] = sys.stdout
+        elif file == 'stderr':
+            self.options['file'] = sys.stderr
+
+    @classmethod
+    def from_string(cls, text: str) -> 'AutoTimeBoxConfig':
+        """Return the config for inline rules.
+
+        Args:
+            text: Rules of the form module_glob[:func_glob,...] separated
+                by semicolons
+
+        Returns:
+            The config
+
+        """
+        rules = []
+        for rule_text in text.split(';'):
+            rule_text = rule_text.strip()
+            if not rule_text:
+                continue
+            module, _, functions = rule_text.partition(':')
+            func_patterns = tuple(f.strip() for f in functions.split(',')
+                                  if f.strip())
+            rules.append(HookRule(module.strip(),
+                                  func_patterns or (PUBLIC_NAMES,)))
+        return cls(rules)
+
+    @classmethod
+    def from_json(cls, text: str) -> 'AutoTimeBoxConfig':
+        """Return the config for a JSON document (see module docstring).
+
+        Args:
+            text: The JSON document
+
+        Returns:
+            The config
+
+        """
+        import json
+        doc = json.loads(text)
+        rules = [HookRule(rule['module'],
+                          tuple(rule.get('functions', (PUBLIC_NAMES,))),
+                          tuple(rule.get('exclude', ())))
+                 for rule in doc.get('rules', [])]
+        return cls(rules, doc.get('options'))
+
+    @classmethod
+    def from_env(cls, environ: Optional[Dict[str, str]] = None
+                 ) -> Optional['AutoTimeBoxConfig']:
+        """Return the config from the environment variables, if set.
+
+        Args:
+            environ: The environment to read. The default is None, which
+                reads os.environ.
+
+        Returns:
+            The config, or None if neither environment variable is set
+
+        """
+        if environ is None:
+            environ = dict(os.environ)
+        text = environ.get(ENV_VAR, '').strip()
+        if text:
+            if text.startswith('{'):
+                return cls.from_json(text)
+            return cls.from_string(text)
+        path = environ.get(ENV_FILE_VAR, '').strip()
+        if path:
+            with open(path) as config_file:
+                return cls.from_json(config_file.read())
+        return None
+
+    def patterns_for(self, module_name: str
+                     ) -> Tuple[List[str], List[str]]:
+        """Return the function and exclude patterns for a module.
+
+        Args:
+            module_name: The full name of the module
+
+        Returns:
+            The function patterns and exclude patterns of all rules whose
+            module pattern matches module_name
+
+        """
+        functions: List[str] = []
+        exclude: List[str] = []
+        for rule in self.rules:
+            if re.match(translate(rule.module), module_name):
+                functions.extend(rule.functions)
+                exclude.extend(rule.exclude)
+        return functions, exclude
+
+
+class _InstrumentingLoader():
+    """Delegates to the real loader and instruments the loaded module."""
+
+    def __init__(self, loader: Any, finder: 'TimeBoxFinder') -> None:
+        self._loader = loader
+        self._finder = finder
+
+    def create_module(self, spec: Any) -> Optional[ModuleType]:
+        create_module = getattr(self._loader, 'create_module', None)
+        if create_module is None:
+            return None
+        return create_module(spec)  # type: ignore
+
+    def exec_module(self, module: ModuleType) -> None:
+        self._loader.exec_module(module)
+        self._finder.instrument(module)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class TimeBoxFinder():
+    """Class TimeBoxFinder is the sys.meta_path finder for the import hook.
+
+    It does not find modules itself. For a matching module name it asks the
+    other finders on sys.meta_path for the spec and substitutes a loader
+    that instruments the module once it has been executed.
+    """
+
+    def __init__(self, config: AutoTimeBoxConfig) -> None:
+        """Stores the config and compiles the module patterns.
+
+        Args:
+            config: The rules and time_box options
+
+        """
+        self.config = config
+        self.registries: Dict[str, 'StatsRegistry'] = {}
+        if config.rules:
+            self._module_re: Optional['re.Pattern[str]'] = re.compile(
+                '|'.join('(?:' + translate(rule.module) + ')'
+                         for rule in config.rules))
+        else:
+            self._module_re = None
+
+    def find_spec(self, fullname: str,
+                  path: Optional[Sequence[str]],
+                  target: Optional[ModuleType] = None) -> Any:
+        """Return the spec with an instrumenting loader, or None.
+
+        Args:
+            fullname: The full name of the module being imported
+
+            path: The parent package __path__, or None
+
+            target: The module being reloaded, or None
+
+        Returns:
+            The spec for a matching module, or None so that the import
+            system carries on with the next finder
+
+        """
+        if (self._module_re is None
+                or self._module_re.match(fullname) is None
+                or fullname.partition('.')[0] == 'sbt_utils'):
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _InstrumentingLoader(spec.loader, self)
+        return spec
+
+    def instrument(self, module: ModuleType) -> None:
+        """Wrap the matching functions of a newly executed module.
+
+        Args:
+            module: The module to instrument
+
+        """
+        from sbt_utils.instrument import instrument_module
+
+        functions, exclude = self.config.patterns_for(module.__name__)
+        self.registries[module.__name__] = instrument_module(
+            module, functions, exclude=exclude or None,
+            **self.config.options)
+
+
+def install_import_hook(config: Optional[AutoTimeBoxConfig] = None
+                        ) -> Optional[TimeBoxFinder]:
+    """Place a TimeBoxFinder at the front of sys.meta_path.
+
+    Args:
+        config: The rules and time_box options. The default is None, which
+            reads them from the environment variables (see module
+            docstring).
+
+    Returns:
+        The installed finder, or None if no config was passed and none is
+        set in the environment
+
+    """
+    if config is None:
+        config = AutoTimeBoxConfig.from_env()
+        if config is None:
+            return None
+    finder = TimeBoxFinder(config)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall_import_hook(finder: Optional[TimeBoxFinder]) -> None:
+    """Remove a finder placed on sys.meta_path by install_import_hook.
+
+    Args:
+        finder: The finder returned by install_import_hook. None is
+            accepted and ignored.
+
+    """
+    if finder is not None and finder in sys.meta_path:
+        sys.meta_path.remove(finder)
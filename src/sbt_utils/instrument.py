@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 13:02:44 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+==========
+instrument
+==========
+
+With **time_box_class** and **instrument_module**, you can apply time_box to
+many functions in one pass instead of decorating each one:
+
+:Example: instrument the public methods of a class
+
+>>> from sbt_utils.instrument import time_box_class
+>>> import io
+
+>>> @time_box_class(file=io.StringIO())
+... class Account:
+...     def __init__(self) -> None:
+...         self.balance = 0
+...     def deposit(self, amount: int) -> None:
+...         self.balance += amount
+...     @staticmethod
+...     def currency() -> str:
+...         return 'USD'
+
+>>> account = Account()
+>>> account.deposit(10)
+>>> account.deposit(5)
+>>> Account.currency()
+'USD'
+>>> Account.time_box_stats['Account.deposit'].count
+2
+>>> 'Account.__init__' in Account.time_box_stats
+False
+
+
+The instrument module contains:
+
+    1) time_box_class, which wraps the matching methods of a class,
+       including staticmethods, classmethods, property accessors, and async
+       methods.
+    2) instrument_module, which wraps the matching functions of a module and
+       the methods of the matching classes defined in it.
+
+Both share one StatsRegistry (see the stats module) for everything they
+wrap, which is set as the time_box_stats attribute of the class or module.
+They use the same functools.wraps based wrapper as the time_box 'fast'
+engine, which lowers the cost of each call, so *engine* may only be
+'auto' or 'fast'. Functions that are not plain
+python functions (for example, builtins or functions already wrapped by
+time_box) are left as they are.
+
+Note that instrument_module rebinds the module attributes, so references
+obtained before the call (for example, by "from module import func") still
+refer to the unwrapped functions.
+
+"""
+
+import functools
+import types
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, List, Optional, Sequence, \
+    TypeVar, Union
+
+from sbt_utils.stats import StatsRegistry
+from sbt_utils.time_hdr import _BoxRunner, _check_options, _light_wrapper
+
+T = TypeVar('T', bound=type)
+
+Patterns = Union[str, Sequence[str], None]
+
+
+def _matches(name: str, include: Patterns, exclude: Patterns) -> bool:
+    """Return whether name is selected by the include and exclude patterns.
+
+    Args:
+        name: The attribute name
+
+        include: Glob pattern(s) the name must match. None selects the
+            names that do not start with an underscore.
+
+        exclude: Glob pattern(s) the name must not match
+
+    Returns:
+        True if the name is selected, False if not
+
+    """
+    if include is None:
+        if name.startswith('_'):
+            return False
+    else:
+        if isinstance(include, str):
+            include = [include]
+        if not any(fnmatchcase(name, pattern) for pattern in include):
+            return False
+    if exclude is not None:
+        if isinstance(exclude, str):
+            exclude = [exclude]
+        if any(fnmatchcase(name, pattern) for pattern in exclude):
+            return False
+    return True
+
+
+# the time_box keyword arguments that are passed on to the _BoxRunner
+_RUNNER_OPTIONS = frozenset((
+    'dt_format', 'end', 'file', 'flush', 'track_memory', 'threshold',
+    'profile', 'sink', 'format', 'overhead_budget', 'compensate', 'clock',
+    'heartbeat'))
+
+
+def _runner_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the time_box keyword arguments to pass to the _BoxRunner.
+
+    Args:
+        options: The other time_box keyword arguments given to
+            time_box_class or instrument_module
+
+    Returns:
+        The options without engine, which only time_box takes
+
+    Raises:
+        TypeError: An option is not a time_box keyword argument
+        ValueError: engine is not 'auto' or 'fast', or format is not one
+            of time_hdr.FORMATS
+
+    """
+    options = dict(options)
+    engine = options.pop('engine', 'auto')
+    _check_options(engine, options.get('format', 'box'))
+    if engine == 'wrapt':
+        raise ValueError("engine must be auto or fast (instrumented "
+                         "functions always use the fast wrapper), not "
+                         + repr(engine))
+    for name in options:
+        if name not in _RUNNER_OPTIONS:
+            raise TypeError('unexpected time_box keyword argument '
+                            + repr(name))
+    return options
+
+
+def _is_plain_function(obj: Any) -> bool:
+    """Return whether obj is a plain (not already wrapped) function."""
+    # type() is used rather than isinstance() since wrapt proxies (such as
+    # functions already decorated with time_box) pass isinstance checks
+    return (type(obj) is types.FunctionType
+            and not hasattr(obj, '_time_box_runner'))
+
+
+def _wrap(func: Callable[..., Any], stats: StatsRegistry,
+          time_box_enabled: Union[bool, Callable[..., bool]],
+          options: Any, key_suffix: str = '') -> Callable[..., Any]:
+    """Return func wrapped with a light time_box wrapper.
+
+    Args:
+        func: The plain function to wrap
+
+        stats: The shared StatsRegistry
+
+        time_box_enabled: As described for time_box
+
+        options: The time_box keyword arguments for the _BoxRunner
+
+        key_suffix: Appended to the qualified name to form the registry key,
+            used to keep property setters and deleters apart from getters
+
+    Returns:
+        The wrapper function
+
+    """
+    runner = _BoxRunner(func.__name__, qualname=func.__qualname__,
+                        func_stats=stats.get(func.__qualname__ + key_suffix),
+                        **options)
+    return _light_wrapper(func, runner, time_box_enabled)
+
+
+def _instrument_attr(attr: Any, stats: StatsRegistry,
+                     time_box_enabled: Union[bool, Callable[..., bool]],
+                     options: Any) -> Any:
+    """Return the instrumented replacement for a class attribute.
+
+    Args:
+        attr: The attribute as found in the class __dict__
+
+        stats: The shared StatsRegistry
+
+        time_box_enabled: As described for time_box
+
+        options: The time_box keyword arguments for the _BoxRunner
+
+    Returns:
+        The replacement, or None if attr is not something to instrument
+
+    """
+    if isinstance(attr, (staticmethod, classmethod)):
+        if not _is_plain_function(attr.__func__):
+            return None
+        return type(attr)(_wrap(attr.__func__, stats, time_box_enabled,
+                                options))
+
+    if isinstance(attr, property):
+        accessors: List[Any] = []
+        for func, suffix in ((attr.fget, ''),
+                             (attr.fset, '.setter'),
+                             (attr.fdel, '.deleter')):
+            if func is not None and _is_plain_function(func):
+                func = _wrap(func, stats, time_box_enabled, options, suffix)
+            accessors.append(func)
+        return property(accessors[0], accessors[1], accessors[2],
+                        attr.__doc__)
+
+    if _is_plain_function(attr):
+        return _wrap(attr, stats, time_box_enabled, options)
+
+    return None
+
+
+def time_box_class(cls: Optional[T] = None, *,
+                   include: Patterns = None,
+                   exclude: Patterns = None,
+                   stats: Optional[StatsRegistry] = None,
+                   time_box_enabled: Union[bool, Callable[..., bool]] = True,
+                   **time_box_options: Any) -> Any:
+    """Wrap the matching methods of a class with time_box.
+
+    As with time_box, time_box_class can be used as a class decorator with or
+    without arguments, or called directly with the class.
+
+    Args:
+        cls: The class whose methods are to be wrapped
+
+        include: Glob pattern or list of glob patterns selecting the method
+            names to wrap. The default is None, which selects all names
+            that do not start with an underscore.
+
+        exclude: Glob pattern or list of glob patterns for method names that
+            are not to be wrapped. The default is None.
+
+        stats: Specifies the StatsRegistry shared by the wrapped methods,
+            keyed by their qualified names. The default is None, which
+            creates a new registry for the class.
+
+        time_box_enabled: As described for time_box. The default is True.
+
+        time_box_options: Any of the other time_box keyword arguments (for
+            example, file or threshold), applied to every wrapped method.
+
+    Returns:
+        The class, with the wrapped methods and the registry set as its
+        time_box_stats attribute
+
+    Raises:
+        TypeError: An option is not a time_box keyword argument
+        ValueError: engine is not 'auto' or 'fast', or format is not one
+            of time_hdr.FORMATS
+
+    """
+    if cls is None:
+        return functools.partial(time_box_class, include=include,
+                                 exclude=exclude, stats=stats,
+                                 time_box_enabled=time_box_enabled,
+                                 **time_box_options)
+
+    options = _runner_options(time_box_options)
+    if stats is None:
+        stats = StatsRegistry()
+
+    for name, attr in list(vars(cls).items()):
+        if not _matches(name, include, exclude):
+            continue
+        new_attr = _instrument_attr(attr, stats, time_box_enabled,
+                                    options)
+        if new_attr is not None:
+            setattr(cls, name, new_attr)
+
+    setattr(cls, 'time_box_stats', stats)
+    return cls
+
+
+def instrument_module(module: types.ModuleType,
+                      pattern: Patterns = None, *,
+                      exclude: Patterns = None,
+                      stats: Optional[StatsRegistry] = None,
+                      time_box_enabled: Union[bool,
+                                              Callable[..., bool]] = True,
+                      **time_box_options: Any) -> StatsRegistry:
+    """Wrap the matching functions and classes of a module with time_box.
+
+    Only functions and classes defined in the module itself are wrapped;
+    names imported into it from other modules are left alone. The public
+    methods of matching classes are wrapped as by time_box_class.
+
+    Args:
+        module: The module whose functions are to be wrapped
+
+        pattern: Glob pattern or list of glob patterns selecting the names
+            to wrap. The default is None, which selects all names that do
+            not start with an underscore.
+
+        exclude: Glob pattern or list of glob patterns for names that are
+            not to be wrapped. The default is None.
+
+        stats: Specifies the StatsRegistry shared by everything wrapped in
+            the module. The default is None, which creates a new registry
+            for the module.
+
+        time_box_enabled: As described for time_box. The default is True.
+
+        time_box_options: Any of the other time_box keyword arguments (for
+            example, file or threshold), applied to every wrapped function.
+
+    Returns:
+        The registry, which is also set as the module's time_box_stats
+        attribute
+
+    Raises:
+        TypeError: An option is not a time_box keyword argument
+        ValueError: engine is not 'auto' or 'fast', or format is not one
+            of time_hdr.FORMATS
+
+    """
+    options = _runner_options(time_box_options)
+    if stats is None:
+        stats = StatsRegistry()
+
+    for name, obj in list(vars(module).items()):
+        if not _matches(name, pattern, exclude):
+            continue
+        if getattr(obj, '__module__', None) != module.__name__:
+            continue
+        if _is_plain_function(obj):
+            setattr(module, name, _wrap(obj, stats, time_box_enabled,
+                                        options))
+        elif isinstance(obj, type):
+            time_box_class(obj, stats=stats,
+                           time_box_enabled=time_box_enabled, **options)
+
+    setattr(module, 'time_box_stats', stats)
+    return stats
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 09:40:03 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=========
+mem_track
+=========
+
+With a **MemoryTracker**, you can measure how much memory is allocated
+between a start and a stop point:
+
+:Example: measure the memory allocated by building a list
+
+>>> from sbt_utils.mem_track import MemoryTracker
+
+>>> tracker = MemoryTracker()
+>>> tracker.start()
+>>> a_list = [str(i) for i in range(1000)]
+>>> usage = tracker.stop()
+>>> usage.net_bytes > 0 and usage.net_blocks >= 1000
+True
+
+
+The mem_track module contains:
+
+    1) MemoryUsage named tuple with the net bytes, peak bytes, and net blocks
+       (the change in the number of surviving blocks, not an allocation
+       count) for one measurement.
+    2) MemoryTracker class that uses tracemalloc to take the measurement.
+       This is what time_box uses when track_memory=True is specified.
+
+Note that tracemalloc is process wide, so allocations made by other threads
+during the measurement are included. Tracking is not free: while tracemalloc
+is tracing, every allocation is slowed down (typically by a factor of 2 to
+4), and each start and stop takes a snapshot whose cost grows with the number
+of traced blocks. MemoryTracker starts tracemalloc when needed and stops it
+again when the last active tracker stops, so the cost is only paid while a
+tracked call is running, but starting and stopping tracemalloc around each
+call adds on the order of 2 milliseconds to every tracked call of a small
+function. See benchmarks/bench_track_memory.py to measure this on your own
+machine.
+
+"""
+
+import threading
+import tracemalloc
+from typing import List, NamedTuple
+
+
+class MemoryUsage(NamedTuple):
+    """Memory allocated between MemoryTracker start and stop.
+
+    net_bytes and net_blocks are the differences in traced bytes and
+    traced blocks between the start and stop snapshots. Blocks allocated
+    and freed between the two cancel out, and blocks freed that were
+    allocated before start count as negative, so net_blocks is the net
+    change in surviving blocks rather than a count of allocations.
+    peak_bytes is the peak traced bytes above the starting amount.
+    """
+    net_bytes: int
+    peak_bytes: int
+    net_blocks: int
+
+
+_active_trackers: List['MemoryTracker'] = []
+_trackers_lock = threading.Lock()
+_started_tracing = False
+
+
+def _count_blocks() -> int:
+    """Return the number of memory blocks currently traced."""
+    return len(tracemalloc.take_snapshot().traces)
+
+
+def _reset_peak() -> None:
+    """Reset the tracemalloc peak where supported (python 3.9 and up)."""
+    reset_peak = getattr(tracemalloc, 'reset_peak', None)
+    if reset_peak is not None:
+        reset_peak()
+
+
+class MemoryTracker():
+    """Class MemoryTracker measures memory allocated between start and stop.
+
+    Trackers may be nested (for example, a time_box decorated function that
+    calls another one). Since resetting the tracemalloc peak is global, each
+    tracker passes the peak it has seen on to the trackers that are still
+    active so that the outer peaks remain correct.
+    """
+
+    def __init__(self) -> None:
+        """Sets the starting amounts to zero."""
+        self._start_bytes = 0
+        self._start_blocks = 0
+        self._peak = 0
+
+    def start(self) -> None:
+        """Start the measurement, starting tracemalloc if needed."""
+        global _started_tracing
+        with _trackers_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+            self._start_blocks = _count_blocks()
+            current, peak = tracemalloc.get_traced_memory()
+            for tracker in _active_trackers:
+                tracker._peak = max(tracker._peak, peak)
+            _reset_peak()
+            _active_trackers.append(self)
+            self._start_bytes = current
+            self._peak = current
+
+    def stop(self) -> MemoryUsage:
+        """Stop the measurement.
+
+        Returns:
+            The MemoryUsage since start was called
+
+        """
+        global _started_tracing
+        with _trackers_lock:
+            current, peak = tracemalloc.get_traced_memory()
+            blocks = _count_blocks()
+            peak = max(peak, self._peak)
+            _active_trackers.remove(self)
+            for tracker in _active_trackers:
+                tracker._peak = max(tracker._peak, peak)
+            if not _active_trackers and _started_tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+        return MemoryUsage(net_bytes=current - self._start_bytes,
+                           peak_bytes=peak - self._start_bytes,
+                           net_blocks=blocks - self._start_blocks)
+
+
+def format_memory_usage(usage: MemoryUsage) -> str:
+    """Return the memory usage as a line for the time_box end message.
+
+    Args:
+        usage: The memory usage to format
+
+    Returns:
+        The formatted line
+
+    """
+    return ('Memory: net ' + format(usage.net_bytes, '+,')
+            + ' bytes, peak ' + format(usage.peak_bytes, ',')
+            + ' bytes, net blocks ' + format(usage.net_blocks, '+,'))
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Tue Oct 20 08:47:31 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=========
+profilers
+=========
+
+With **time_box(profile=...)**, you can find out where a wrapped function
+spends its time, not only how long it takes:
+
+:Example: sample the stacks of a wrapped function
+
+>>> from sbt_utils.time_hdr import time_box
+>>> from sbt_utils.profilers import SampleProfiler
+>>> import io, tempfile, time
+
+>>> profiler = SampleProfiler(interval=0.001,
+...                           output_dir=tempfile.mkdtemp())
+>>> @time_box(profile=profiler, file=io.StringIO())
+... def aFunc8() -> None:
+...      time.sleep(0.05)
+
+>>> aFunc8()
+>>> sum(profiler.stacks['aFunc8'].values()) > 0
+True
+>>> profiler.save()  # writes aFunc8.collapsed to the output_dir
+
+
+The profilers module contains:
+
+    1) TimeBoxProfiler, the abstract base class of the profilers, whose
+       subclasses implement start, stop, and save. A profiler is
+       started by time_box before the wrapped function is called and stopped
+       after it returns, and returns the lines it wants added to the end
+       message.
+    2) SampleProfiler class, a sampling profiler. A sampler thread runs only
+       while profiled calls are active, and every interval it records the
+       stacks of the threads running them with sys._current_frames. The
+       stacks are kept in collapsed (folded) form, one line per distinct
+       stack with its sample count, which is the input format of flame graph
+       tools such as flamegraph.pl and speedscope. The sampler measures its
+       own cost and stretches the interval so that it uses no more than
+       max_overhead (2% by default) of the time. Note that the sampler needs
+       the GIL to take a sample, so while the profiled code is CPU bound the
+       effective interval can not be shorter than sys.getswitchinterval()
+       (5 ms by default).
+    3) CProfileProfiler class, a deterministic profiler. Each call is run
+       under cProfile, and the end message lists the top hotspots of the
+       call. The calls are merged in memory into one pstats.Stats object per
+       function and saved as .pstats files, which can be examined with the
+       pstats module or tools such as snakeviz. Deterministic profiling
+       slows down the profiled code considerably (often by 2 times or more),
+       so it is meant for offline investigation.
+
+Profile data is merged in memory per function (keyed by qualified name) and
+written by *save*, which is also called at interpreter exit when an
+output_dir is set. With per_call=True, a separate file is written at the end
+of each call instead.
+
+"""
+
+import abc
+import atexit
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional, Union
+
+DEFAULT_PROFILE_DIR = 'time_box_profiles'
+
+
+def _file_name(key: str) -> str:
+    """Return key with characters unsuitable for a file name replaced."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+
+
+class TimeBoxProfiler(abc.ABC):
+    """Class TimeBoxProfiler is the base class for the time_box profilers."""
+
+    def __init__(self, output_dir: Optional[str] = DEFAULT_PROFILE_DIR,
+                 per_call: bool = False) -> None:
+        """Stores the output options.
+
+        Args:
+            output_dir: Specifies the directory for the profile files. The
+                default is DEFAULT_PROFILE_DIR in the current directory.
+                None keeps the profile data in memory only.
+
+            per_call: Specifies whether a file is written at the end of each
+                call (True) or the calls are merged in memory and written by
+                *save* (False). The default is False.
+
+        """
+        self.output_dir = output_dir
+        self.per_call = per_call
+        self._seq = 0
+        if output_dir is not None and not per_call:
+            atexit.register(self.save)
+
+    def _path(self, key: str, suffix: str, seq: Optional[int] = None) -> str:
+        """Return the path of a profile file, creating the directory.
+
+        Args:
+            key: The qualified name of the profiled function
+
+            suffix: The file name suffix
+
+            seq: The call sequence number for per call files
+
+        Returns:
+            The path
+
+        """
+        assert self.output_dir is not None
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = _file_name(key)
+        if seq is not None:
+            name += '.' + str(os.getpid()) + '.' + str(seq)
+        return os.path.join(self.output_dir, name + suffix)
+
+    def _next_seq(self) -> int:
+        """Return the next call sequence number for per call files."""
+        self._seq += 1
+        return self._seq
+
+    @abc.abstractmethod
+    def start(self, key: str, stop_frame: Optional[FrameType]) -> Any:
+        """Start profiling a call.
+
+        Args:
+            key: The qualified name of the wrapped function
+
+            stop_frame: The frame of the time_box code that calls the
+                wrapped function; frames from this one up are not part of
+                the profiled call
+
+        Returns:
+            A token to pass to *stop*
+
+        """
+
+    @abc.abstractmethod
+    def stop(self, token: Any) -> List[str]:
+        """Stop profiling a call.
+
+        Args:
+            token: The token returned by *start*
+
+        Returns:
+            The lines to add to the end message
+
+        """
+
+    @abc.abstractmethod
+    def save(self) -> None:
+        """Write the merged profile data to the output_dir."""
+
+
+class _SampledCall():
+    """The state of one call being sampled."""
+
+    def __init__(self, key: str, stop_frame: Optional[FrameType]) -> None:
+        self.key = key
+        self.stop_frame = stop_frame
+        self.thread_id = threading.get_ident()
+        self.counts: 'Counter[str]' = Counter()
+
+
+class SampleProfiler(TimeBoxProfiler):
+    """Class SampleProfiler samples the stacks of active time_box calls."""
+
+    def __init__(self, interval: float = 0.005,
+                 output_dir: Optional[str] = DEFAULT_PROFILE_DIR,
+                 per_call: bool = False,
+                 max_overhead: float = 0.02,
+                 top: int = 5) -> None:
+        """Stores the options.
+
+        Args:
+            interval: Specifies the number of seconds between samples. The
+                default is 0.005 (200 samples per second).
+
+            output_dir: As described for TimeBoxProfiler
+
+            per_call: As described for TimeBoxProfiler
+
+            max_overhead: Specifies the largest fraction of time the sampler
+                thread may use. When a sample takes longer than this
+                fraction of the interval, the interval is stretched. The
+                default is 0.02.
+
+            top: Specifies how many of the functions with the most samples
+                are shown in the end message. The default is 5.
+
+        """
+        super().__init__(output_dir=output_dir, per_call=per_call)
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.top = top
+        self.stacks: Dict[str, 'Counter[str]'] = {}
+        self._active: Dict[int, List[_SampledCall]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, key: str, stop_frame: Optional[FrameType]) -> Any:
+        """Register the call and start the sampler thread if needed."""
+        call = _SampledCall(key, stop_frame)
+        with self._lock:
+            self._active.setdefault(call.thread_id, []).append(call)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='time_box_sampler',
+                                                daemon=True)
+                self._thread.start()
+        return call
+
+    def stop(self, token: Any) -> List[str]:
+        """Unregister the call and merge its samples."""
+        call: _SampledCall = token
+        with self._lock:
+            calls = self._active[call.thread_id]
+            calls.remove(call)
+            if not calls:
+                del self._active[call.thread_id]
+            call.stop_frame = None
+            self.stacks.setdefault(call.key, Counter()).update(call.counts)
+
+        samples = sum(call.counts.values())
+        msgs = ['Profile: ' + str(samples) + ' samples at '
+                + '{:.1f}'.format(self.interval * 1000) + ' ms intervals']
+        leaves: 'Counter[str]' = Counter()
+        for stack, count in call.counts.items():
+            leaves[stack.rpartition(';')[2]] += count
+        for leaf, count in leaves.most_common(self.top):
+            msgs.append('  {:5.1f}%  {}'.format(count * 100 / samples, leaf))
+        if self.per_call and self.output_dir is not None:
+            path = self._path(call.key, '.collapsed', self._next_seq())
+            self._write(path, call.counts)
+            msgs.append('Profile written to ' + path)
+        return msgs
+
+    def save(self) -> None:
+        """Write one collapsed stack file per function to the output_dir."""
+        if self.output_dir is None:
+            return
+        with self._lock:
+            stacks = {key: Counter(counts)
+                      for key, counts in self.stacks.items()}
+        for key, counts in stacks.items():
+            self._write(self._path(key, '.collapsed'), counts)
+
+    @staticmethod
+    def _write(path: str, counts: 'Counter[str]') -> None:
+        """Write stacks in collapsed form: frames;joined;by;semicolons N."""
+        with open(path, 'w') as out:
+            for stack, count in sorted(counts.items()):
+                out.write(stack + ' ' + str(count) + '\n')
+
+    @staticmethod
+    def _frame_name(frame: FrameType) -> str:
+        """Return the name of a frame as it appears in a collapsed stack."""
+        code = frame.f_code
+        return (os.path.basename(code.co_filename) + ':' + code.co_name
+                + ':' + str(code.co_firstlineno))
+
+    def _run(self) -> None:
+        """Take samples until there are no active calls."""
+        delay = self.interval
+        while True:
+            time.sleep(delay)
+            start = time.perf_counter()
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                self._sample()
+            cost = time.perf_counter() - start
+            delay = max(self.interval, cost / self.max_overhead)
+
+    def _sample(self) -> None:
+        """Record the current stack of every active call (lock held)."""
+        frames = sys._current_frames()
+        for thread_id, calls in self._active.items():
+            frame: Optional[FrameType] = frames.get(thread_id)
+            stop_frames = {id(call.stop_frame): call for call in calls}
+            names: List[str] = []
+            while frame is not None and stop_frames:
+                call = stop_frames.pop(id(frame), None)
+                if call is not None:
+                    if names:
+                        call.counts[';'.join(reversed(names))] += 1
+                else:
+                    names.append(self._frame_name(frame))
+                frame = frame.f_back
+            # a call started without a stop frame gets the whole stack
+            call = stop_frames.get(id(None))
+            if call is not None and names:
+                call.counts[';'.join(reversed(names))] += 1
+
+
+# cProfile can only profile a thread with one profiler at a time, so this
+# records (for all CProfileProfiler instances) whether a thread has one
+_cprofile_local = threading.local()
+
+
+class CProfileProfiler(TimeBoxProfiler):
+    """Class CProfileProfiler runs each time_box call under cProfile."""
+
+    def __init__(self, output_dir: Optional[str] = DEFAULT_PROFILE_DIR,
+                 per_call: bool = False,
+                 top: int = 10) -> None:
+        """Stores the options.
+
+        Args:
+            output_dir: As described for TimeBoxProfiler
+
+            per_call: As described for TimeBoxProfiler. The per call files
+                are pstats files, as are the merged files.
+
+            top: Specifies how many hotspots (the functions with the most
+                time spent in the function itself) are shown in the end
+                message. The default is 10.
+
+        """
+        super().__init__(output_dir=output_dir, per_call=per_call)
+        self.top = top
+        self.stats: Dict[str, 'pstats.Stats'] = {}
+        self._lock = threading.Lock()
+
+    def start(self, key: str, stop_frame: Optional[FrameType]) -> Any:
+        """Enable a cProfile.Profile for the call.
+
+        When the thread is already being profiled (for example, by an
+        enclosing profiled call) no profile is taken, since the enclosing
+        profile includes this call.
+        """
+        if getattr(_cprofile_local, 'active', False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiling tool is active
+            return None
+        _cprofile_local.active = True
+        return key, profile
+
+    def stop(self, token: Any) -> List[str]:
+        """Disable the profile, merge it, and return the hotspots."""
+        if token is None:
+            return ['Profile: not taken, the thread was already profiled']
+        key: str = token[0]
+        profile: cProfile.Profile = token[1]
+        profile.disable()
+        _cprofile_local.active = False
+
+        call_stats = pstats.Stats(profile)
+        with self._lock:
+            merged = self.stats.get(key)
+            if merged is None:
+                self.stats[key] = pstats.Stats(profile)
+            else:
+                merged.add(profile)
+
+        msgs = ['Profile: ' + str(call_stats.total_calls)  # type: ignore
+                + ' function calls in '
+                + '{:.6f}'.format(call_stats.total_tt)  # type: ignore
+                + ' seconds']
+        msgs.extend(self.hotspots(call_stats))
+        if self.per_call and self.output_dir is not None:
+            path = self._path(key, '.pstats', self._next_seq())
+            call_stats.dump_stats(path)
+            msgs.append('Profile written to ' + path)
+        return msgs
+
+    def hotspots(self, stats: 'pstats.Stats') -> List[str]:
+        """Return the lines for the top functions by internal time.
+
+        Args:
+            stats: The profile statistics
+
+        Returns:
+            One line per function with its internal time, call count, and
+            location, for at most *top* functions
+
+        """
+        # the time_box code that enables and disables the profile is not
+        # of interest
+        import sbt_utils.time_hdr
+        internal = (__file__, sbt_utils.time_hdr.__file__)
+        entries = []
+        for func, (cc, nc, tt, ct, callers) in \
+                stats.stats.items():  # type: ignore
+            if (func[0] in internal or func[2]
+                    == "<method 'disable' of '_lsprof.Profiler' objects>"):
+                continue
+            entries.append((tt, nc, func))
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        msgs = []
+        for tt, nc, (file_name, line, name) in entries[:self.top]:
+            if line:
+                where = os.path.basename(file_name) + ':' + str(line) + '(' \
+                    + name + ')'
+            else:
+                where = name
+            msgs.append('  {:.6f}s {:>7} calls  {}'.format(tt, nc, where))
+        return msgs
+
+    def save(self) -> None:
+        """Write one merged pstats file per function to the output_dir."""
+        if self.output_dir is None:
+            return
+        with self._lock:
+            for key, stats in self.stats.items():
+                stats.dump_stats(self._path(key, '.pstats'))
+
+
+def make_profiler(profile: Union[str, TimeBoxProfiler]) -> TimeBoxProfiler:
+    """Return the profiler for the time_box profile argument.
+
+    Args:
+        profile: Either a profiler, 'sample' for a SampleProfiler with the
+            default options, or 'cprofile' for a CProfileProfiler with the
+            default options
+
+    Returns:
+        The profiler
+
+    Raises:
+        ValueError: profile is not a recognized name
+
+    """
+    if isinstance(profile, TimeBoxProfiler):
+        return profile
+    if profile == 'sample':
+        return SampleProfiler()
+    if profile == 'cprofile':
+        return CProfileProfiler()
+    raise ValueError('profile must be a TimeBoxProfiler, \'sample\', or '
+                     '\'cprofile\', not ' + repr(profile))
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Wed Oct 21 13:07:22 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+==========
+prometheus
+==========
+
+With **start_metrics_server**, you can have Prometheus scrape the statistics
+that time_box collects in a StatsRegistry (see the stats module):
+
+:Example: serve the statistics of a registry on /metrics
+
+>>> from sbt_utils.time_hdr import time_box
+>>> from sbt_utils.stats import StatsRegistry
+>>> from sbt_utils.prometheus import start_metrics_server
+>>> import io, urllib.request
+
+>>> registry = StatsRegistry()
+>>> @time_box(stats=registry, file=io.StringIO())
+... def aFunc10() -> None:
+...      pass
+
+>>> aFunc10()
+>>> server = start_metrics_server(registry, port=0)
+>>> with urllib.request.urlopen(server.url) as response:
+...     text = response.read().decode()
+>>> server.stop()
+>>> print(text.splitlines()[2])
+time_box_calls_total{function="aFunc10"} 1
+
+
+The metrics exposed for each function (the function label holds the
+qualified name) are:
+
+    1) time_box_calls_total, a counter of the calls (including those that
+       the overhead governor only counted).
+    2) time_box_errors_total, a counter of the calls that raised an
+       exception.
+    3) time_box_duration_seconds, a histogram of the elapsed times, with
+       the bucket bounds of the registry.
+
+The server is a http.server.ThreadingHTTPServer running on a daemon thread.
+A scrape renders the text format from the counters that FuncStats already
+maintains, reading them without its lock, so a scrape never blocks the
+instrumented calls. The price is that the values of a function may be read
+while calls are being recorded, so its counters can be slightly out of step
+within one scrape; the histogram buckets and count are always taken from
+the same copy of the buckets.
+
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional
+
+from sbt_utils.stats import StatsRegistry, default_registry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _label_value(value: str) -> str:
+    """Return value escaped for use in a label of the text format."""
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _format_bound(bound: float) -> str:
+    """Return a histogram bound as it appears in the le label."""
+    return repr(float(bound))
+
+
+def render_metrics(registry: StatsRegistry,
+                   prefix: str = 'time_box') -> str:
+    """Return the statistics of a registry in the Prometheus text format.
+
+    Args:
+        registry: The registry whose functions are exported
+
+        prefix: The prefix of the metric names. The default is 'time_box'.
+
+    Returns:
+        The text of a /metrics response
+
+    """
+    funcs = sorted(registry, key=lambda fs: fs.name)
+    calls: List[str] = []
+    errors: List[str] = []
+    durations: List[str] = []
+    for func_stats in funcs:
+        label = 'function="' + _label_value(func_stats.name) + '"'
+        calls.append(prefix + '_calls_total{' + label + '} '
+                     + str(func_stats.count + func_stats.untimed_count))
+        errors.append(prefix + '_errors_total{' + label + '} '
+                      + str(func_stats.error_count))
+        # copy the buckets first so the cumulative counts agree with each
+        # other even if calls are recorded meanwhile
+        histogram = list(func_stats.histogram)
+        total_ns = func_stats.total_ns
+        cumulative = 0
+        for bound, count in zip(func_stats.histogram_bounds, histogram):
+            cumulative += count
+            durations.append(prefix + '_duration_seconds_bucket{' + label
+                             + ',le="' + _format_bound(bound) + '"} '
+                             + str(cumulative))
+        cumulative += histogram[-1]
+        durations.append(prefix + '_duration_seconds_bucket{' + label
+                         + ',le="+Inf"} ' + str(cumulative))
+        durations.append(prefix + '_duration_seconds_sum{' + label + '} '
+                         + repr(total_ns / 1_000_000_000))
+        durations.append(prefix + '_duration_seconds_count{' + label + '} '
+                         + str(cumulative))
+
+    lines = ['# HELP ' + prefix + '_calls_total Calls of the functions '
+             'wrapped by time_box.',
+             '# TYPE ' + prefix + '_calls_total counter']
+    lines.extend(calls)
+    lines.append('# HELP ' + prefix + '_errors_total Calls that raised an '
+                 'exception.')
+    lines.append('# TYPE ' + prefix + '_errors_total counter')
+    lines.extend(errors)
+    lines.append('# HELP ' + prefix + '_duration_seconds Elapsed time of '
+                 'the calls.')
+    lines.append('# TYPE ' + prefix + '_duration_seconds histogram')
+    lines.extend(durations)
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics from the registry of the server."""
+
+    server: '_MetricsHTTPServer'
+
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics(self.server.registry,
+                              self.server.prefix).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Do not log each scrape to stderr."""
+
+
+class _MetricsHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    registry: StatsRegistry
+    prefix: str
+
+
+class MetricsServer():
+    """Class MetricsServer serves /metrics on a background thread."""
+
+    def __init__(self, registry: StatsRegistry, *,
+                 host: str = '127.0.0.1',
+                 port: int = 9464,
+                 prefix: str = 'time_box') -> None:
+        """Binds the server socket.
+
+        Args:
+            registry: The registry whose functions are exported
+
+            host: The address to listen on. The default is '127.0.0.1'; use
+                '' or '0.0.0.0' to accept scrapes from other hosts.
+
+            port: The port to listen on. The default is 9464. 0 picks a
+                free port, which is then available as the port attribute.
+
+            prefix: The prefix of the metric names. The default is
+                'time_box'.
+
+        """
+        self._httpd = _MetricsHTTPServer((host, port), _MetricsHandler)
+        self._httpd.registry = registry
+        self._httpd.prefix = prefix
+        self.host = host
+        self.port = self._httpd.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Return the URL of the metrics page."""
+        return ('http://' + (self.host or '127.0.0.1') + ':' + str(self.port)
+                + '/metrics')
+
+    def start(self) -> 'MetricsServer':
+        """Start serving on a daemon thread.
+
+        Returns:
+            The server, so that creation and start can be chained
+
+        """
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name='MetricsServer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+
+def start_metrics_server(registry: Optional[StatsRegistry] = None, *,
+                         host: str = '127.0.0.1',
+                         port: int = 9464,
+                         prefix: str = 'time_box') -> MetricsServer:
+    """Create a MetricsServer and start it.
+
+    Args:
+        registry: The registry whose functions are exported. The default is
+            None, which exports the default_registry of the stats module.
+
+        host: As described for MetricsServer. The default is '127.0.0.1'.
+
+        port: As described for MetricsServer. The default is 9464.
+
+        prefix: As described for MetricsServer. The default is 'time_box'.
+
+    Returns:
+        The running server
+
+    """
+    if registry is None:
+        registry = default_registry
+    return MetricsServer(registry, host=host, port=port,
+                         prefix=prefix).start()
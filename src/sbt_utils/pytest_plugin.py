@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 23:58:36 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=============
+pytest_plugin
+=============
+
+The pytest_plugin module is a pytest plugin, loaded automatically once
+sbt_utils is installed, that times the tests and fixtures of a test run and
+enforces time budgets:
+
+:Example: give a test a time budget of 50 milliseconds
+
+    import pytest
+
+    @pytest.mark.time_budget(50)
+    def test_lookup() -> None:
+        ...
+
+:Example: show the slowest tests and fixtures after the run
+
+    pytest --time-box --time-box-slowest=5
+
+
+The setup, call, and teardown of each test and the setup of each fixture
+are timed with time.perf_counter_ns:
+
+    1) With --time-box, a flower box at the end of the run shows the
+       slowest tests (by the total of their setup, call, and teardown
+       times) and the fixtures with the most setup time, as FuncStats
+       summary lines. --time-box-slowest sets how many of each are shown
+       (the default is 10).
+    2) A test marked with time_budget(ms) fails when its call takes longer
+       than ms milliseconds, even though it passed otherwise. The budget
+       only covers the call, not the fixtures.
+
+The times are attached to the test reports, so that with pytest-xdist the
+times measured on the workers reach the controller, which aggregates them
+and shows the summary. A fixture with a wider scope than function is
+counted in the setup of the test that first requested it. The plugin can be
+disabled with -p no:sbt_utils.pytest_plugin.
+
+"""
+
+import io
+import time
+from typing import Any, Dict, Generator, List, NamedTuple, Optional, Tuple
+
+import pytest
+
+from sbt_utils.flower_box import print_flower_box_msg
+from sbt_utils.stats import StatsRegistry, format_ns
+
+
+class ItemTimes(NamedTuple):
+    """The times of the phases of one test."""
+    nodeid: str
+    setup_ns: int
+    call_ns: int
+    teardown_ns: int
+
+    @property
+    def total_ns(self) -> int:
+        """Return the time of all three phases."""
+        return self.setup_ns + self.call_ns + self.teardown_ns
+
+    def msg(self) -> str:
+        """Return the line that describes this test in the summary box."""
+        return (format_ns(self.total_ns) + ' ' + self.nodeid + ' (setup '
+                + format_ns(self.setup_ns) + ', call '
+                + format_ns(self.call_ns) + ', teardown '
+                + format_ns(self.teardown_ns) + ')')
+
+
+def budget_ns(marker: Any) -> int:
+    """Return the budget of a time_budget marker in nanoseconds.
+
+    Args:
+        marker: The time_budget marker of a test
+
+    Returns:
+        The budget
+
+    Raises:
+        ValueError: The marker does not have a positive budget
+
+    """
+    budget = marker.args[0] if marker.args else marker.kwargs.get('ms')
+    if (not isinstance(budget, (int, float)) or isinstance(budget, bool)
+            or budget <= 0):
+        raise ValueError('time_budget needs a positive number of '
+                         'milliseconds, not ' + repr(budget))
+    return round(budget * 1_000_000)
+
+
+class TimeBoxPlugin():
+    """Class TimeBoxPlugin holds the times of a test run."""
+
+    def __init__(self, config: Any) -> None:
+        """Stores the options.
+
+        Args:
+            config: The pytest config
+
+        """
+        self.config = config
+        self.enabled: bool = config.getoption('time_box')
+        self.slowest: int = config.getoption('time_box_slowest')
+        self.phases: Dict[str, Dict[str, int]] = {}
+        self.fixtures = StatsRegistry(interval=None)
+        self.over_budget: List[str] = []
+        self._phase_ns = 0
+        self._fixture_ns: List[Tuple[str, int]] = []
+
+    def _time_phase(self) -> Generator[None, Any, None]:
+        """Time one phase of a test, for the runtest hook wrappers."""
+        start_ns = time.perf_counter_ns()
+        yield
+        self._phase_ns = time.perf_counter_ns() - start_ns
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item: Any) -> Generator[None, Any, None]:
+        yield from self._time_phase()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item: Any) -> Generator[None, Any, None]:
+        yield from self._time_phase()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item: Any,
+                                nextitem: Any) -> Generator[None, Any, None]:
+        yield from self._time_phase()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef: Any,
+                             request: Any) -> Generator[None, Any, None]:
+        # the fixtures that this one requests are set up before this hook,
+        # so the time is only that of this fixture
+        start_ns = time.perf_counter_ns()
+        yield
+        self._fixture_ns.append((fixturedef.argname,
+                                 time.perf_counter_ns() - start_ns))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item: Any,
+                                  call: Any) -> Generator[None, Any, None]:
+        outcome = yield
+        report = outcome.get_result()
+        # attributes of the report are sent from the xdist workers
+        report.time_box_ns = self._phase_ns
+        report.time_box_fixtures = self._fixture_ns
+        self._phase_ns = 0
+        self._fixture_ns = []
+        if report.when != 'call' or not report.passed:
+            return
+        marker = item.get_closest_marker('time_budget')
+        if marker is None:
+            return
+        try:
+            limit_ns = budget_ns(marker)
+        except ValueError as exc:
+            report.outcome = 'failed'
+            report.longrepr = str(exc)
+            return
+        if report.time_box_ns > limit_ns:
+            report.outcome = 'failed'
+            report.longrepr = ('time_budget of ' + format_ns(limit_ns)
+                               + ' exceeded: the call took '
+                               + format_ns(report.time_box_ns))
+            report.time_box_over_budget = True
+
+    def pytest_runtest_logreport(self, report: Any) -> None:
+        elapsed_ns = getattr(report, 'time_box_ns', None)
+        if elapsed_ns is None:
+            # a worker without the plugin only reports the pytest duration
+            elapsed_ns = round(report.duration * 1_000_000_000)
+        self.phases.setdefault(report.nodeid, {})[report.when] = elapsed_ns
+        for name, fixture_ns in getattr(report, 'time_box_fixtures', ()):
+            self.fixtures.get(name).record(fixture_ns)
+        if getattr(report, 'time_box_over_budget', False):
+            self.over_budget.append(report.nodeid)
+
+    def item_times(self) -> List[ItemTimes]:
+        """Return the times of the tests, slowest first."""
+        times = [ItemTimes(nodeid, phases.get('setup', 0),
+                           phases.get('call', 0), phases.get('teardown', 0))
+                 for nodeid, phases in self.phases.items()]
+        times.sort(key=lambda item_times: item_times.total_ns, reverse=True)
+        return times
+
+    def summary_msgs(self) -> List[str]:
+        """Return the lines of the summary box."""
+        times = self.item_times()
+        shown = times[:self.slowest]
+        msgs = ['Slowest ' + str(len(shown)) + ' of ' + str(len(times))
+                + ' tests (total '
+                + format_ns(sum(t.total_ns for t in times)) + ')']
+        msgs.extend(item_times.msg() for item_times in shown)
+        if len(self.fixtures):
+            fixtures = sorted(self.fixtures, key=lambda fs: fs.total_ns,
+                              reverse=True)[:self.slowest]
+            msgs.append('Slowest ' + str(len(fixtures)) + ' of '
+                        + str(len(self.fixtures)) + ' fixtures (setup)')
+            for func_stats in fixtures:
+                msgs.extend(func_stats.summary_msgs())
+        if self.over_budget:
+            msgs.append('Over time budget: ' + ', '.join(self.over_budget))
+        return msgs
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        # the xdist workers send their times to the controller instead
+        if not self.enabled or hasattr(self.config, 'workerinput'):
+            return
+        out = io.StringIO()
+        print_flower_box_msg(self.summary_msgs(), file=out)
+        terminalreporter.write(out.getvalue())
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup('time_box', 'timing of tests and fixtures')
+    group.addoption('--time-box', action='store_true', dest='time_box',
+                    help='show the slowest tests and fixtures in a flower '
+                    'box after the run')
+    group.addoption('--time-box-slowest', type=int, default=10,
+                    dest='time_box_slowest', metavar='N',
+                    help='the number of tests and fixtures shown with '
+                    '--time-box (default 10)')
+
+
+def pytest_configure(config: Any) -> None:
+    config.addinivalue_line(
+        'markers', 'time_budget(ms): fail the test when its call takes '
+        'longer than ms milliseconds')
+    config.pluginmanager.register(TimeBoxPlugin(config),
+                                  'sbt_utils.time_box_plugin')
+
+
+def get_plugin(config: Any) -> Optional[TimeBoxPlugin]:
+    """Return the TimeBoxPlugin of a test run.
+
+    Args:
+        config: The pytest config
+
+    Returns:
+        The plugin, or None when it is not registered
+
+    """
+    plugin: Optional[TimeBoxPlugin] = config.pluginmanager.get_plugin(
+        'sbt_utils.time_box_plugin')
+    return plugin
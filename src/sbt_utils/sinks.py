@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Wed Oct 21 09:14:36 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=====
+sinks
+=====
+
+With **time_box(sink=...)**, you can keep a record of every call of a wrapped
+function somewhere other than the console:
+
+:Example: write the calls of a function to a SQLite database
+
+>>> from sbt_utils.time_hdr import time_box
+>>> from sbt_utils.sinks import SQLiteSink
+>>> import io, os, sqlite3, tempfile
+
+>>> path = os.path.join(tempfile.mkdtemp(), 'spans.db')
+>>> sink = SQLiteSink(path)
+>>> @time_box(sink=sink, file=io.StringIO())
+... def aFunc9() -> None:
+...      pass
+
+>>> aFunc9()
+>>> aFunc9()
+>>> sink.close()
+>>> with sqlite3.connect(path) as db:
+...     db.execute('SELECT function, COUNT(*), MIN(status) FROM spans '
+...                'GROUP BY function').fetchall()
+[('aFunc9', 2, 'ok')]
+
+
+Each call is reported to the sink as a Span with the qualified name of the
+function, the start time (seconds since the epoch), the duration in
+nanoseconds, the name of the thread, the process id, and the status ('ok',
+or 'error' when the function raised an exception).
+
+The sinks module contains:
+
+    1) Span, the record of one call.
+    2) SpanSink, the abstract base class of the sinks, with the emit,
+       flush, and close methods called by time_box and by the owner of the
+       sink. Subclasses implement emit.
+    3) BatchingSink, a base class for sinks that write in batches. emit only
+       appends the span to a deque (which is thread safe without a lock),
+       and a writer thread writes the batch when batch_size spans are
+       waiting or flush_interval seconds have passed, so the cost on the
+       caller's thread stays small. The remaining spans are written when
+       the sink is closed, which also happens at exit. A batch that fails
+       to be written is reported with threading.excepthook and the writer
+       goes on; its spans, and those emitted after close, are counted in
+       the *dropped* attribute.
+    4) SQLiteSink class, a BatchingSink that inserts the spans into a table
+       of a SQLite database in write-ahead log (WAL) mode, one transaction
+       per batch with executemany on a single prepared (cached) statement.
+    5) StatsDSink class, a BatchingSink that sends a timing metric for each
+       span (and a counter for each error) to a StatsD agent over UDP,
+       packing as many metrics into each datagram as fit in the MTU.
+
+"""
+
+import abc
+import atexit
+import os
+import re
+import socket
+import sqlite3
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+
+
+class Span(NamedTuple):
+    """The record of one call of a function wrapped by time_box."""
+    function: str
+    start: float
+    duration_ns: int
+    thread: str
+    process: int
+    status: str
+
+
+class SpanSink(abc.ABC):
+    """Class SpanSink is the base class of the sinks used with time_box."""
+
+    @abc.abstractmethod
+    def emit(self, span: Span) -> None:
+        """Accept the span of one call.
+
+        This is called on the thread of the wrapped function after each
+        call, so it should be cheap.
+
+        Args:
+            span: The record of the call
+
+        """
+
+    def flush(self) -> None:
+        """Write any spans that are still buffered."""
+
+    def close(self) -> None:
+        """Flush the sink and release its resources."""
+        self.flush()
+
+
+class BatchingSink(SpanSink):
+    """Class BatchingSink buffers spans and writes them in batches.
+
+    Subclasses implement *open_batches*, *write_batch*, and *close_batches*,
+    which are only called with the write lock held.
+    """
+
+    def __init__(self, *,
+                 batch_size: int = 1000,
+                 flush_interval: float = 1.0) -> None:
+        """Stores the options and starts the writer thread.
+
+        Args:
+            batch_size: The number of waiting spans that wakes the writer
+                thread. The default is 1000.
+
+            flush_interval: The longest time in seconds that a span waits
+                to be written. The default is 1.0.
+
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._spans: Deque[Span] = deque()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        # the spans lost to write errors or emitted after close, counted
+        # with the write lock held
+        self.dropped = 0
+        with self._write_lock:
+            self.open_batches()
+        self._thread = threading.Thread(target=self._run,
+                                        name=type(self).__name__,
+                                        daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, span: Span) -> None:
+        """Append the span to the buffer, waking the writer when full.
+
+        A span emitted after the sink is closed is only counted in dropped.
+
+        Args:
+            span: The record of the call
+
+        """
+        if self._closed:
+            with self._write_lock:
+                self.dropped += 1
+            return
+        spans = self._spans
+        spans.append(span)
+        if len(spans) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write the buffered spans now, on the calling thread."""
+        with self._write_lock:
+            self._write_waiting()
+
+    def close(self) -> None:
+        """Stop the writer thread, write the remaining spans, and close.
+
+        Closing a sink more than once has no effect.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._wake.set()
+        self._thread.join()
+        with self._write_lock:
+            self._write_waiting()
+            self.close_batches()
+
+    def open_batches(self) -> None:
+        """Prepare to write batches (for example, open a connection)."""
+
+    @abc.abstractmethod
+    def write_batch(self, spans: List[Span]) -> None:
+        """Write one batch of spans.
+
+        Args:
+            spans: The spans, oldest first
+
+        """
+
+    def close_batches(self) -> None:
+        """Release what open_batches acquired."""
+
+    def _write_waiting(self) -> None:
+        """Write the spans waiting in the buffer (write lock held)."""
+        spans = self._spans
+        count = len(spans)
+        if count:
+            # popleft is atomic, so spans emitted meanwhile stay queued
+            try:
+                self.write_batch([spans.popleft() for _ in range(count)])
+            except BaseException:
+                self.dropped += count
+                raise
+
+    def _run(self) -> None:
+        """Write a batch whenever woken or every flush_interval seconds."""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                with self._write_lock:
+                    self._write_waiting()
+            except Exception as exc:
+                # the thread keeps writing the later batches
+                threading.excepthook(threading.ExceptHookArgs(
+                    (type(exc), exc, exc.__traceback__,
+                     threading.current_thread())))
+
+
+_TABLE_NAME_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+
+
+class SQLiteSink(BatchingSink):
+    """Class SQLiteSink writes spans to a table of a SQLite database."""
+
+    def __init__(self, path: str, *,
+                 table: str = 'spans',
+                 batch_size: int = 1000,
+                 flush_interval: float = 1.0) -> None:
+        """Opens the database and creates the table if needed.
+
+        Args:
+            path: The path of the database file
+
+            table: The name of the table. The default is 'spans'.
+
+            batch_size: As described for BatchingSink. The default is 1000.
+
+            flush_interval: As described for BatchingSink. The default is
+                1.0.
+
+        Raises:
+            ValueError: The table name is not a plain SQL identifier
+
+        """
+        if not _TABLE_NAME_RE.match(table):
+            raise ValueError('table must be a plain SQL identifier, not '
+                             + repr(table))
+        self.path = path
+        self.table = table
+        self._insert_sql = ('INSERT INTO ' + table + ' (function, start, '
+                            'duration_ns, thread, process, status) '
+                            'VALUES (?, ?, ?, ?, ?, ?)')
+        self._db: Any = None
+        super().__init__(batch_size=batch_size,
+                         flush_interval=flush_interval)
+
+    def open_batches(self) -> None:
+        """Connect in WAL mode and create the table and its index."""
+        # the connection is used by the writer thread and by flush and
+        # close on the caller's thread, always under the write lock
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS ' + self.table
+                             + ' (id INTEGER PRIMARY KEY, function TEXT, '
+                             'start REAL, duration_ns INTEGER, thread TEXT, '
+                             'process INTEGER, status TEXT)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS ' + self.table
+                             + '_function_start ON ' + self.table
+                             + ' (function, start)')
+
+    def write_batch(self, spans: List[Span]) -> None:
+        """Insert the spans in one transaction."""
+        with self._db:
+            self._db.executemany(self._insert_sql, spans)
+
+    def close_batches(self) -> None:
+        """Close the connection."""
+        self._db.close()
+
+
+_STATSD_NAME_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class StatsDSink(BatchingSink):
+    """Class StatsDSink sends spans as StatsD metrics over UDP.
+
+    Each span becomes a timer in milliseconds named prefix.function, and
+    each span with the error status also increments the counter
+    prefix.function.errors. Characters that StatsD does not allow in names
+    (such as the angle brackets of '<locals>') are replaced by underscores.
+    """
+
+    def __init__(self, host: str = '127.0.0.1',
+                 port: int = 8125, *,
+                 prefix: str = 'time_box',
+                 mtu: int = 1432,
+                 batch_size: int = 1000,
+                 flush_interval: float = 1.0) -> None:
+        """Stores the address and creates the UDP socket.
+
+        Args:
+            host: The host of the StatsD agent. The default is '127.0.0.1'.
+
+            port: The port of the StatsD agent. The default is 8125.
+
+            prefix: The prefix of the metric names. The default is
+                'time_box'.
+
+            mtu: The largest datagram payload in bytes. The default is
+                1432, which fits in an Ethernet frame; use 512 when the
+                metrics cross the internet.
+
+            batch_size: As described for BatchingSink. The default is 1000.
+
+            flush_interval: As described for BatchingSink. The default is
+                1.0.
+
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self.mtu = mtu
+        self._names: Dict[str, str] = {}
+        self._sock: Any = None
+        super().__init__(batch_size=batch_size,
+                         flush_interval=flush_interval)
+
+    def open_batches(self) -> None:
+        """Create the UDP socket."""
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _metric_name(self, function: str) -> str:
+        """Return the (cached) metric name for a function."""
+        try:
+            return self._names[function]
+        except KeyError:
+            name = (self.prefix + '.'
+                    + _STATSD_NAME_RE.sub('_', function).strip('_'))
+            self._names[function] = name
+            return name
+
+    def write_batch(self, spans: List[Span]) -> None:
+        """Send the metrics of the spans, packed into datagrams."""
+        packet: List[bytes] = []
+        size = 0
+        for span in spans:
+            name = self._metric_name(span.function)
+            lines = [(name + ':' + repr(span.duration_ns / 1_000_000)
+                      + '|ms').encode()]
+            if span.status == STATUS_ERROR:
+                lines.append((name + '.errors:1|c').encode())
+            for line in lines:
+                # each line after the first needs a newline separator
+                if packet and size + 1 + len(line) > self.mtu:
+                    self._send(packet)
+                    packet = []
+                    size = 0
+                size += len(line) + (1 if packet else 0)
+                packet.append(line)
+        if packet:
+            self._send(packet)
+
+    def _send(self, packet: List[bytes]) -> None:
+        """Send one datagram, ignoring errors as StatsD clients do."""
+        try:
+            self._sock.sendto(b'\n'.join(packet), self.address)
+        except OSError:
+            pass
+
+    def close_batches(self) -> None:
+        """Close the socket."""
+        self._sock.close()
+
+
+_pid = os.getpid()
+
+
+def current_pid() -> int:
+    """Return the process id without a system call per span."""
+    return _pid
+
+
+def _reset_pid() -> None:
+    global _pid
+    _pid = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pid)
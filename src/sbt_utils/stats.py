@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Mon Oct 19 09:12:27 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=====
+stats
+=====
+
+With a **StatsRegistry**, you can accumulate per function statistics for
+functions decorated with time_box:
+
+:Example: collect statistics for a function wrapped with time_box
+
+>>> from sbt_utils.time_hdr import time_box
+>>> from sbt_utils.stats import StatsRegistry
+>>> import io
+
+>>> registry = StatsRegistry()
+>>> @time_box(stats=registry, file=io.StringIO())
+... def aFunc7() -> None:
+...      pass
+
+>>> for _ in range(3):
+...     aFunc7()
+
+>>> registry['aFunc7'].count
+3
+
+
+The stats module contains:
+
+    1) FuncStats class that accumulates the call count, error count,
+       elapsed time, and a latency histogram (and optionally memory usage
+       and the time of each phase marked with time_hdr.lap) for one
+       function.
+    2) StatsRegistry class that holds the FuncStats for many functions and
+       can print a summary of them in a flower box (see flower_box module in
+       sbt_utils package).
+    3) TimeSeries class that keeps a fixed size ring of per interval
+       buckets (count, total, and max elapsed time) for one function, so
+       that recent windows can be queried and trends shown.
+    4) default_registry, a StatsRegistry that can be shared by any code that
+       does not need a registry of its own.
+
+:Example: query the recent history of a function
+
+>>> from sbt_utils.stats import TimeSeries
+>>> series = TimeSeries(interval=60, size=5)
+>>> minute = 60 * 1_000_000_000
+>>> series.record(2_000, now_ns=10 * minute)
+>>> series.record(4_000, now_ns=10 * minute + 1)
+>>> series.record(9_000, now_ns=11 * minute)
+>>> series.window(120, now_ns=11 * minute)
+Bucket(start=600.0, calls=3, total_ns=15000, max_ns=9000)
+>>> [b.calls for b in series.buckets(now_ns=12 * minute)]
+[0, 0, 2, 1, 0]
+
+By default, each FuncStats in a StatsRegistry keeps one hour of one minute
+buckets. The buckets are aligned to the wall clock (time.time_ns) so that
+they line up with the times of day shown in logs. There is no background
+thread: a bucket is reset when the first call of a new interval lands in
+its slot, and the queries skip slots that hold an older interval.
+
+"""
+
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, \
+    TextIO, Tuple, TYPE_CHECKING
+
+from sbt_utils.flower_box import print_flower_box_msg
+
+if TYPE_CHECKING:
+    from sbt_utils.mem_track import MemoryUsage
+
+
+class Bucket(NamedTuple):
+    """The calls recorded in one interval (or window) of a TimeSeries."""
+    start: float
+    calls: int
+    total_ns: int
+    max_ns: int
+
+    @property
+    def mean_ns(self) -> float:
+        """Return the mean elapsed time in nanoseconds (0.0 if no calls)."""
+        if self.calls == 0:
+            return 0.0
+        return self.total_ns / self.calls
+
+
+class TimeSeries():
+    """Class TimeSeries keeps a ring of per interval buckets for one function.
+
+    Each slot of the ring holds the count, total elapsed time, and maximum
+    elapsed time of the calls recorded in one interval, together with the
+    number of that interval (the time divided by the interval length). A
+    slot is reused when a call lands in it for a newer interval, so the
+    memory used is fixed and no thread is needed to rotate the buckets.
+    """
+
+    def __init__(self, interval: float = 60.0, size: int = 60) -> None:
+        """Stores the interval and size and creates the empty ring.
+
+        Args:
+            interval: The length of each bucket in seconds. The default is
+                60.
+
+            size: The number of buckets kept. The default is 60, which with
+                the default interval keeps one hour.
+
+        """
+        self.interval = interval
+        self.size = size
+        self.interval_ns = int(interval * 1_000_000_000)
+        self._numbers = [-1] * size
+        self._counts = [0] * size
+        self._totals = [0] * size
+        self._maxes = [0] * size
+
+    def record(self, elapsed_ns: int, now_ns: Optional[int] = None) -> None:
+        """Record one call in the bucket for the current interval.
+
+        Concurrent calls must be serialized by the caller, as FuncStats
+        does with its lock.
+
+        Args:
+            elapsed_ns: The elapsed time of the call in nanoseconds
+
+            now_ns: The time of the call in nanoseconds since the epoch.
+                The default is None, which uses time.time_ns().
+
+        """
+        if now_ns is None:
+            now_ns = time.time_ns()
+        number = now_ns // self.interval_ns
+        slot = number % self.size
+        if self._numbers[slot] != number:
+            self._numbers[slot] = number
+            self._counts[slot] = 1
+            self._totals[slot] = elapsed_ns
+            self._maxes[slot] = elapsed_ns
+            return
+        self._counts[slot] += 1
+        self._totals[slot] += elapsed_ns
+        if elapsed_ns > self._maxes[slot]:
+            self._maxes[slot] = elapsed_ns
+
+    def reset(self) -> None:
+        """Empty all the buckets."""
+        # a bucket is only read while its number matches the interval
+        self._numbers[:] = [-1] * self.size
+
+    def buckets(self, count: Optional[int] = None,
+                now_ns: Optional[int] = None) -> List[Bucket]:
+        """Return the most recent buckets, oldest first.
+
+        Intervals without calls are returned as empty buckets.
+
+        Args:
+            count: The number of buckets to return, ending with the current
+                interval. The default is None, which returns all size
+                buckets.
+
+            now_ns: The current time in nanoseconds since the epoch. The
+                default is None, which uses time.time_ns().
+
+        Returns:
+            The buckets, each with the start of its interval in seconds
+            since the epoch
+
+        """
+        if now_ns is None:
+            now_ns = time.time_ns()
+        if count is None or count > self.size:
+            count = self.size
+        current = now_ns // self.interval_ns
+        result = []
+        for number in range(current - count + 1, current + 1):
+            start = number * self.interval_ns / 1_000_000_000
+            slot = number % self.size
+            if self._numbers[slot] == number:
+                result.append(Bucket(start, self._counts[slot],
+                                     self._totals[slot], self._maxes[slot]))
+            else:
+                result.append(Bucket(start, 0, 0, 0))
+        return result
+
+    def window(self, seconds: float,
+               now_ns: Optional[int] = None) -> Bucket:
+        """Return the calls of the most recent seconds combined.
+
+        Args:
+            seconds: The length of the window, rounded up to whole buckets
+                and limited to the length of the ring
+
+            now_ns: The current time in nanoseconds since the epoch. The
+                default is None, which uses time.time_ns().
+
+        Returns:
+            One bucket with the combined calls, total, and max, and the
+            start of the oldest interval in the window
+
+        """
+        count = max(1, -(-int(seconds * 1_000_000_000) // self.interval_ns))
+        buckets = self.buckets(count, now_ns)
+        return Bucket(buckets[0].start,
+                      sum(b.calls for b in buckets),
+                      sum(b.total_ns for b in buckets),
+                      max(b.max_ns for b in buckets))
+
+    def trend_msg(self, count: int = 15,
+                  now_ns: Optional[int] = None) -> str:
+        """Return a one line sketch of the mean time per bucket.
+
+        Each bucket is shown as one character, from '.' for the lowest mean
+        to '#' for the highest, or a blank for a bucket without calls.
+
+        Args:
+            count: The number of recent buckets to show. The default is 15.
+
+            now_ns: The current time in nanoseconds since the epoch. The
+                default is None, which uses time.time_ns().
+
+        Returns:
+            The trend line, for example 'per 1m: [..:-=+*#] 1.0us .. 8.0us'
+
+        """
+        buckets = self.buckets(count, now_ns)
+        means = [b.mean_ns for b in buckets if b.calls]
+        low = min(means, default=0.0)
+        high = max(means, default=0.0)
+        chars = []
+        for bucket in buckets:
+            if bucket.calls == 0:
+                chars.append(' ')
+            elif high == low:
+                chars.append(_TREND_CHARS[0])
+            else:
+                level = int((bucket.mean_ns - low) / (high - low)
+                            * (len(_TREND_CHARS) - 1) + 0.5)
+                chars.append(_TREND_CHARS[level])
+        return ('per ' + _format_interval(self.interval) + ': ['
+                + ''.join(chars) + '] ' + format_ns(low) + ' .. '
+                + format_ns(high))
+
+
+_TREND_CHARS = '.:-=+*#'
+
+# the upper bounds in seconds of the latency histogram buckets, from 100us
+# to 10s (the Prometheus client defaults with finer buckets below 5ms)
+DEFAULT_HISTOGRAM_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                            0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                            10.0)
+
+
+def _format_interval(seconds: float) -> str:
+    """Return an interval as a short string, such as 30s, 1m, or 2h."""
+    if seconds % 3600 == 0:
+        return '{:g}h'.format(seconds / 3600)
+    if seconds % 60 == 0:
+        return '{:g}m'.format(seconds / 60)
+    return '{:g}s'.format(seconds)
+
+
+class FuncStats():
+    """Class FuncStats accumulates the statistics for one function.
+
+    Elapsed times are kept in nanoseconds as integers. The lock only
+    serializes concurrent updates; readers of the attributes do not need it.
+    """
+
+    def __init__(self, name: str,
+                 series: Optional[TimeSeries] = None,
+                 histogram_bounds: Sequence[float] = DEFAULT_HISTOGRAM_BOUNDS
+                 ) -> None:
+        """Stores the input name and sets the statistics to zero
+
+        Args:
+            name: The name of the function as it appears in the registry
+
+            series: The TimeSeries in which each call is also recorded. The
+                default is None, which keeps only the totals.
+
+            histogram_bounds: The upper bounds in seconds, in ascending
+                order, of the latency histogram buckets. The default is
+                DEFAULT_HISTOGRAM_BOUNDS.
+
+        """
+        self.name = name
+        self.series = series
+        self.histogram_bounds = tuple(histogram_bounds)
+        self._bounds_ns = [int(bound * 1_000_000_000)
+                           for bound in self.histogram_bounds]
+        # calls per bucket (not cumulative), the last one for calls above
+        # the highest bound
+        self.histogram = [0] * (len(self._bounds_ns) + 1)
+        self.count = 0
+        self.error_count = 0
+        self.untimed_count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self.mem_count = 0
+        self.mem_net_bytes = 0
+        self.mem_peak_bytes = 0
+        self.mem_net_blocks = 0
+        # the total time and the number of calls of each phase
+        self.phase_ns: Dict[str, int] = {}
+        self.phase_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def mean_ns(self) -> float:
+        """Return the mean elapsed time in nanoseconds (0.0 if no calls)."""
+        if self.count == 0:
+            return 0.0
+        return self.total_ns / self.count
+
+    def record(self, elapsed_ns: int, *,
+               error: bool = False,
+               memory: Optional['MemoryUsage'] = None,
+               phases: Optional[Sequence[Tuple[str, int]]] = None
+               ) -> None:
+        """Record one call.
+
+        Args:
+            elapsed_ns: The elapsed time of the call in nanoseconds
+
+            error: Specifies whether the call ended with an exception
+
+            memory: The memory usage of the call when it was tracked
+
+            phases: The name and nanoseconds of each phase of the call (see
+                StartStopHeader.phase_times)
+
+        """
+        with self._lock:
+            if self.count == 0 or elapsed_ns < self.min_ns:
+                self.min_ns = elapsed_ns
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+            self.count += 1
+            self.total_ns += elapsed_ns
+            self.histogram[bisect_left(self._bounds_ns, elapsed_ns)] += 1
+            if self.series is not None:
+                self.series.record(elapsed_ns)
+            if error:
+                self.error_count += 1
+            if memory is not None:
+                self.mem_count += 1
+                self.mem_net_bytes += memory.net_bytes
+                self.mem_net_blocks += memory.net_blocks
+                if memory.peak_bytes > self.mem_peak_bytes:
+                    self.mem_peak_bytes = memory.peak_bytes
+            if phases:
+                phase_ns = self.phase_ns
+                phase_counts = self.phase_counts
+                for name, ns in phases:
+                    phase_ns[name] = phase_ns.get(name, 0) + ns
+                    phase_counts[name] = phase_counts.get(name, 0) + 1
+
+    def reset(self) -> None:
+        """Zero the counts, the histogram and the TimeSeries in place.
+
+        The FuncStats keeps its identity, so the time_box runners holding
+        it go on recording into it.
+        """
+        with self._lock:
+            self.histogram[:] = [0] * len(self.histogram)
+            self.count = 0
+            self.error_count = 0
+            self.untimed_count = 0
+            self.total_ns = 0
+            self.min_ns = 0
+            self.max_ns = 0
+            self.mem_count = 0
+            self.mem_net_bytes = 0
+            self.mem_peak_bytes = 0
+            self.mem_net_blocks = 0
+            self.phase_ns.clear()
+            self.phase_counts.clear()
+            if self.series is not None:
+                self.series.reset()
+
+    def record_untimed(self) -> None:
+        """Record a call that was counted but not timed.
+
+        These are the calls skipped by the overhead governor of time_box
+        (see the governor module). They are not part of count, so that the
+        mean and the histogram only describe the timed calls.
+        """
+        with self._lock:
+            self.untimed_count += 1
+
+    def summary_msgs(self, trend: bool = False) -> List[str]:
+        """Return the lines that describe this function in a summary box.
+
+        Args:
+            trend: Specifies whether a trend line of the recent buckets is
+                added when the function has a TimeSeries
+
+        Returns:
+            The lines
+
+        """
+        msgs = [self.name + ': calls ' + str(self.count)
+                + ', errors ' + str(self.error_count)
+                + ', mean ' + format_ns(self.mean_ns)
+                + ', min ' + format_ns(self.min_ns)
+                + ', max ' + format_ns(self.max_ns)]
+        if self.untimed_count:
+            msgs[0] += ', untimed calls ' + str(self.untimed_count)
+        if self.mem_count:
+            msgs.append('    memory: net ' + format(self.mem_net_bytes, ',')
+                        + ' bytes, max peak '
+                        + format(self.mem_peak_bytes, ',')
+                        + ' bytes, net blocks '
+                        + format(self.mem_net_blocks, ','))
+        if self.phase_ns:
+            # each phase is shown with its mean time and its share of the
+            # time of all phases
+            total_ns = max(1, sum(self.phase_ns.values()))
+            msgs.append('    phases: ' + ', '.join(
+                name + ' ' + format_ns(ns / self.phase_counts[name]) + ' ('
+                + '{:.1f}%'.format(ns * 100 / total_ns) + ')'
+                for name, ns in self.phase_ns.items()))
+        if trend and self.series is not None:
+            msgs.append('    trend ' + self.series.trend_msg())
+        return msgs
+
+
+class StatsRegistry():
+    """Class StatsRegistry holds the FuncStats for a set of functions.
+
+    The registry is keyed by function name. Entries are created on first
+    use by the *get* method, and can then be looked up with the subscript
+    operator.
+    """
+
+    def __init__(self, *,
+                 interval: Optional[float] = 60.0,
+                 buckets: int = 60,
+                 histogram_bounds: Sequence[float] = DEFAULT_HISTOGRAM_BOUNDS
+                 ) -> None:
+        """Creates an empty registry.
+
+        Args:
+            interval: The length in seconds of the TimeSeries buckets kept
+                for each function. The default is 60. None keeps no
+                TimeSeries, only the totals.
+
+            buckets: The number of TimeSeries buckets kept for each
+                function. The default is 60.
+
+            histogram_bounds: The upper bounds in seconds of the latency
+                histogram buckets kept for each function. The default is
+                DEFAULT_HISTOGRAM_BOUNDS.
+
+        """
+        self.interval = interval
+        self.buckets = buckets
+        self.histogram_bounds = tuple(histogram_bounds)
+        self._funcs: Dict[str, FuncStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> FuncStats:
+        """Return the FuncStats for name, creating it if needed.
+
+        Args:
+            name: The name of the function
+
+        Returns:
+            The FuncStats for name
+
+        """
+        try:
+            return self._funcs[name]
+        except KeyError:
+            series = None
+            if self.interval is not None:
+                series = TimeSeries(self.interval, self.buckets)
+            with self._lock:
+                return self._funcs.setdefault(
+                    name, FuncStats(name, series, self.histogram_bounds))
+
+    def __getitem__(self, name: str) -> FuncStats:
+        return self._funcs[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._funcs
+
+    def __iter__(self) -> Iterator[FuncStats]:
+        return iter(list(self._funcs.values()))
+
+    def __len__(self) -> int:
+        return len(self._funcs)
+
+    def reset(self) -> None:
+        """Zero the statistics of all entries.
+
+        The entries are reset in place rather than removed, since the
+        time_box calls that created them keep recording into them.
+        """
+        for func_stats in self:
+            func_stats.reset()
+
+    def print_summary(self, *,
+                      end: str = '\n',
+                      file: Optional[TextIO] = None,
+                      flush: bool = False,
+                      trend: bool = False) -> None:
+        """Print the statistics for all functions in a flower box.
+
+        Args:
+            end: Specifies the argument to use on the print statement *end*
+                parameter. The default is \'\\\\n'.
+
+            file: Specifies the argument to use on the print statement
+                *file* parameter. The default is sys.stdout (via None).
+
+            flush: Specifies the argument to use on the print statement
+                *flush* parameter. The default is False.
+
+            trend: Specifies whether a line showing the mean time of the
+                recent TimeSeries buckets is added for each function. The
+                default is False.
+
+        """
+        if file is None:
+            file = sys.stdout
+
+        msgs = ['Function statistics']
+        for func_stats in sorted(self, key=lambda fs: fs.name):
+            msgs.extend(func_stats.summary_msgs(trend))
+        print_flower_box_msg(msgs, end=end, file=file, flush=flush)
+
+
+def format_ns(ns: float) -> str:
+    """Return a nanosecond duration in the most readable unit.
+
+    Args:
+        ns: The duration in nanoseconds
+
+    Returns:
+        The duration formatted with a unit of ns, us, ms, or s
+
+    :Example: format a few durations
+
+    >>> from sbt_utils.stats import format_ns
+    >>> format_ns(950)
+    '950ns'
+    >>> format_ns(1_234_567)
+    '1.235ms'
+
+    """
+    if ns < 1_000:
+        return '{:.0f}ns'.format(ns)
+    if ns < 1_000_000:
+        return '{:.3f}us'.format(ns / 1_000)
+    if ns < 1_000_000_000:
+        return '{:.3f}ms'.format(ns / 1_000_000)
+    return '{:.3f}s'.format(ns / 1_000_000_000)
+
+
+default_registry = StatsRegistry()
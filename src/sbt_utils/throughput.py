@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Tue Oct 20 02:31:08 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+==========
+throughput
+==========
+
+With **time_iter**, you can wrap an iterable so that iterating over it is
+sandwiched between start time and end time messages that report the number
+of items, their total size, the throughput, and the latency between items:
+
+:Example: report the throughput of a stream of records
+
+>>> from sbt_utils.throughput import time_iter
+>>> from sbt_utils.clock import SimulatedClock
+>>> from datetime import datetime
+
+>>> clock = SimulatedClock(datetime(2026, 10, 20, 2, 30))
+>>> def records():
+...     for i in range(1000):
+...         clock.advance(0.001)
+...         yield b'x' * (i % 10)
+
+>>> total = 0
+>>> for record in time_iter(records(), label='records', clock=clock):
+...     total += len(record)
+<BLANKLINE>
+************************************************
+* Starting records on Tue Oct 20 2026 02:30:00 *
+************************************************
+<BLANKLINE>
+************************************************************************
+* Ending records on Tue Oct 20 2026 02:30:01                           *
+* Elapsed time: 0:00:01                                                *
+* Items: 1,000 (1,000.0 per second)                                    *
+* Bytes: 4,500 (4,500.0 per second)                                    *
+* Latency per item: p50 1.000ms, p90 1.000ms, p99 1.000ms, max 1.000ms *
+************************************************************************
+
+
+The throughput module contains:
+
+    1) TimeIter class, an iterable that wraps another one, passes its items
+       through unchanged, and keeps the item count, the total size, and
+       the sampled times, which are available as its attributes once the
+       iteration ends. Iterating over it again starts the counts afresh.
+    2) time_iter function that creates a TimeIter.
+
+The cost per item is kept to a counter increment and a comparison (plus a
+call of len when the sizes are counted), so that streams of millions of
+items are not slowed down. The clock is only read for every *every* items.
+The sampling starts with every item and, each time *max_samples* times have
+been taken, every other time is dropped and the sampling interval doubles.
+The latencies are the mean times between the items of each sampled
+interval, so they are per item for short streams and smooth over the
+intervals of long ones. They include the time the consumer spends on each
+item as well as the time taken to produce it.
+
+The size of an item is its len (the bytes of a bytes object, the characters
+of a str), and is only counted while all the items have one.
+
+"""
+
+import sys
+from typing import Any, Generic, Iterable, Iterator, List, Optional, \
+    TextIO, TypeVar
+
+from sbt_utils.bench import percentile
+from sbt_utils.clock import Clock
+from sbt_utils.flower_box import print_flower_box_msg
+from sbt_utils.stats import format_ns
+from sbt_utils.time_hdr import DT_Format, StartStopHeader
+
+T = TypeVar('T')
+
+
+class TimeIter(Generic[T]):
+    """Class TimeIter times the iteration of an iterable.
+
+    The start message is issued when the iteration starts, and the end
+    message when the iterable is exhausted or the iteration is stopped
+    early (when the loop is left and the iterator is closed). As with
+    time_box, no end message is issued when the iterable raises an
+    exception.
+    """
+
+    def __init__(self, iterable: Iterable[T], *,
+                 label: Optional[str] = None,
+                 dt_format: DT_Format = StartStopHeader.default_dt_format,
+                 end: str = '\n',
+                 file: Optional[TextIO] = None,
+                 flush: bool = False,
+                 count_bytes: bool = True,
+                 every: int = 1,
+                 max_samples: int = 1024,
+                 clock: Optional[Clock] = None) -> None:
+        """Stores the iterable and the options.
+
+        Args:
+            iterable: The iterable or iterator whose items are counted
+
+            label: The name that appears in the messages. The default is
+                None, which uses the __name__ of the iterable (such as the
+                name of a generator function) or the name of its type.
+
+            dt_format: Specifies the datetime format to use in the start
+                and end time messages. The default is
+                StartStopHeader.default_dt_format.
+
+            end: Specifies the argument to use on the print statement *end*
+                parameter. The default is \'\\\\n'.
+
+            file: Specifies the argument to use on the print statement
+                *file* parameter. The default is sys.stdout (via None).
+
+            flush: Specifies the argument to use on the print statement
+                *flush* parameter. The default is False.
+
+            count_bytes: Specifies whether the size of each item is added
+                up. The default is True.
+
+            every: The number of items between the first times taken. The
+                default is 1.
+
+            max_samples: The number of times kept before the sampling
+                interval doubles. The default is 1024.
+
+            clock: The clock to read the times from. The default is None,
+                which uses the clock set by clock.set_clock (the
+                SystemClock unless changed).
+
+        Raises:
+            ValueError: every or max_samples is less than 1 or 2
+
+        """
+        if every < 1:
+            raise ValueError('every must be at least 1, not ' + repr(every))
+        if max_samples < 2:
+            raise ValueError('max_samples must be at least 2, not '
+                             + repr(max_samples))
+        if label is None:
+            label = getattr(iterable, '__name__', type(iterable).__name__)
+        self.iterable = iterable
+        self.label = label
+        self.dt_format = dt_format
+        self.end = end
+        self.file = file
+        self.flush = flush
+        self.count_bytes = count_bytes
+        self.every = every
+        self.max_samples = max_samples
+        self.header = StartStopHeader(label, clock)
+        self.count = 0
+        # None when the items are not sized (or not counted)
+        self.nbytes: Optional[int] = None
+        # the items between the sampled times, which starts as every and
+        # doubles as the samples are thinned
+        self.sample_every = every
+        # the monotonic times of items 0, sample_every, 2 * sample_every, ...
+        self.sample_ns: List[int] = []
+
+    def __iter__(self) -> Iterator[T]:
+        """Iterate over the items between the start and end messages."""
+        header = self.header
+        monotonic_ns = header.clock.monotonic_ns
+        header.print_start_msg(dt_format=self.dt_format, end=self.end,
+                               file=self.file, flush=self.flush)
+        samples = self.sample_ns = [header.start_ns]
+        max_samples = self.max_samples
+        every = self.every
+        next_sample = every
+        count = 0
+        sized = self.count_bytes
+        nbytes = 0
+        self._set_results(count, nbytes if sized else None, every)
+        try:
+            for item in self.iterable:
+                count += 1
+                if count == next_sample:
+                    samples.append(monotonic_ns())
+                    if len(samples) > max_samples:
+                        # keep the times of items 0, 2 * every, ...
+                        del samples[1::2]
+                        every *= 2
+                        next_sample = len(samples) * every
+                    else:
+                        next_sample += every
+                if sized:
+                    try:
+                        nbytes += len(item)  # type: ignore[arg-type]
+                    except TypeError:
+                        sized = False
+                yield item
+        except GeneratorExit:
+            # the iteration was stopped early, which is reported as an end
+            pass
+        except BaseException:
+            self._set_results(count, nbytes if sized else None, every)
+            raise
+        self._set_results(count, nbytes if sized else None, every)
+        header.set_end_time()
+        file = sys.stdout if self.file is None else self.file
+        print_flower_box_msg(header.build_end_msgs(self.dt_format)
+                             + self.build_msgs(),
+                             end=self.end, file=file, flush=self.flush)
+
+    def _set_results(self, count: int, nbytes: Optional[int],
+                     every: int) -> None:
+        """Save the counts kept in local variables by __iter__."""
+        self.count = count
+        self.nbytes = nbytes
+        self.sample_every = every
+
+    def latencies_ns(self) -> List[float]:
+        """Return the mean time per item of each sampled interval, sorted.
+
+        Returns:
+            The latencies in nanoseconds
+
+        """
+        samples = self.sample_ns
+        every = self.sample_every
+        return sorted((samples[i] - samples[i - 1]) / every
+                      for i in range(1, len(samples)))
+
+    def build_msgs(self) -> List[str]:
+        """Return the lines that describe the iteration in the end message.
+
+        Returns:
+            The item line, the bytes line when the items were sized, and
+            the latency line when at least one interval was sampled
+
+        """
+        seconds = max(1, self.header.elapsed_ns) / 1_000_000_000
+        msgs = ['Items: ' + format(self.count, ',') + ' ('
+                + format(self.count / seconds, ',.1f') + ' per second)']
+        if self.nbytes is not None:
+            msgs.append('Bytes: ' + format(self.nbytes, ',') + ' ('
+                        + format(self.nbytes / seconds, ',.1f')
+                        + ' per second)')
+        latencies = self.latencies_ns()
+        if latencies:
+            msg = ('Latency per item: p50 '
+                   + format_ns(percentile(latencies, 0.5)) + ', p90 '
+                   + format_ns(percentile(latencies, 0.9)) + ', p99 '
+                   + format_ns(percentile(latencies, 0.99)) + ', max '
+                   + format_ns(latencies[-1]))
+            if self.sample_every > 1:
+                msg += (' (means of ' + format(self.sample_every, ',')
+                        + ' items)')
+            msgs.append(msg)
+        return msgs
+
+
+def time_iter(iterable: Iterable[T], label: Optional[str] = None,
+              **kwargs: Any) -> TimeIter[T]:
+    """Wrap an iterable in start time and end time messages.
+
+    Args:
+        iterable: The iterable or iterator whose items are counted
+
+        label: The name that appears in the messages. The default is None,
+            which uses the __name__ of the iterable or the name of its type.
+
+        kwargs: The other arguments of TimeIter
+
+    Returns:
+        The TimeIter, to iterate over instead of the iterable
+
+    """
+    return TimeIter(iterable, label=label, **kwargs)
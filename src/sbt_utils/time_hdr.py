@@ -36,35 +36,148 @@ time and end time messages like this:
 <BLANKLINE>
 *********************************************
 * Ending aFunc2 on Mon Jun 29 2020 18:22:51 *
-* Elapsed time: 0:00:01.001204              *
+* Elapsed time: 0:00:01.000120              *
 *********************************************
 
 
-The time_hdr module contains two items:
+The time_hdr module contains three items:
 
     1) StartStopHeader class with two functions that will repectively print
        a starting time and ending time messages in a flower box (see
        flower_box module in sbt_utils package).
     2) a time_box decorator that wraps a function and uses the StartStopHeader
        to print the starting and ending time messages.
-
-time_box imports functools, sys, datetime, and wrapt
+    3) a lap function that marks the end of a phase of the function being
+       timed, so that the end message breaks the elapsed time down by
+       phase (see StartStopHeader.lap), and current_header to get the
+       StartStopHeader of the call being timed.
+
+With time_box(format='jsonl'), each call writes one compact JSON object
+per line for its start and end instead of the flower boxes, for log
+pipelines that parse the output.
+
+Importing time_hdr only imports _thread and sys, which the interpreter has
+already loaded, so that short-lived programs only pay for loading the code
+of time_hdr itself (about half a millisecond). The annotations are quoted
+rather than postponed with the __future__ import, which would cost about
+as much again. datetime and the flower_box and clock modules
+are imported when the first StartStopHeader is created, functools when the
+first function is decorated, and wrapt only when a function is wrapped with
+engine='wrapt' (see time_box). The typing names are only imported for type
+checkers, and DT_Format is created on first access. See
+benchmarks/bench_import_time.py for the measured import times.
 
 """
 
-import functools
+import _thread
 import sys
-from datetime import datetime
-from typing import Any, Callable, cast, Dict, NewType, Optional, \
-                   TextIO, Tuple, TypeVar, Union
 
-from typing import overload
+TYPE_CHECKING = False
+
+if not TYPE_CHECKING:
+    # typing is only needed by the type checkers, so these stand-ins keep
+    # it from being imported at run time
+    def _cast(typ, val):
+        return val
+
+    def _overload(func):
+        return func
+
+    cast, overload = _cast, _overload
+
+    # imported by _load_deferred when the first StartStopHeader is created
+    datetime = timedelta = print_flower_box_msg = _current_header = None
+
+# set by _load_deferred after all of the names above, so that a thread that
+# sees it set also sees them (the lock keeps the first calls of several
+# threads from loading them at the same time)
+_loaded = False
+_load_lock = _thread.allocate_lock()
+
+if TYPE_CHECKING:
+    from contextvars import ContextVar
+    from datetime import datetime, timedelta
+    from typing import Any, Callable, cast, Dict, List, NewType, Optional, \
+        TextIO, Tuple, TypeVar, Union, overload
+
+    from sbt_utils.calibration import Calibration
+    from sbt_utils.clock import Clock
+    from sbt_utils.flower_box import print_flower_box_msg
+    from sbt_utils.governor import OverheadGovernor
+    from sbt_utils.heartbeat import Heartbeat, HeartbeatScheduler
+    from sbt_utils.mem_track import MemoryTracker
+    from sbt_utils.profilers import TimeBoxProfiler
+    from sbt_utils.sinks import SpanSink
+    from sbt_utils.stats import FuncStats, StatsRegistry
+
+    DT_Format = NewType('DT_Format', str)
+    F = TypeVar('F', bound=Callable[..., Any])
 
-from sbt_utils.flower_box import print_flower_box_msg
+    _current_header: 'ContextVar[Optional[StartStopHeader]]'
 
-from wrapt.decorators import decorator
 
-DT_Format = NewType('DT_Format', str)
+def __getattr__(name: str) -> 'Any':
+    """Create DT_Format on first access (PEP 562) to avoid importing typing.
+
+    Args:
+        name: The name of the module attribute being looked up
+
+    Returns:
+        The attribute value
+
+    Raises:
+        AttributeError: The module has no attribute with that name
+
+    """
+    if name == 'DT_Format':
+        from typing import NewType
+        globals()['DT_Format'] = NewType('DT_Format', str)
+        return globals()['DT_Format']
+    raise AttributeError('module ' + repr(__name__) + ' has no attribute '
+                         + repr(name))
+
+
+def _load_deferred() -> None:
+    """Import the modules that are only needed once messages are issued."""
+    global datetime, timedelta, print_flower_box_msg, _current_header, \
+        _loaded
+    with _load_lock:
+        if _loaded:
+            return
+        from contextvars import ContextVar
+        from datetime import datetime, timedelta
+        from sbt_utils.flower_box import print_flower_box_msg
+        # the header of the innermost time_box call running in each thread
+        # or task, for current_header and lap
+        _current_header = ContextVar('time_box_header', default=None)
+        if StartStopHeader.clock is None:
+            from sbt_utils.clock import SYSTEM_CLOCK
+            StartStopHeader.clock = SYSTEM_CLOCK
+        _loaded = True
+
+
+# types.FunctionType and inspect.CO_COROUTINE, without importing the modules
+_FunctionType = type(_load_deferred)
+_CO_COROUTINE = 0x80
+
+
+def _is_coroutine_function(func: 'Any') -> bool:
+    """Return whether func is an async function.
+
+    Plain functions are checked directly, and inspect is only imported for
+    other objects.
+
+    Args:
+        func: The function or other callable to check
+
+    Returns:
+        True if calling func returns a coroutine, False if not
+
+    """
+    if type(func) is _FunctionType:
+        return bool(func.__code__.co_flags & _CO_COROUTINE)
+    import inspect
+    return inspect.iscoroutinefunction(func)
 
 
 class StartStopHeader():
@@ -80,26 +193,216 @@ class StartStopHeader():
     module.
     """
 
-    default_dt_format: DT_Format = DT_Format('%a %b %d %Y %H:%M:%S')
+    default_dt_format: 'DT_Format' = cast('DT_Format', '%a %b %d %Y %H:%M:%S')
+
+    # when set, the elapsed time line shows the monotonic elapsed time less
+    # start_cost_ns and the fixed cost of time_box (see the calibration
+    # module)
+    calibration: 'Optional[Calibration]' = None
+    start_cost_ns: int = 0
 
-    def __init__(self, func_name: str) -> None:
+    # the clock of the headers not given one, the SystemClock unless
+    # changed by clock.set_clock (set when the first header is created)
+    clock: 'Clock' = cast('Clock', None)
+
+    def __init__(self, func_name: str,
+                 clock: 'Optional[Clock]' = None) -> None:
         """Stores the input func_name and sets the start and end times to None
 
         :param func_name: The name of the function to appear in the start and
             stop messages
 
+        :param clock: The clock to read the times from. The default is None,
+            which uses the clock set by clock.set_clock (the SystemClock
+            unless changed).
+
         :returns: None
 
         """
 
+        if not _loaded:
+            _load_deferred()
+        if clock is not None:
+            self.clock = clock
         self.func_name = func_name
         self.start_DT: datetime = datetime.max
         self.end_DT: datetime = datetime.min
+        self.start_ns: int = 0
+        self.end_ns: int = 0
+        self.laps: List[Tuple[str, int]] = []
+
+    @property
+    def elapsed_ns(self) -> int:
+        """Return the monotonic elapsed time in nanoseconds.
+
+        The elapsed time shown in the end message is based on the datetime
+        values, which can jump when the system clock is adjusted. This value
+        is taken from the monotonic_ns reading of the clock
+        (time.perf_counter_ns for the SystemClock) and is what the stats
+        registry records.
+        """
+        return self.end_ns - self.start_ns
+
+    def set_start_time(self) -> None:
+        """Save the start time without printing the start message."""
+        clock = self.clock
+        self.start_DT = clock.now()
+        self.start_ns = clock.monotonic_ns()
+
+    def set_end_time(self) -> None:
+        """Save the end time without printing the end message."""
+        clock = self.clock
+        self.end_ns = clock.monotonic_ns()
+        self.end_DT = clock.now()
+
+    def lap(self, name: str) -> None:
+        """Record the end of the phase called name.
+
+        The first phase runs from the start time to the first lap, and each
+        further phase from the previous lap. The time after the last lap is
+        shown as the phase '(rest)'. Laps with the same name are added
+        together, so that a lap in a loop gives the total of its phase.
+
+        Args:
+            name: The name of the phase that ends now
+
+        """
+        self.laps.append((name, self.clock.monotonic_ns()))
+
+    def phase_times(self) -> 'List[Tuple[str, int]]':
+        """Return the monotonic time of each phase marked by lap.
+
+        Returns:
+            The name and the nanoseconds of each phase, in the order of
+            their first laps, followed by '(rest)' for the time between the
+            last lap and the end time, or an empty list when lap was not
+            called
+
+        """
+        if not self.laps:
+            return []
+        phases: Dict[str, int] = {}
+        previous_ns = self.start_ns
+        for name, lap_ns in self.laps:
+            phases[name] = phases.get(name, 0) + lap_ns - previous_ns
+            previous_ns = lap_ns
+        phases['(rest)'] = (phases.get('(rest)', 0)
+                            + max(0, self.end_ns - previous_ns))
+        return list(phases.items())
+
+    def build_phase_msgs(self) -> 'List[str]':
+        """Return the lines of the phase table for the saved laps.
+
+        Returns:
+            A heading line and a line with the elapsed time and percentage
+            of the elapsed time for each phase, or an empty list when lap
+            was not called
+
+        """
+        phases = self.phase_times()
+        if not phases:
+            return []
+        total_ns = max(1, self.elapsed_ns)
+        times = [str(timedelta(microseconds=phase_ns // 1000))
+                 for _, phase_ns in phases]
+        name_width = max(len('Phase'), *(len(name) for name, _ in phases))
+        time_width = max(len('Elapsed time'), *(len(time) for time in times))
+        msgs = ['Phase'.ljust(name_width) + '  '
+                + 'Elapsed time'.ljust(time_width) + '  Percent']
+        for (name, phase_ns), time in zip(phases, times):
+            msgs.append(name.ljust(name_width) + '  ' + time.ljust(time_width)
+                        + '  ' + '{:6.1f}%'.format(phase_ns * 100 / total_ns))
+        return msgs
+
+    def build_start_msg(self,
+                        dt_format: 'DT_Format' = default_dt_format) -> str:
+        """Return the start message line for the saved start time.
+
+        Args:
+            dt_format: Specifies the datetime format to use in the start
+                time message. The default is StartStopHeader.default_dt_format.
+
+        Returns:
+            The start message line
+
+        """
+        return 'Starting ' + self.func_name + ' on '\
+            + self.start_DT.strftime(dt_format)
+
+    def build_end_msgs(self,
+                       dt_format: 'DT_Format' = default_dt_format
+                       ) -> 'List[str]':
+        """Return the end message lines for the saved start and end times.
+
+        Args:
+            dt_format: Specifies the datetime format to use in the end
+                time message. The default is StartStopHeader.default_dt_format.
 
-    def print_end_msg(self, dt_format: DT_Format = default_dt_format,
+        Returns:
+            The end time line and the elapsed time line, followed by the
+            phase table when lap was called (see *build_phase_msgs*)
+
+        """
+        msg1 = 'Ending ' + self.func_name + ' on '\
+            + self.end_DT.strftime(dt_format)
+        if self.calibration is None:
+            msg2 = 'Elapsed time: ' + str(self.end_DT - self.start_DT)
+        else:
+            msg2 = ('Elapsed time: '
+                    + self.calibration.format_elapsed(self.elapsed_ns
+                                                      - self.start_cost_ns)
+                    + ' (compensated)')
+        if self.laps:
+            return [msg1, msg2, *self.build_phase_msgs()]
+        return [msg1, msg2]
+
+    def print_start_end_msg(self, dt_format: 'DT_Format' = default_dt_format,
+                            end: str = '\n',
+                            file: 'Optional[TextIO]' = None,
+                            flush: bool = False,
+                            extra_msgs: 'Optional[List[str]]' = None) -> None:
+        """The start and end messages are issued together in one flower box.
+
+        This is used when the start message was deferred (see the
+        *threshold* parameter of time_box). The saved start time and end
+        time are used, so *set_start_time* and *set_end_time* (or the print
+        methods) must have been called first.
+
+        Args:
+            dt_format: Specifies the datetime format to use in the start
+                and end time messages. The default is
+                StartStopHeader.default_dt_format.
+
+            end: Specifies the argument to use on the print statement *end*
+                parameter. The default is \'\\\\n'.
+
+            file: Specifies the argument to use on the print statement
+                *file* parameter. The default is sys.stdout (via None).
+
+            flush: Specifies the argument to use on the print statement
+                *flush* parameter. The default is False.
+
+            extra_msgs: Additional lines to print in the flower box after
+                the elapsed time. The default is None.
+
+        Returns:
+            None
+
+        """
+        if file is None:
+            file = sys.stdout
+
+        msgs = [self.build_start_msg(dt_format)]
+        msgs.extend(self.build_end_msgs(dt_format))
+        if extra_msgs:
+            msgs.extend(extra_msgs)
+        print_flower_box_msg(msgs, end=end, file=file, flush=flush)
+
+    def print_end_msg(self, dt_format: 'DT_Format' = default_dt_format,
                       end: str = '\n',
-                      file: Optional[TextIO] = None,
-                      flush: bool = False) -> None:
+                      file: 'Optional[TextIO]' = None,
+                      flush: bool = False,
+                      extra_msgs: 'Optional[List[str]]' = None) -> None:
         """The end time message is issued in a flower box
 
         The end message includes the current datetime and elapsed time
@@ -121,6 +424,10 @@ class StartStopHeader():
                 *flush* parameterfor the end time messsage. The default is
                 False.
 
+            extra_msgs: Additional lines to print in the flower box after
+                the elapsed time (for example, the memory usage line issued
+                by time_box with track_memory=True). The default is None.
+
         Returns:
             None
 
@@ -138,16 +445,15 @@ class StartStopHeader():
         if file is None:
             file = sys.stdout
 
-        self.end_DT = datetime.now()
-        msg1 = 'Ending ' + self.func_name + ' on '\
-            + self.end_DT.strftime(dt_format)
-        msg2 = 'Elapsed time: ' + str(self.end_DT - self.start_DT)
-        print_flower_box_msg([msg1, msg2], end=end, file=file,
-                             flush=flush)
+        self.set_end_time()
+        msgs = self.build_end_msgs(dt_format)
+        if extra_msgs:
+            msgs.extend(extra_msgs)
+        print_flower_box_msg(msgs, end=end, file=file, flush=flush)
 
-    def print_start_msg(self, dt_format: DT_Format = default_dt_format,
+    def print_start_msg(self, dt_format: 'DT_Format' = default_dt_format,
                         end: str = '\n',
-                        file: Optional[TextIO] = None,
+                        file: 'Optional[TextIO]' = None,
                         flush: bool = False) -> None:
         """The start time message is issued in a flower box.
 
@@ -187,15 +493,15 @@ class StartStopHeader():
         >>> hdr.print_start_msg()
         <BLANKLINE>
         ***********************************************
-        * Starting aFunc1 on Mon Jun 29 2020 18:22:48 *
+        * Starting aFunc1 on Mon Jun 29 2020 18:22:50 *
         ***********************************************
         >>> aFunc1()
         2 + 2 = 4
         >>> hdr.print_end_msg()
         <BLANKLINE>
         *********************************************
-        * Ending aFunc1 on Mon Jun 29 2020 18:22:50 *
-        * Elapsed time: 0:00:02.001842              *
+        * Ending aFunc1 on Mon Jun 29 2020 18:22:52 *
+        * Elapsed time: 0:00:02.000120              *
         *********************************************
 
         """
@@ -212,51 +518,571 @@ class StartStopHeader():
         if file is None:
             file = sys.stdout
 
-        self.start_DT = datetime.now()
-        msg = 'Starting ' + self.func_name + ' on '\
-            + self.start_DT.strftime(dt_format)
-        print_flower_box_msg([msg], end=end, file=file, flush=flush)
+        self.set_start_time()
+        print_flower_box_msg([self.build_start_msg(dt_format)], end=end,
+                             file=file, flush=flush)
+
+
+def current_header() -> 'Optional[StartStopHeader]':
+    """Return the StartStopHeader of the innermost running time_box call.
+
+    Each thread and asyncio task has its own innermost call. A call that is
+    not being timed (see the *overhead_budget* parameter of time_box) has
+    no header of its own.
+
+    Returns:
+        The header, or None outside of any call wrapped by time_box
+
+    """
+    if _current_header is None:
+        return None
+    return _current_header.get()
+
+
+def lap(name: str) -> None:
+    """Record the end of a phase of the innermost running time_box call.
+
+    This is StartStopHeader.lap for the header of current_header, so that
+    a function wrapped by time_box can mark its phases without being
+    passed its header. Outside of any call wrapped by time_box it does
+    nothing.
+
+    Args:
+        name: The name of the phase that ends now
+
+    :Example: show the time taken by each phase of a function
+
+    >>> from sbt_utils.time_hdr import lap, time_box
+    >>> import time
+
+    >>> @time_box
+    ... def aFunc15() -> None:
+    ...      time.sleep(1)
+    ...      lap('load')
+    ...      time.sleep(3)
+    ...      lap('transform')
+    ...      time.sleep(0.5)
+
+    >>> aFunc15()
+    <BLANKLINE>
+    ************************************************
+    * Starting aFunc15 on Mon Jun 29 2020 18:22:50 *
+    ************************************************
+    <BLANKLINE>
+    **********************************************
+    * Ending aFunc15 on Mon Jun 29 2020 18:22:54 *
+    * Elapsed time: 0:00:04.500200               *
+    * Phase      Elapsed time    Percent         *
+    * load       0:00:01.000040    22.2%         *
+    * transform  0:00:03.000040    66.7%         *
+    * (rest)     0:00:00.500040    11.1%         *
+    **********************************************
 
+    """
+    header = current_header()
+    if header is not None:
+        header.laps.append((name, header.clock.monotonic_ns()))
+
+
+class _BoxCall():
+    """The state of one call of a function wrapped by time_box."""
+
+    __slots__ = ('header', 'tracker', 'profile_token', 'start_ts_ns',
+                 'heartbeat', 'context_token', 'trace_fields')
+
+    def __init__(self, header: 'StartStopHeader') -> None:
+        self.header = header
+        self.tracker: Optional['MemoryTracker'] = None
+        self.profile_token: Any = None
+        self.start_ts_ns = 0
+        self.heartbeat: Optional['Heartbeat'] = None
+        self.context_token: Any = None
+        self.trace_fields = ''
+
+
+class _BoxRunner():
+    """Issues the time_box messages around each call of a wrapped function.
+
+    One _BoxRunner is created per wrapped function when it is decorated so
+    that the time_box arguments are processed once instead of on every call.
+    It is used by time_box and by the bulk helpers in the instrument module.
+    """
 
-F = TypeVar('F', bound=Callable[..., Any])
+    def __init__(self, func_name: str, *,
+                 qualname: 'Optional[str]' = None,
+                 dt_format: 'DT_Format' = StartStopHeader.default_dt_format,
+                 end: str = '\n',
+                 file: 'Optional[TextIO]' = None,
+                 flush: bool = False,
+                 track_memory: bool = False,
+                 func_stats: 'Optional[FuncStats]' = None,
+                 threshold: 'Optional[float]' = None,
+                 profile: 'Union[None, str, TimeBoxProfiler]' = None,
+                 sink: 'Optional[SpanSink]' = None,
+                 format: str = 'box',
+                 overhead_budget: 'Optional[float]' = None,
+                 compensate: bool = False,
+                 clock: 'Optional[Clock]' = None,
+                 heartbeat: 'Optional[float]' = None
+                 ) -> None:
+        """Stores the time_box arguments for the wrapped function.
+
+        Args:
+            func_name: The name of the function to appear in the messages
+
+            qualname: The qualified name of the function, used to key the
+                profile data. The default is None, which uses func_name.
+
+            func_stats: The FuncStats in which each call is recorded, or None
+
+        The remaining arguments are as described for time_box.
+        """
+        self.func_name = func_name
+        self.qualname = func_name if qualname is None else qualname
+        self.dt_format = dt_format
+        self.end = end
+        self.file = sys.stdout if file is None else file
+        self.flush = flush
+        self.func_stats = func_stats
+        self.clock = clock
+        self.threshold_ns: Optional[int] = None
+        if threshold is not None:
+            self.threshold_ns = int(threshold * 1_000_000_000)
+
+        # the optional features are imported only when requested so that
+        # plain time_box usage does not pay for them
+        self.track_memory = track_memory
+        if track_memory:
+            from sbt_utils import mem_track
+            self._mem_track = mem_track
+        self.profiler: Optional['TimeBoxProfiler'] = None
+        if profile is not None:
+            from sbt_utils.profilers import make_profiler
+            self.profiler = make_profiler(profile)
+        self.sink = sink
+        if sink is not None:
+            import threading
+            from sbt_utils import sinks
+            self._current_thread = threading.current_thread
+            self._sinks = sinks
+            self._sink_emit = sink.emit
+        self.jsonl = format == 'jsonl'
+        if self.jsonl:
+            # the function name is escaped once here, so that each event
+            # only needs its numbers converted
+            import json
+            name = json.dumps(self.qualname)
+            self._jsonl_start = ('{"event":"start","function":' + name
+                                 + ',"ts_ns":')
+            self._jsonl_end = ('{"event":"end","function":' + name
+                               + ',"ts_ns":')
+            self._json_dumps = json.dumps
+            from sbt_utils.trace import trace_fields
+            self._trace_fields = trace_fields
+        self.governor: Optional['OverheadGovernor'] = None
+        if overhead_budget is not None:
+            from sbt_utils import governor
+            self.governor = governor.OverheadGovernor(self, overhead_budget)
+        self.heartbeat = heartbeat
+        self._scheduler: Optional['HeartbeatScheduler'] = None
+        if heartbeat is not None:
+            from sbt_utils.heartbeat import get_scheduler
+            self._scheduler = get_scheduler()
+        self.calibration: Optional['Calibration'] = None
+        if compensate:
+            from sbt_utils.calibration import get_calibration
+            self.calibration = get_calibration()
+
+    def start(self) -> '_BoxCall':
+        """Issue (or defer) the start message and start the measurements.
+
+        Returns:
+            The state of the call to pass to *fail* or *finish*
+
+        """
+        header = StartStopHeader(self.func_name, self.clock)
+        call = _BoxCall(header)
+        call.context_token = _current_header.set(header)
+        if self.jsonl:
+            header.set_start_time()
+            call.start_ts_ns = header.clock.time_ns()
+            call.trace_fields = self._trace_fields()
+            if self.threshold_ns is None:
+                self._write(self._jsonl_start + str(call.start_ts_ns)
+                            + self._trace_text(call, header.start_ns)
+                            + '}\n')
+        elif self.threshold_ns is None:
+            header.print_start_msg(dt_format=self.dt_format, end=self.end,
+                                   file=self.file, flush=self.flush)
+        else:
+            header.set_start_time()
+        if self.profiler is not None:
+            # the caller's frame is where the profiled call stack begins
+            call.profile_token = self.profiler.start(self.qualname,
+                                                     sys._getframe(1))
+        if self.track_memory:
+            call.tracker = self._mem_track.MemoryTracker()
+            call.tracker.start()
+        if self._scheduler is not None:
+            call.heartbeat = self._scheduler.schedule(
+                self, call, cast(float, self.heartbeat))
+        if self.calibration is not None:
+            # the start message costs whatever the file costs, so it is
+            # measured on each call rather than calibrated
+            header.start_cost_ns = (header.clock.monotonic_ns()
+                                    - header.start_ns)
+        return call
+
+    def fail(self, call: '_BoxCall') -> None:
+        """Stop the measurements for a call that raised an exception.
+
+        As for a plain call, no end message is issued for the failed call,
+        except with format='jsonl', which writes an end event with the
+        error status, and with *threshold*, where a call over the threshold
+        issues its flower box with the exception named, since no start
+        message was issued for it.
+        """
+        header = call.header
+        _current_header.reset(call.context_token)
+        if call.heartbeat is not None:
+            call.heartbeat.cancel()
+        if call.tracker is not None:
+            call.tracker.stop()
+        if self.profiler is not None:
+            self.profiler.stop(call.profile_token)
+        if self.jsonl:
+            header.end_ns = header.clock.monotonic_ns()
+            self._write_jsonl_end(call, header.elapsed_ns, 'error', [])
+        elif self.threshold_ns is None:
+            header.end_ns = header.clock.monotonic_ns()
+        else:
+            header.calibration = self.calibration
+            header.set_end_time()
+            exc_type = sys.exc_info()[0]
+            self._print_over_threshold(
+                header, [] if exc_type is None
+                else ['Raised ' + exc_type.__name__])
+        elapsed_ns = header.elapsed_ns
+        if self.func_stats is not None:
+            self.func_stats.record(elapsed_ns, error=True,
+                                   phases=header.phase_times())
+        if self.sink is not None:
+            self._emit_span(header, elapsed_ns, self._sinks.STATUS_ERROR)
+
+    def finish(self, call: '_BoxCall') -> None:
+        """Stop the measurements and issue the end message."""
+        header = call.header
+        header.calibration = self.calibration
+        _current_header.reset(call.context_token)
+        if call.heartbeat is not None:
+            call.heartbeat.cancel()
+        memory = None
+        extra_msgs: List[str] = []
+        if call.tracker is not None:
+            memory = call.tracker.stop()
+            extra_msgs.append(self._mem_track.format_memory_usage(memory))
+        if self.profiler is not None:
+            extra_msgs.extend(self.profiler.stop(call.profile_token))
+
+        if self.jsonl:
+            header.set_end_time()
+            self._write_jsonl_end(call, header.elapsed_ns, 'ok', extra_msgs)
+        elif self.threshold_ns is None:
+            header.print_end_msg(dt_format=self.dt_format, end=self.end,
+                                 file=self.file, flush=self.flush,
+                                 extra_msgs=extra_msgs)
+        else:
+            header.set_end_time()
+            self._print_over_threshold(header, extra_msgs)
+        if self.func_stats is not None:
+            self.func_stats.record(header.elapsed_ns, memory=memory,
+                                   phases=header.phase_times())
+        if self.sink is not None:
+            self._emit_span(header, header.elapsed_ns, self._sinks.STATUS_OK)
+
+    def _print_over_threshold(self, header: 'StartStopHeader',
+                              extra_msgs: 'List[str]') -> None:
+        """Issue the start and end box of a call over the threshold."""
+        assert self.threshold_ns is not None
+        over_ns = header.elapsed_ns - self.threshold_ns
+        if over_ns > 0:
+            header.print_start_end_msg(
+                dt_format=self.dt_format, end=self.end, file=self.file,
+                flush=self.flush,
+                extra_msgs=['Threshold of '
+                            + str(timedelta(seconds=self.threshold_ns
+                                            / 1_000_000_000))
+                            + ' exceeded by '
+                            + str(timedelta(microseconds=over_ns // 1000))]
+                + extra_msgs)
+
+    def write_heartbeat(self, call: '_BoxCall') -> None:
+        """Write that the call is still running, on the heartbeat thread."""
+        header = call.header
+        elapsed_ns = header.clock.monotonic_ns() - header.start_ns
+        if self.jsonl:
+            self._write('{"event":"heartbeat","function":'
+                        + self._json_dumps(self.qualname) + ',"ts_ns":'
+                        + str(header.clock.time_ns()) + ',"elapsed_ns":'
+                        + str(elapsed_ns)
+                        + self._trace_text(call, header.start_ns + elapsed_ns)
+                        + '}\n')
+            return
+        # the box is written at once so that it is not split by the output
+        # of the running call
+        import io
+        out = io.StringIO()
+        print_flower_box_msg(['Still running ' + self.func_name
+                              + ' (started on '
+                              + header.start_DT.strftime(self.dt_format)
+                              + ')',
+                              'Elapsed time: '
+                              + str(timedelta(microseconds=elapsed_ns
+                                              // 1000))],
+                             end=self.end, file=out)
+        self._write(out.getvalue())
+
+    def _write(self, text: str) -> None:
+        """Write text to the file with one call."""
+        self.file.write(text)
+        if self.flush:
+            self.file.flush()
+
+    def _write_jsonl_end(self, call: '_BoxCall', elapsed_ns: int,
+                         status: str, extra_msgs: 'List[str]') -> None:
+        """Write the end event (and the deferred start event) as JSON."""
+        threshold_ns = self.threshold_ns
+        if threshold_ns is None:
+            text = ''
+        elif elapsed_ns > threshold_ns:
+            text = (self._jsonl_start + str(call.start_ts_ns)
+                    + self._trace_text(call, call.header.start_ns) + '}\n')
+        else:
+            return
+        text += (self._jsonl_end + str(call.header.clock.time_ns())
+                 + ',"elapsed_ns":'
+                 + str(elapsed_ns) + ',"status":"' + status + '"'
+                 + self._trace_text(call, call.header.end_ns))
+        if threshold_ns is not None:
+            text += ',"threshold_ns":' + str(threshold_ns)
+        calibration = self.calibration
+        if calibration is not None:
+            text += (',"compensated_ns":'
+                     + str(calibration.compensate(
+                         elapsed_ns - call.header.start_cost_ns))
+                     + ',"uncertainty_ns":'
+                     + str(round(calibration.uncertainty_ns
+                                 + calibration.resolution_ns)))
+        if call.header.laps:
+            text += (',"phases":'
+                     + self._json_dumps(dict(call.header.phase_times()),
+                                        separators=(',', ':')))
+        if extra_msgs:
+            text += ',"extra":' + self._json_dumps(extra_msgs)
+        self._write(text + '}\n')
+
+    @staticmethod
+    def _trace_text(call: '_BoxCall', mono_ns: int) -> str:
+        """Return the trace fields of a jsonl event (see the trace module).
+
+        Args:
+            call: The state of the call
+
+            mono_ns: The monotonic time of the event
+
+        Returns:
+            The fields, each preceded by a comma, or '' without a trace id
+
+        """
+        if not call.trace_fields:
+            return ''
+        return call.trace_fields + ',"mono_ns":' + str(mono_ns)
+
+    def _emit_span(self, header: 'StartStopHeader', elapsed_ns: int,
+                   status: str) -> None:
+        """Report one call to the sink."""
+        sinks = self._sinks
+        self._sink_emit(sinks.Span(
+            self.qualname, header.start_DT.timestamp(), elapsed_ns,
+            self._current_thread().name, sinks.current_pid(), status))
+
+    def __call__(self, wrapped: 'Callable[..., Any]',
+                 args: 'Tuple[Any, ...]',
+                 kwargs: 'Dict[str, Any]') -> 'Any':
+        """Call wrapped between the start and end messages."""
+        if self.governor is not None:
+            return self.governor.call(wrapped, args, kwargs)
+        call = self.start()
+        try:
+            ret_value = wrapped(*args, **kwargs)
+        except BaseException:
+            self.fail(call)
+            raise
+        self.finish(call)
+        return ret_value
+
+    async def call_async(self, wrapped: 'Callable[..., Any]',
+                         args: 'Tuple[Any, ...]',
+                         kwargs: 'Dict[str, Any]') -> 'Any':
+        """Await wrapped between the start and end messages."""
+        if self.governor is not None:
+            return await self.governor.call_async(wrapped, args, kwargs)
+        call = self.start()
+        try:
+            ret_value = await wrapped(*args, **kwargs)
+        except BaseException:
+            self.fail(call)
+            raise
+        self.finish(call)
+        return ret_value
+
+
+def _light_wrapper(wrapped: 'F', runner: '_BoxRunner',
+                   enabled: 'Union[bool, Callable[..., bool]]' = True) -> 'F':
+    """Return a functools.wraps based wrapper that calls wrapped via runner.
+
+    This is the time_box 'fast' engine. It is cheaper per call than the
+    wrapt proxy, at the cost of the descriptor fidelity wrapt provides, so
+    it is meant for plain functions. As with time_box, a static enabled of
+    False returns wrapped unchanged, and a callable enabled is checked on
+    every call.
+
+    Args:
+        wrapped: The plain or async function to wrap
+
+        runner: The _BoxRunner that issues the messages
+
+        enabled: As described for the time_box time_box_enabled argument
+
+    Returns:
+        The wrapper function
+
+    """
+    import functools
+
+    wrapper: Callable[..., Any]
+    if not callable(enabled):
+        if not enabled:
+            return wrapped
+        if _is_coroutine_function(wrapped):
+            async def wrapper(*args: 'Any', **kwargs: 'Any') -> 'Any':
+                return await runner.call_async(wrapped, args, kwargs)
+        else:
+            def wrapper(*args: 'Any', **kwargs: 'Any') -> 'Any':
+                return runner(wrapped, args, kwargs)
+    else:
+        is_enabled = enabled
+        if _is_coroutine_function(wrapped):
+            async def wrapper(*args: 'Any', **kwargs: 'Any') -> 'Any':
+                if not is_enabled():
+                    return await wrapped(*args, **kwargs)
+                return await runner.call_async(wrapped, args, kwargs)
+        else:
+            def wrapper(*args: 'Any', **kwargs: 'Any') -> 'Any':
+                if not is_enabled():
+                    return wrapped(*args, **kwargs)
+                return runner(wrapped, args, kwargs)
+
+    functools.update_wrapper(wrapper, wrapped)
+    setattr(wrapper, '_time_box_runner', runner)
+    return cast('F', wrapper)
+
+
+ENGINES = ('auto', 'fast', 'wrapt')
+FORMATS = ('box', 'jsonl')
+
+
+def _check_options(engine: str, format: str) -> None:
+    """Check the time_box options that take one of a set of values.
+
+    Args:
+        engine: The engine argument of time_box
+
+        format: The format argument of time_box
+
+    Raises:
+        ValueError: engine is not in ENGINES or format is not in FORMATS
+
+    """
+    if engine not in ENGINES:
+        raise ValueError('engine must be one of ' + ', '.join(ENGINES)
+                         + ', not ' + repr(engine))
+    if format not in FORMATS:
+        raise ValueError('format must be one of ' + ', '.join(FORMATS)
+                         + ', not ' + repr(format))
 
 
 @overload
-def time_box(wrapped: F, *,
-             dt_format: DT_Format = StartStopHeader.default_dt_format,
+def time_box(wrapped: 'F', *,
+             dt_format: 'DT_Format' = StartStopHeader.default_dt_format,
              end: str = '\n',
-             file: Optional[TextIO] = None,
+             file: 'Optional[TextIO]' = None,
              flush: bool = False,
-             time_box_enabled: Union[bool, Callable[..., bool]] = True
-             ) -> F: ...
+             time_box_enabled: 'Union[bool, Callable[..., bool]]' = True,
+             track_memory: bool = False,
+             stats: 'Optional[StatsRegistry]' = None,
+             threshold: 'Optional[float]' = None,
+             profile: 'Union[None, str, TimeBoxProfiler]' = None,
+             engine: str = 'auto',
+             sink: 'Optional[SpanSink]' = None,
+             format: str = 'box',
+             overhead_budget: 'Optional[float]' = None,
+             compensate: bool = False,
+             clock: 'Optional[Clock]' = None,
+             heartbeat: 'Optional[float]' = None
+             ) -> 'F': ...
 
 
 @overload
 def time_box(*,
-             dt_format: DT_Format = StartStopHeader.default_dt_format,
+             dt_format: 'DT_Format' = StartStopHeader.default_dt_format,
              end: str = '\n',
-             file: Optional[TextIO] = None,
+             file: 'Optional[TextIO]' = None,
              flush: bool = False,
-             time_box_enabled: Union[bool, Callable[..., bool]] = True
-             ) -> Callable[[F], F]: ...
-
-
-def time_box(wrapped: Optional[F] = None, *,
-             dt_format: DT_Format = StartStopHeader.default_dt_format,
+             time_box_enabled: 'Union[bool, Callable[..., bool]]' = True,
+             track_memory: bool = False,
+             stats: 'Optional[StatsRegistry]' = None,
+             threshold: 'Optional[float]' = None,
+             profile: 'Union[None, str, TimeBoxProfiler]' = None,
+             engine: str = 'auto',
+             sink: 'Optional[SpanSink]' = None,
+             format: str = 'box',
+             overhead_budget: 'Optional[float]' = None,
+             compensate: bool = False,
+             clock: 'Optional[Clock]' = None,
+             heartbeat: 'Optional[float]' = None
+             ) -> 'Callable[[F], F]': ...
+
+
+def time_box(wrapped: 'Optional[F]' = None, *,
+             dt_format: 'DT_Format' = StartStopHeader.default_dt_format,
              end: str = '\n',
-             file: Optional[TextIO] = None,
+             file: 'Optional[TextIO]' = None,
              flush: bool = False,
-             time_box_enabled: Union[bool, Callable[..., bool]] = True
-             ) -> F:
+             time_box_enabled: 'Union[bool, Callable[..., bool]]' = True,
+             track_memory: bool = False,
+             stats: 'Optional[StatsRegistry]' = None,
+             threshold: 'Optional[float]' = None,
+             profile: 'Union[None, str, TimeBoxProfiler]' = None,
+             engine: str = 'auto',
+             sink: 'Optional[SpanSink]' = None,
+             format: str = 'box',
+             overhead_budget: 'Optional[float]' = None,
+             compensate: bool = False,
+             clock: 'Optional[Clock]' = None,
+             heartbeat: 'Optional[float]' = None
+             ) -> 'F':
     """Decorator to wrap a function in start time and end time messages.
 
 The time_box decorator can be invoked with or without arguments, and the
 function being wrapped can optionally take arguments and optionally
-return a value. The wrapt.decorator is used to preserve the wrapped
-function introspection capabilities, and functools.partial is used to
-handle the case where decorator arguments are specified. The examples
+return a value. The wrapper preserves the wrapped function introspection
+capabilities (name, docstring, and signature), and functools.partial is
+used to handle the case where decorator arguments are specified. The examples
 further below will help demonstrate the various ways in which the
-time_box decorator can be used.
+time_box decorator can be used. When the wrapped function is a coroutine
+function (async def), the end message is issued when the awaited call
+completes.
 
 Args:
     wrapped: Any callable function that accepts optional positional
@@ -283,6 +1109,104 @@ Args:
     time_box_enabled: Specifies whether the start and end messages
         should be issued (True) or not (False). The default is True.
 
+    track_memory: Specifies whether the memory allocated by the wrapped
+        function should be measured with tracemalloc and shown in the end
+        message as the net bytes, peak bytes, and net blocks (the net
+        change in surviving blocks, so blocks freed inside the call cancel
+        out). Tracing slows down every allocation made while the wrapped
+        function runs, so only specify True where the numbers are needed
+        (see the mem_track module). The default is False.
+
+    stats: Specifies a StatsRegistry (see the stats module) in which the
+        call count, error count, elapsed time, and memory usage (when
+        tracked) of the wrapped function are accumulated. The default is
+        None.
+
+    threshold: Specifies a number of seconds below which a call is
+        considered fast enough to not be reported. When specified, the start
+        message is deferred, nothing is issued for calls that finish within
+        the threshold, and calls that exceed it issue a single flower box
+        with the start time, end time, elapsed time, and the amount by which
+        the threshold was exceeded. This box is also issued for a call that
+        raises an exception after exceeding the threshold, with a line
+        naming the exception. The default is None, which issues the start
+        and end messages for every call.
+
+    profile: Specifies a profiler (see the profilers module) to run while
+        the wrapped function is called. The profiler adds a summary of
+        where the time went to the end message and writes its profile
+        files to its output_dir. 'sample' selects a SampleProfiler and
+        'cprofile' a CProfileProfiler, with their default options. The
+        default is None.
+
+    sink: Specifies a SpanSink (see the sinks module) to which a record of
+        each call (function, start time, duration, thread, process, and
+        status) is emitted, for example a SQLiteSink. The default is None.
+
+    engine: Specifies how the wrapper is built. 'fast' uses a
+        functools.wraps based wrapper function, which is the cheapest per
+        call. 'wrapt' uses a wrapt.decorator proxy, which keeps full
+        descriptor fidelity and so is needed for objects other than plain
+        functions, such as classmethod and staticmethod objects, callable
+        instances, and functions already wrapped by wrapt decorators.
+        The default is 'auto', which uses 'fast' for plain python
+        functions (including methods decorated in the class body and async
+        functions) and 'wrapt' for everything else. The fast engine also
+        avoids importing wrapt. A call disabled by a callable
+        time_box_enabled is somewhat cheaper with the wrapt C extension,
+        while enabled calls are cheaper with the fast engine; see
+        benchmarks/bench_engines.py for the numbers.
+
+    format: Specifies how the start and end of each call are written to
+        *file*. 'box' issues the flower box messages. 'jsonl' writes one
+        compact JSON object per line instead, with a single write call:
+        {"event":"start","function":...,"ts_ns":...} when the call starts,
+        and {"event":"end","function":...,"ts_ns":...,"elapsed_ns":...,
+        "status":"ok"} when it ends, where function is the qualified name,
+        ts_ns the time in nanoseconds since the epoch, and elapsed_ns the
+        monotonic elapsed time. A call that raises an exception writes an
+        end event with status "error". With *threshold*, both events are
+        written when the call ends, only for calls over the threshold, and
+        the end event adds "threshold_ns". The memory and profile lines are
+        added as an "extra" list. While a trace id is set (see the trace
+        module), the events add "trace_id", "pid", "proc" (a random id
+        of the process), and "mono_ns", the monotonic time of the event,
+        so that the logs of several processes can be merged with
+        trace.merge_traces. *dt_format* and *end* do not apply. The
+        default is 'box'.
+
+    overhead_budget: Specifies the largest acceptable cost of time_box as a
+        fraction of the run time of the wrapped function (for example, 0.01
+        for 1%). When the measured cost exceeds it, the function is
+        downgraded once to sampling only some calls and, if that is not
+        enough, to only counting them, and each downgrade is reported on
+        *file* (see the governor module). The default is None, which
+        handles every call.
+
+    compensate: Specifies whether the elapsed time shown for each call
+        has the fixed cost of time_box subtracted, for functions that run
+        for only a few microseconds. The cost is measured once per process
+        when the first function with compensate=True is decorated (see the
+        calibration module), and the elapsed time line then shows the
+        compensated monotonic time with its uncertainty, or "below
+        resolution". With format='jsonl', the end event adds
+        "compensated_ns" and "uncertainty_ns". The times recorded in
+        *stats* and sent to *sink* are not compensated. The default is
+        False.
+
+    heartbeat: Specifies the number of seconds between the messages that
+        a call is still running, which are issued after the start message
+        of a long running call until it ends, with the start time and the
+        elapsed time (or as a "heartbeat" event with format='jsonl'). One
+        thread issues the heartbeats of all running calls (see the
+        heartbeat module). The default is None, for no heartbeats.
+
+    clock: Specifies the clock to read the start and end times from, such
+        as a CoarseClock for cheaper readings or a SimulatedClock for
+        predictable times in tests (see the clock module). The default is
+        None, which uses the clock set by clock.set_clock (the SystemClock
+        unless changed).
+
 Returns:
     A callable function that issues a starting time message, calls
     the wrapped function, issues the ending time message, and finally
@@ -311,13 +1235,13 @@ this is sample text for _tbe = False static example
 >>> aFunc4b()  # aFunc4b is wrapped by time box
 <BLANKLINE>
 ************************************************
-* Starting aFunc4b on Mon Jun 29 2020 18:22:51 *
+* Starting aFunc4b on Mon Jun 29 2020 18:22:50 *
 ************************************************
 this is sample text for _tbe = True static example
 <BLANKLINE>
 **********************************************
-* Ending aFunc4b on Mon Jun 29 2020 18:22:51 *
-* Elapsed time: 0:00:00.000133               *
+* Ending aFunc4b on Mon Jun 29 2020 18:22:50 *
+* Elapsed time: 0:00:00.000120               *
 **********************************************
 
 
@@ -335,13 +1259,13 @@ this is sample text for _tbe = True static example
 >>> aFunc5()  # aFunc5 is wrapped by time box
 <BLANKLINE>
 ***********************************************
-* Starting aFunc5 on Mon Jun 29 2020 18:22:51 *
+* Starting aFunc5 on Mon Jun 29 2020 18:22:50 *
 ***********************************************
 this is sample text for the tbe dynamic example
 <BLANKLINE>
 *********************************************
-* Ending aFunc5 on Mon Jun 29 2020 18:22:51 *
-* Elapsed time: 0:00:00.000130              *
+* Ending aFunc5 on Mon Jun 29 2020 18:22:50 *
+* Elapsed time: 0:00:00.000120              *
 *********************************************
 
 >>> _tbe = False
@@ -361,19 +1285,17 @@ this is sample text for the tbe dynamic example
 >>> aFunc6()
 <BLANKLINE>
 ****************************************
-* Starting aFunc6 on 06/30/20 17:07:48 *
+* Starting aFunc6 on 06/29/20 18:22:50 *
 ****************************************
 this is sample text for the datetime format example
 <BLANKLINE>
 **************************************
-* Ending aFunc6 on 06/30/20 17:07:48 *
-* Elapsed time: 0:00:00.000073       *
+* Ending aFunc6 on 06/29/20 18:22:50 *
+* Elapsed time: 0:00:00.000120       *
 **************************************
 
     """
 
-    from sbt_utils.time_hdr import StartStopHeader as StartStopHeader
-
     # ========================================================================
     #  The following code covers cases where time_box is used with or without
     #  parameters, and where the decorated function has or does not have
@@ -423,9 +1345,11 @@ this is sample text for the datetime format example
     #     agument with the end='\n\n' as the second argument as we now have
     #     something that time_box can decorate.
     #
-    #     One other complication is that we are also using the wrapt.decorator
-    #     for the inner wrapper function which does some more smoke and
-    #     mirrors to ensure the introspection will work as expected.
+    #     One other complication is the wrapper itself. Plain functions get
+    #     a functools.wraps based wrapper (engine 'fast'), while anything
+    #     else gets the wrapt.decorator proxy (engine 'wrapt') which does
+    #     some more smoke and mirrors to ensure the descriptor protocol and
+    #     introspection will work as expected.
     # ========================================================================
 # ============================================================================
 #  This is the what appears in stderr:
@@ -454,22 +1378,52 @@ this is sample text for the datetime format example
     if file is None:
         file = sys.stdout
 
+    _check_options(engine, format)
+
     if wrapped is None:
-        return cast(F, functools.partial(time_box, dt_format=dt_format,
+        import functools
+        return cast('F', functools.partial(time_box, dt_format=dt_format,
                     end=end, file=file, flush=flush,
-                    time_box_enabled=time_box_enabled))
+                    time_box_enabled=time_box_enabled,
+                    track_memory=track_memory,
+                    stats=stats,
+                    threshold=threshold,
+                    profile=profile,
+                    engine=engine,
+                    sink=sink,
+                    format=format,
+                    overhead_budget=overhead_budget,
+                    compensate=compensate,
+                    clock=clock,
+                    heartbeat=heartbeat))
+
+    func_stats = None
+    if stats is not None:
+        func_stats = stats.get(wrapped.__qualname__)
+
+    runner = _BoxRunner(wrapped.__name__, qualname=wrapped.__qualname__,
+                        dt_format=dt_format, end=end, file=file, flush=flush,
+                        track_memory=track_memory, func_stats=func_stats,
+                        threshold=threshold, profile=profile, sink=sink,
+                        format=format, overhead_budget=overhead_budget,
+                        compensate=compensate, clock=clock,
+                        heartbeat=heartbeat)
+
+    if engine == 'auto':
+        engine = ('fast' if type(wrapped) is _FunctionType
+                  else 'wrapt')
+    if engine == 'fast':
+        return _light_wrapper(wrapped, runner, time_box_enabled)
+
+    from wrapt.decorators import decorator
+
+    is_async = _is_coroutine_function(wrapped)
 
     @decorator(enabled=time_box_enabled)
-    def wrapper(wrapped: F, instance: Optional[Any],
-                args: Tuple[Any, ...],
-                kwargs: Dict[str, Any]) -> Any:
-        header = StartStopHeader(wrapped.__name__)
-        header.print_start_msg(dt_format=dt_format,
-                               end=end, file=file, flush=flush)
-        ret_value = wrapped(*args, **kwargs)
-
-        header.print_end_msg(dt_format=dt_format,
-                             end=end, file=file, flush=flush)
-
-        return ret_value
-    return cast(F, wrapper(wrapped))
+    def wrapper(wrapped: 'F', instance: 'Optional[Any]',
+                args: 'Tuple[Any, ...]',
+                kwargs: 'Dict[str, Any]') -> 'Any':
+        if is_async:
+            return runner.call_async(wrapped, args, kwargs)
+        return runner(wrapped, args, kwargs)
+    return cast('F', wrapper(wrapped))
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Created on Tue Oct 20 03:24:51 2026
+#
+# @author: Scott Tuttle
+# =============================================================================
+
+"""
+=====
+trace
+=====
+
+With a **trace id**, the time_box(format='jsonl') logs written by a job and
+the subprocesses it starts can be merged into one timeline with
+**merge_traces**:
+
+:Example: tag the calls of a job and of a subprocess with one trace id
+
+    import subprocess
+    from sbt_utils.trace import trace, trace_env
+
+    with trace():
+        run_batch()  # wrapped by time_box(format='jsonl', file=...)
+        subprocess.run(['python', 'helper.py'], env=trace_env())
+
+:Example: merge the logs of all the processes
+
+    python -m sbt_utils.trace job.jsonl helper.jsonl -o timeline.jsonl
+
+
+The trace id of the current thread or asyncio task is kept in a
+contextvar. A process started with the SBT_UTILS_TRACE_ID environment
+variable (which trace_env adds) begins with that trace id, so the id passes
+from a job to its subprocesses and helper scripts, and trace() without an
+id keeps it. While a trace id is set, each jsonl event written by time_box
+adds:
+
+    1) "trace_id", the trace id,
+    2) "pid", the process id,
+    3) "proc", a random id of the process, which unlike the pid is not
+       shared with the processes of other hosts or containers, and
+    4) "mono_ns", the monotonic time (time.perf_counter_ns for the
+       SystemClock) of the event, next to its wall clock "ts_ns".
+
+The wall clock is shared by the processes of a machine, but it can be
+stepped (for example by NTP) while they run, and the monotonic clock only
+has a meaning within one process (or one boot). merge_traces places each
+event at its monotonic time plus the offset between the wall clock and the
+monotonic clock at the first event of its process (the rotated files of a
+process, which share its "proc" id and the offset, are given oldest first),
+so that a clock step does not reorder the events of a process, while the
+processes are aligned by the wall clock. Events without a "proc" id (from
+older logs) share an offset only with the events of the same pid in the
+same file. Events without a monotonic time are placed at their wall clock
+time. An offset can be added to all the events of a file, for logs from a
+machine whose clock is known to be off.
+
+The files are merged with a k-way heap merge (heapq.merge) of their events,
+read a line at a time, so files of many gigabytes are merged in little
+memory. The events of a file are mostly in order already, and each file is
+sorted within a window of recent events (1000 by default) to absorb the
+threads of a process writing a little out of order. Events that arrive
+later than the window allows (such as the start events that time_box
+writes at the end of a call with *threshold*) are written as they come
+and counted as late. Files ending in .gz are read with gzip, such as those
+compressed by RotatingFileSink, and lines that are not JSON objects with a
+ts_ns (such as a line cut short by a crash) are skipped and counted.
+
+"""
+
+import heapq
+import json
+import os
+import re
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, \
+    Optional, Sequence, TextIO, Tuple
+
+TRACE_ID_ENV = 'SBT_UTILS_TRACE_ID'
+
+_VALID_TRACE_ID = re.compile(r'[0-9A-Za-z._-]{1,128}\Z')
+
+
+def _env_trace_id() -> Optional[str]:
+    """Return the trace id passed in the environment, if a valid one."""
+    trace_id = os.environ.get(TRACE_ID_ENV)
+    if trace_id is None or not _VALID_TRACE_ID.match(trace_id):
+        return None
+    return trace_id
+
+
+_trace_id: ContextVar[Optional[str]] = ContextVar(
+    'trace_id', default=_env_trace_id())
+
+_pid = os.getpid()
+# a random id of this process, since the same pid is used by processes on
+# other hosts, in other containers, or after a reboot
+_proc = os.urandom(8).hex()
+
+
+def _reset_pid() -> None:
+    global _pid, _proc
+    _pid = os.getpid()
+    _proc = os.urandom(8).hex()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pid)
+
+
+def new_trace_id() -> str:
+    """Return a new random trace id.
+
+    Returns:
+        32 hexadecimal digits
+
+    """
+    return os.urandom(16).hex()
+
+
+def get_trace_id() -> Optional[str]:
+    """Return the trace id of the current thread or asyncio task.
+
+    Returns:
+        The trace id set by trace or set_trace_id, or the one passed in the
+        SBT_UTILS_TRACE_ID environment variable, or None
+
+    """
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: Optional[str]) -> None:
+    """Set the trace id of the current thread or asyncio task.
+
+    Args:
+        trace_id: The trace id, of up to 128 letters, digits, and the
+            characters '.', '_', and '-', or None for no trace id
+
+    Raises:
+        ValueError: The trace id is not valid
+
+    """
+    _check_trace_id(trace_id)
+    _trace_id.set(trace_id)
+
+
+def _check_trace_id(trace_id: Optional[str]) -> None:
+    """Raise ValueError for a trace id that is not valid."""
+    if trace_id is not None and not _VALID_TRACE_ID.match(trace_id):
+        raise ValueError('trace_id must be 1 to 128 letters, digits, '
+                         '".", "_", or "-", not ' + repr(trace_id))
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None) -> Iterator[str]:
+    """Set the trace id for the calls made within the with statement.
+
+    Args:
+        trace_id: The trace id. The default is None, which keeps the
+            current trace id, or uses a new one when there is none.
+
+    Yields:
+        The trace id
+
+    Raises:
+        ValueError: The trace id is not valid
+
+    """
+    if trace_id is None:
+        trace_id = get_trace_id() or new_trace_id()
+    _check_trace_id(trace_id)
+    token = _trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _trace_id.reset(token)
+
+
+def trace_env(env: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+    """Return the environment for a subprocess that continues the trace.
+
+    Args:
+        env: The environment to add the trace id to. The default is None,
+            which uses os.environ.
+
+    Returns:
+        A copy of env with SBT_UTILS_TRACE_ID set to the current trace id,
+        or without it when there is none
+
+    """
+    result = dict(os.environ if env is None else env)
+    trace_id = get_trace_id()
+    if trace_id is None:
+        result.pop(TRACE_ID_ENV, None)
+    else:
+        result[TRACE_ID_ENV] = trace_id
+    return result
+
+
+def trace_fields() -> str:
+    """Return the fields that time_box adds to the jsonl events.
+
+    Returns:
+        The "trace_id", "pid", and "proc" fields, each preceded by a comma,
+        or '' when there is no trace id
+
+    """
+    trace_id = _trace_id.get()
+    if trace_id is None:
+        return ''
+    # a valid trace id needs no escaping
+    return (',"trace_id":"' + trace_id + '","pid":' + str(_pid)
+            + ',"proc":"' + _proc + '"')
+
+
+class MergeSummary(NamedTuple):
+    """The counts of one merge_traces run."""
+    events: int
+    skipped: int
+    late: int
+
+
+# the event time, the index of the file, and the line number, followed by
+# the line with the fields added
+_Entry = Tuple[int, int, int, str]
+
+
+_decoder = json.JSONDecoder()
+
+
+def _open(path: str) -> TextIO:
+    """Open a log file for reading, decompressing a .gz file."""
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+class _Reader():
+    """Reads the events of one file in the order of their corrected times."""
+
+    def __init__(self, path: str, index: int, *,
+                 trace_id: Optional[str],
+                 offset_ns: int,
+                 window: int,
+                 anchors: Dict[Any, int]) -> None:
+        self.path = path
+        self.index = index
+        self.trace_id = trace_id
+        self.offset_ns = offset_ns
+        self.window = window
+        # the offset between the wall clock and the monotonic clock at the
+        # first event of each process, shared by the readers of all files
+        self.anchors = anchors
+        self.source = ',"source":' + json.dumps(path) + '}\n'
+        self.skipped = 0
+        self.late = 0
+
+    def __iter__(self) -> Iterator[_Entry]:
+        """Yield the events with corrected times, sorted within the window."""
+        anchors = self.anchors
+        path = self.path
+        offset_ns = self.offset_ns
+        trace_id = self.trace_id
+        index = self.index
+        source = self.source
+        window = self.window
+        decode = _decoder.raw_decode
+        pending: List[_Entry] = []
+        last_ns = -(1 << 64)
+        with _open(self.path) as file:
+            for line_no, line in enumerate(file, 1):
+                line = line.strip()
+                try:
+                    event, end = decode(line)
+                    # a line with anything after the object is not an event
+                    if end != len(line):
+                        raise ValueError
+                    ts_ns = event['ts_ns']
+                    mono_ns = event.get('mono_ns')
+                except (ValueError, TypeError, KeyError, AttributeError):
+                    self.skipped += 1
+                    continue
+                if type(ts_ns) is not int \
+                        or (mono_ns is not None and type(mono_ns) is not int):
+                    self.skipped += 1
+                    continue
+                if trace_id is not None and event.get('trace_id') != trace_id:
+                    continue
+                if mono_ns is None:
+                    corrected_ns = ts_ns + offset_ns
+                else:
+                    # without a proc id, the pid is only known to stand
+                    # for one process within the file
+                    proc = event.get('proc')
+                    if proc is None:
+                        proc = (path, event.get('pid'))
+                    anchor = anchors.setdefault(proc, ts_ns - mono_ns)
+                    corrected_ns = mono_ns + anchor + offset_ns
+                # the fields go before the closing brace at the decoded end
+                entry = (corrected_ns, index, line_no,
+                         line[:end - 1] + ',"corrected_ns":'
+                         + str(corrected_ns) + source)
+                if len(pending) < window:
+                    heapq.heappush(pending, entry)
+                    continue
+                entry = heapq.heappushpop(pending, entry)
+                if entry[0] < last_ns:
+                    self.late += 1
+                else:
+                    last_ns = entry[0]
+                yield entry
+        while pending:
+            entry = heapq.heappop(pending)
+            if entry[0] < last_ns:
+                self.late += 1
+            else:
+                last_ns = entry[0]
+            yield entry
+
+
+def merge_traces(paths: Sequence[str], out: TextIO, *,
+                 trace_id: Optional[str] = None,
+                 window: int = 1000,
+                 offsets: Optional[Mapping[str, int]] = None
+                 ) -> MergeSummary:
+    """Merge the jsonl logs of time_box into one timeline.
+
+    Each event is written as it was read, with "corrected_ns", its time on
+    the merged timeline in nanoseconds since the epoch, and "source", the
+    path of its file, added at the end.
+
+    Args:
+        paths: The files written by time_box(format='jsonl'), with the
+            rotated files of a process oldest first
+
+        out: The file to write the merged events to
+
+        trace_id: The trace id of the events to keep. The default is None,
+            which keeps all the events.
+
+        window: The number of events of each file that are held to be
+            sorted. The default is 1000.
+
+        offsets: The nanoseconds to add to the times of the events of a
+            file, by path. The default is None, for no offsets.
+
+    Returns:
+        The number of events written, the number of lines skipped, and the
+        number of events that were later than the window allowed
+
+    Raises:
+        ValueError: window is less than 1
+
+    """
+    if window < 1:
+        raise ValueError('window must be at least 1, not ' + repr(window))
+    if offsets is None:
+        offsets = {}
+    anchors: Dict[Any, int] = {}
+    readers = [_Reader(path, index, trace_id=trace_id,
+                       offset_ns=offsets.get(path, 0), window=window,
+                       anchors=anchors)
+               for index, path in enumerate(paths)]
+    events = 0
+    write = out.write
+    for entry in heapq.merge(*readers):
+        write(entry[3])
+        events += 1
+    return MergeSummary(events, sum(reader.skipped for reader in readers),
+                        sum(reader.late for reader in readers))
+
+
+def _parse_offset(text: str) -> Tuple[str, int]:
+    """Parse a --offset argument of the form PATH=NANOSECONDS."""
+    import argparse
+    path, sep, ns = text.rpartition('=')
+    try:
+        if not sep or not path:
+            raise ValueError
+        return path, int(ns)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected PATH=NANOSECONDS, not ' + repr(text)) from None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Merge the jsonl logs of time_box from the command line.
+
+    Args:
+        argv: The arguments. The default is None, which uses sys.argv.
+
+    Returns:
+        The exit status, 0
+
+    """
+    # imported here so that time_box, which imports this module for
+    # trace_fields, does not pay for it
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='python -m sbt_utils.trace',
+        description='Merge the jsonl logs written by time_box in several '
+                    'processes into one timeline.')
+    parser.add_argument('paths', nargs='+', metavar='path',
+                        help='a jsonl log file (or .gz file)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='the merged file (default standard output)')
+    parser.add_argument('--trace-id',
+                        help='keep only the events of this trace id')
+    parser.add_argument('--window', type=int, default=1000,
+                        help='events of each file held to be sorted '
+                        '(default 1000)')
+    parser.add_argument('--offset', type=_parse_offset, action='append',
+                        default=[], metavar='PATH=NANOSECONDS',
+                        help='add to the times of the events of a file')
+    args = parser.parse_args(argv)
+    offsets = dict(args.offset)
+    if args.output == '-':
+        summary = merge_traces(args.paths, sys.stdout,
+                               trace_id=args.trace_id, window=args.window,
+                               offsets=offsets)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            summary = merge_traces(args.paths, out,
+                                   trace_id=args.trace_id,
+                                   window=args.window, offsets=offsets)
+    print('merged ' + str(summary.events) + ' events, skipped '
+          + str(summary.skipped) + ' lines, ' + str(summary.late)
+          + ' events later than the window', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,4 +6,8 @@ Created on Tue Dec 10 19:34:09 2019
 @author: Scott Tuttle
 """
 
-# currently null
+# The tests of the time_box 'wrapt' engine need the installed wrapt, which
+# time_hdr only imports on first use. Importing it with the test package
+# keeps those tests independent of the collection order, since a doctest
+# collection of the wrapt stub in the repo root can no longer shadow it.
+import wrapt.decorators  # noqa: F401
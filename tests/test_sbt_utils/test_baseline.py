@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 19:40:31 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import json
+import pytest
+
+from typing import Any, Iterable
+
+from sbt_utils.baseline import LatencySummary, Regression, check_baseline, \
+    exceedance_p, find_latency_regressions, load_baseline, main, \
+    mann_whitney_p, print_regression_report, save_baseline, summarize
+from sbt_utils.stats import StatsRegistry
+from sbt_utils.time_hdr import time_box
+
+MS = 1_000_000
+
+
+def make_registry(name: str, times_ns: Iterable[int]) -> StatsRegistry:
+    registry = StatsRegistry(interval=None)
+    func_stats = registry.get(name)
+    for elapsed_ns in times_ns:
+        func_stats.record(elapsed_ns)
+    return registry
+
+
+class TestLatencySummary():
+
+    def test_from_func_stats(self) -> None:
+        registry = StatsRegistry(histogram_bounds=(0.001, 0.01))
+        func_stats = registry.get('aFunc')
+        func_stats.record(MS // 2)
+        func_stats.record(2 * MS, error=True)
+        func_stats.record(20 * MS)
+        summary = LatencySummary.from_func_stats(func_stats)
+        assert summary.name == 'aFunc'
+        assert summary.count == 3
+        assert summary.error_count == 1
+        assert summary.total_ns == MS // 2 + 22 * MS
+        assert summary.min_ns == MS // 2
+        assert summary.max_ns == 20 * MS
+        assert summary.bounds_ns == [MS, 10 * MS]
+        assert summary.histogram == [1, 1, 1]
+
+    def test_quantile(self) -> None:
+        summary = LatencySummary('aFunc', count=100, error_count=0,
+                                 total_ns=0, min_ns=MS // 2,
+                                 max_ns=30 * MS, bounds_ns=[MS, 10 * MS],
+                                 histogram=[50, 40, 10])
+        # the first bucket starts at the minimum, the last ends at the max
+        assert summary.quantile_ns(0.25) == MS // 2 + MS // 4
+        assert summary.quantile_ns(0.50) == MS
+        assert summary.quantile_ns(0.70) == MS + 9 * MS // 2
+        assert summary.quantile_ns(0.95) == 20 * MS
+        assert summary.bucket_of(0.50) == 0
+        assert summary.bucket_of(0.51) == 1
+        assert summary.bucket_of(0.99) == 2
+
+    def test_empty(self) -> None:
+        summary = LatencySummary('aFunc', count=0, error_count=0,
+                                 total_ns=0, min_ns=0, max_ns=0,
+                                 bounds_ns=[MS], histogram=[0, 0])
+        assert summary.quantile_ns(0.5) == 0.0
+
+    def test_dict(self) -> None:
+        registry = make_registry('aFunc', [MS, 2 * MS, 3 * MS])
+        summary = summarize(registry)[0]
+        data = summary.to_dict()
+        assert data['p50_ns'] == summary.quantile_ns(0.5)
+        copy = LatencySummary.from_dict(json.loads(json.dumps(data)))
+        assert copy.to_dict() == data
+
+
+class TestTests():
+
+    def test_mann_whitney_same(self) -> None:
+        assert mann_whitney_p([10, 80, 10], [10, 80, 10]) > 0.4
+
+    def test_mann_whitney_slower(self) -> None:
+        assert mann_whitney_p([50, 40, 10], [10, 40, 50]) < 0.001
+        assert mann_whitney_p([10, 40, 50], [50, 40, 10]) > 0.999
+
+    def test_mann_whitney_degenerate(self) -> None:
+        assert mann_whitney_p([0, 0], [3, 4]) == 1.0
+        assert mann_whitney_p([5, 0], [5, 0]) == 1.0
+
+    def test_exceedance(self) -> None:
+        assert exceedance_p([990, 10], [990, 10], 0) > 0.4
+        assert exceedance_p([990, 10], [950, 50], 0) < 0.001
+        assert exceedance_p([1000, 0], [1000, 0], 0) == 1.0
+        assert exceedance_p([0, 0], [10, 0], 0) == 1.0
+
+
+class TestFindLatencyRegressions():
+
+    def test_shift(self) -> None:
+        baseline = make_registry('aFunc', (MS + i * 1000
+                                           for i in range(200)))
+        current = make_registry('aFunc', (3 * MS + i * 1000
+                                          for i in range(200)))
+        regressions = find_latency_regressions(baseline, current)
+        assert [(r.function, r.quantile) for r in regressions] == [
+            ('aFunc', 'p50'), ('aFunc', 'p99')]
+        assert regressions[0].current_ns > 2.5 * regressions[0].baseline_ns
+
+    def test_tail_only(self) -> None:
+        baseline = make_registry('aFunc', [MS] * 990 + [3 * MS] * 10)
+        current = make_registry('aFunc', [MS] * 950 + [30 * MS] * 50)
+        regressions = find_latency_regressions(baseline, current)
+        assert [r.quantile for r in regressions] == ['p99']
+
+    def test_no_regression(self) -> None:
+        times = [MS + i * 1000 for i in range(200)]
+        baseline = make_registry('aFunc', times)
+        assert find_latency_regressions(
+            baseline, make_registry('aFunc', times)) == []
+        # faster is not a regression
+        assert find_latency_regressions(
+            baseline, make_registry('aFunc', [MS // 10] * 200)) == []
+
+    def test_threshold(self) -> None:
+        baseline = make_registry('aFunc', [2 * MS] * 100 + [4 * MS] * 100)
+        current = make_registry('aFunc', [2 * MS] * 80 + [4 * MS] * 120)
+        assert find_latency_regressions(baseline, current,
+                                        threshold=0.5) == []
+
+    def test_min_count_and_new_functions(self) -> None:
+        baseline = make_registry('aFunc', [MS] * 10)
+        current = make_registry('aFunc', [9 * MS] * 10)
+        current.get('bFunc').record(MS)
+        assert find_latency_regressions(baseline, current) == []
+        assert len(find_latency_regressions(baseline, current,
+                                            min_count=5)) == 2
+
+    def test_bounds_differ(self) -> None:
+        baseline = make_registry('aFunc', [MS] * 50)
+        current = StatsRegistry(histogram_bounds=(0.001,))
+        for _ in range(50):
+            current.get('aFunc').record(MS)
+        with pytest.raises(ValueError):
+            find_latency_regressions(baseline, current)
+
+
+class TestReportAndGate():
+
+    def test_report(self) -> None:
+        out = io.StringIO()
+        print_regression_report([Regression('aFunc', 'p99', MS, 2 * MS,
+                                            0.0001)], file=out)
+        assert '* aFunc p99: 1.000ms -> 2.000ms (+100.0%, p=0.0001) *' \
+            in out.getvalue()
+        assert Regression('aFunc', 'p50', 0, MS, 0.01).msg() == \
+            'aFunc p50: 0ns -> 1.000ms (+1.000ms, p=0.01)'
+        out = io.StringIO()
+        print_regression_report([], threshold=0.2, file=out)
+        assert '* No latency regressions beyond 20% *' in out.getvalue()
+
+    def test_save_load(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'baseline.json')
+        registry = make_registry('bFunc', [MS] * 3)
+        registry.get('aFunc').record(2 * MS)
+        save_baseline(registry, path)
+        with open(path) as f:
+            assert 'python' in json.load(f)['info']
+        loaded = load_baseline(path)
+        assert [s.name for s in loaded] == ['aFunc', 'bFunc']
+        assert loaded[1].histogram == summarize(registry)[1].histogram
+
+    def test_time_box_stats(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'baseline.json')
+        registry = StatsRegistry()
+
+        @time_box(stats=registry, format='jsonl', file=io.StringIO())
+        def aFunc() -> None:
+            pass
+
+        for _ in range(50):
+            aFunc()
+        save_baseline(registry, path)
+        out = io.StringIO()
+        assert check_baseline(registry, path, file=out) == []
+        assert 'No latency regressions' in out.getvalue()
+
+    def test_exit_code(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'baseline.json')
+        save_baseline(make_registry('aFunc', [MS] * 100), path)
+        current = make_registry('aFunc', [9 * MS] * 100)
+        out = io.StringIO()
+        assert len(check_baseline(current, path, file=out)) == 2
+        with pytest.raises(SystemExit) as exc:
+            check_baseline(current, path, file=out, exit_code=3)
+        assert exc.value.code == 3
+
+    def test_main(self, tmp_path: Any, capsys: Any) -> None:
+        baseline = str(tmp_path / 'baseline.json')
+        current = str(tmp_path / 'current.json')
+        save_baseline(make_registry('aFunc', [MS] * 100), baseline)
+        save_baseline(make_registry('aFunc', [MS] * 100), current)
+        assert main([baseline, current]) == 0
+        save_baseline(make_registry('aFunc', [9 * MS] * 100), current)
+        assert main([baseline, current]) == 1
+        assert main([baseline, current, '--threshold', '10']) == 0
+        assert 'Latency regressions' in capsys.readouterr().out
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 13:48:15 2026
+
+@author: Scott Tuttle
+"""
+
+import json
+import os
+import pytest
+
+from typing import Any, List
+
+from sbt_utils.bench import Benchmark, BenchResult, bench, \
+    calibrate_loops, compare_results, find_regressions, load_json, \
+    percentile, reject_outliers, save_json, t_critical
+
+
+class TestStatistics():
+
+    def test_t_critical(self) -> None:
+        assert t_critical(1) == 12.706
+        assert t_critical(9) == 2.262
+        assert t_critical(9, 0.99) == 3.250
+        assert t_critical(1000) == 1.960
+        with pytest.raises(ValueError):
+            t_critical(5, 0.9)
+
+    def test_percentile(self) -> None:
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert percentile(values, 0.0) == 1.0
+        assert percentile(values, 0.5) == 3.0
+        assert percentile(values, 1.0) == 5.0
+        assert percentile(values, 0.125) == 1.5
+        assert percentile([7.0], 0.75) == 7.0
+
+    def test_reject_outliers(self) -> None:
+        values = [10.0, 11.0, 10.5, 10.2, 50.0, 10.8, 1.0]
+        kept, outliers = reject_outliers(values)
+        assert kept == [10.0, 11.0, 10.5, 10.2, 10.8]
+        assert outliers == [50.0, 1.0]
+
+        # too few values to tell
+        assert reject_outliers([1.0, 100.0]) == ([1.0, 100.0], [])
+
+
+class TestBenchResult():
+
+    def test_statistics(self) -> None:
+        result = BenchResult('f', loops=10, warmup=1,
+                             times_ns=[100.0, 102.0, 98.0, 101.0, 99.0,
+                                       500.0])
+        assert result.outliers_ns == [500.0]
+        assert result.mean_ns == 100.0
+        assert result.median_ns == 100.0
+        assert result.min_ns == 98.0
+        assert result.max_ns == 102.0
+        assert result.stdev_ns == pytest.approx(1.5811, rel=1e-4)
+        margin = 2.776 * result.stdev_ns / 5 ** 0.5
+        assert result.ci_low_ns == pytest.approx(100.0 - margin)
+        assert result.ci_high_ns == pytest.approx(100.0 + margin)
+
+    def test_no_outlier_rejection(self) -> None:
+        result = BenchResult('f', loops=1, warmup=0,
+                             times_ns=[100.0, 100.0, 100.0, 500.0],
+                             outliers=False)
+        assert result.outliers_ns == []
+        assert result.mean_ns == 200.0
+
+    def test_single_repetition(self) -> None:
+        result = BenchResult('f', loops=1, warmup=0, times_ns=[42.0])
+        assert result.stdev_ns == 0.0
+        assert result.ci_low_ns == result.ci_high_ns == 42.0
+
+    def test_summary_msg(self) -> None:
+        result = BenchResult('f', loops=10, warmup=1,
+                             times_ns=[1500.0, 1500.0, 1500.0])
+        assert result.summary_msg() == (
+            'f: 1.500us +- 0ns (95% CI), stdev 0ns, median 1.500us, '
+            'min 1.500us, 10 loops x 3 runs, 0 outliers')
+
+    def test_dict_round_trip(self) -> None:
+        result = BenchResult('f', loops=10, warmup=2,
+                             times_ns=[1.0, 2.0, 3.0, 2.0, 90.0],
+                             confidence=0.99)
+        data = json.loads(json.dumps(result.to_dict()))
+        copy = BenchResult.from_dict(data)
+        assert copy.to_dict() == result.to_dict()
+        assert 'python' in copy.info
+
+
+class TestBench():
+
+    def test_calibrate_loops(self) -> None:
+        loops = calibrate_loops(sum, ([1, 2, 3],), min_time=0.001)
+        assert loops > 1
+        assert str(loops)[0] in '125'
+        assert calibrate_loops(lambda: None, min_time=0) == 1
+
+    def test_bench(self) -> None:
+        calls: List[int] = []
+
+        def func(value: int) -> None:
+            calls.append(value)
+
+        result = bench(func, args=(7,), loops=3, warmup=2, repeat=4)
+        assert result.name == \
+            'TestBench.test_bench.<locals>.func'
+        assert result.loops == 3
+        assert len(result.times_ns) == 4
+        assert calls == [7] * (3 * (2 + 4))
+
+    def test_bench_calibrates(self) -> None:
+        result = bench(sorted, args=([3, 2, 1],), name='sort', repeat=3,
+                       min_time=0.001)
+        assert result.name == 'sort'
+        assert result.loops > 1
+        assert result.min_ns > 0
+
+
+class TestBenchmark():
+
+    def test_run(self, capsys: Any, tmp_path: Any) -> None:
+        benchmark = Benchmark('my benchmarks', loops=5, repeat=3)
+
+        @benchmark.add
+        def first() -> None:
+            pass
+
+        benchmark.add(sorted, name='sort', args=([2, 1],))
+
+        results = benchmark.run()
+        assert [r.name for r in results] == [
+            'TestBenchmark.test_run.<locals>.first', 'sort']
+        assert benchmark.results is results
+
+        captured = capsys.readouterr().out
+        assert 'Starting my benchmarks on' in captured
+        assert 'Ending my benchmarks on' in captured
+        assert 'Benchmark results (time per call)' in captured
+        assert '* sort: ' in captured
+
+        path = os.path.join(str(tmp_path), 'results.json')
+        benchmark.save_json(path)
+        loaded = load_json(path)
+        assert [r.to_dict() for r in loaded] == \
+            [r.to_dict() for r in results]
+
+
+class TestCompareResults():
+
+    def test_compare(self, tmp_path: Any) -> None:
+        def make(name: str, times: List[float]) -> BenchResult:
+            return BenchResult(name, loops=1, warmup=0, times_ns=times)
+
+        baseline = [make('a', [100.0, 101.0, 99.0]),
+                    make('b', [100.0, 101.0, 99.0]),
+                    make('c', [100.0, 101.0, 99.0]),
+                    make('gone', [1.0, 1.0])]
+        current = [make('a', [200.0, 201.0, 199.0]),
+                   make('b', [50.0, 51.0, 49.0]),
+                   make('c', [100.0, 102.0, 99.0]),
+                   make('new', [1.0, 1.0])]
+
+        path = os.path.join(str(tmp_path), 'baseline.json')
+        save_json(baseline, path)
+
+        msgs = compare_results(load_json(path), current)
+        assert msgs == [
+            'a: 100ns -> 200ns (+100.0%, slower)',
+            'b: 100ns -> 50ns (-50.0%, faster)',
+            'c: 100ns -> 100ns (+0.3%, no significant change)']
+
+    def test_find_regressions(self) -> None:
+        def make(name: str, times: List[float]) -> BenchResult:
+            return BenchResult(name, loops=1, warmup=0, times_ns=times)
+
+        baseline = [make('a', [100.0, 101.0, 99.0]),
+                    make('b', [100.0, 101.0, 99.0]),
+                    make('c', [100.0, 150.0, 50.0])]
+        current = [make('a', [120.0, 121.0, 119.0]),
+                   make('b', [105.0, 106.0, 104.0]),
+                   make('c', [150.0, 200.0, 100.0])]
+
+        assert find_regressions(baseline, current) == [
+            'a: 100ns -> 120ns (+20.0% exceeds 10%)']
+        assert find_regressions(baseline, current, threshold=0.25) == []
+        assert find_regressions(baseline[1:], current, threshold=0.25) == [
+            'a: not in the baseline']
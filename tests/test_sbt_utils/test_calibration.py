@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:58:12 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import json
+import time
+
+from typing import Any
+
+from sbt_utils import calibration
+from sbt_utils.calibration import Calibration, calibrate, get_calibration
+from sbt_utils.stats import StatsRegistry
+from sbt_utils.time_hdr import StartStopHeader, time_box
+
+KNOWN = Calibration(resolution_ns=1, timer_ns=40, fixed_ns=1_500,
+                    uncertainty_ns=60)
+
+
+class TestCalibration():
+
+    def test_compensate(self) -> None:
+        assert KNOWN.compensate(13_845) == 12_345
+        assert KNOWN.compensate(1_000) == 0
+
+    def test_format_elapsed(self) -> None:
+        assert KNOWN.format_elapsed(13_845) == '12.345us +- 61ns'
+        assert KNOWN.format_elapsed(2_499) == 'below resolution'
+        assert KNOWN.format_elapsed(2_500) == '1.000us +- 61ns'
+        coarse = KNOWN._replace(resolution_ns=15_625_000)
+        assert coarse.format_elapsed(10_000_000) == 'below resolution'
+        assert coarse.format_elapsed(20_000_000) == '19.998ms +- 15.625ms'
+
+    def test_summary_msg(self) -> None:
+        assert KNOWN.summary_msg() == (
+            'perf_counter resolution 1ns, perf_counter_ns call 40ns, '
+            'time_box fixed cost 1.500us +- 60ns')
+
+    def test_calibrate(self) -> None:
+        result = calibrate(samples=100)
+        assert result.resolution_ns == (
+            time.get_clock_info('perf_counter').resolution * 1e9)
+        assert 0 < result.timer_ns < 100_000
+        assert 0 < result.fixed_ns < 1_000_000
+        assert 0 <= result.uncertainty_ns < 1_000_000
+
+    def test_get_calibration(self, monkeypatch: Any) -> None:
+        monkeypatch.setattr(calibration, '_calibration', None)
+        first = get_calibration()
+        assert get_calibration() is first
+
+
+class TestCompensate():
+
+    def test_header(self) -> None:
+        header = StartStopHeader('aFunc')
+        header.start_ns = 0
+        header.end_ns = 23_845
+        header.start_cost_ns = 10_000
+        header.calibration = KNOWN
+        assert header.build_end_msgs()[1] == \
+            'Elapsed time: 12.345us +- 61ns (compensated)'
+
+    def test_time_box(self, monkeypatch: Any) -> None:
+        # a fixed cost of 1ms makes the empty call below resolution
+        monkeypatch.setattr(calibration, '_calibration',
+                            KNOWN._replace(fixed_ns=1_000_000))
+        out = io.StringIO()
+        registry = StatsRegistry()
+
+        @time_box(compensate=True, file=out, stats=registry)
+        def aFunc() -> None:
+            pass
+
+        @time_box(compensate=True, file=out)
+        def bFunc() -> None:
+            time.sleep(0.01)
+
+        aFunc()
+        bFunc()
+        msgs = out.getvalue()
+        assert '* Elapsed time: below resolution (compensated) *' in msgs
+        assert 'ms +- 61ns (compensated)' in msgs
+        func_stats, = registry
+        assert func_stats.count == 1
+
+    def test_threshold(self, monkeypatch: Any) -> None:
+        monkeypatch.setattr(calibration, '_calibration', KNOWN)
+        out = io.StringIO()
+
+        @time_box(compensate=True, file=out, threshold=0.001)
+        def aFunc() -> None:
+            time.sleep(0.01)
+
+        aFunc()
+        assert 'ms +- 61ns (compensated)' in out.getvalue()
+
+    def test_jsonl(self, monkeypatch: Any) -> None:
+        monkeypatch.setattr(calibration, '_calibration', KNOWN)
+        out = io.StringIO()
+
+        @time_box(compensate=True, file=out, format='jsonl')
+        def aFunc() -> None:
+            time.sleep(0.001)
+
+        aFunc()
+        end = json.loads(out.getvalue().splitlines()[1])
+        assert end['uncertainty_ns'] == 61
+        assert 0 < end['compensated_ns'] <= end['elapsed_ns'] - 1_500
+
+    def test_not_compensated(self) -> None:
+        out = io.StringIO()
+
+        @time_box(file=out)
+        def aFunc() -> None:
+            pass
+
+        aFunc()
+        assert 'compensated' not in out.getvalue()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:47:05 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import json
+import pytest
+import time
+
+from datetime import datetime
+from typing import Any, Iterator
+
+from sbt_utils.clock import Clock, CoarseClock, SimulatedClock, \
+    SYSTEM_CLOCK, SystemClock, set_clock
+from sbt_utils.stats import StatsRegistry
+from sbt_utils.time_hdr import StartStopHeader, time_box
+
+START = datetime(2026, 10, 19, 9, 30)
+
+
+@pytest.fixture
+def restore_clock() -> Iterator[None]:
+    previous = set_clock(None)
+    yield
+    set_clock(previous)
+
+
+class TestClocks():
+
+    def test_base(self) -> None:
+        # now, time_ns, and monotonic_ns are abstract
+        with pytest.raises(TypeError):
+            Clock()  # type: ignore[abstract]
+
+        class PartialClock(Clock):
+            def now(self) -> datetime:
+                return datetime(2026, 1, 1)
+
+        with pytest.raises(TypeError):
+            PartialClock()  # type: ignore[abstract]
+
+    def test_system(self) -> None:
+        clock = SystemClock()
+        before = datetime.now()
+        assert before <= clock.now() <= datetime.now()
+        assert abs(clock.time_ns() - time.time_ns()) < 1_000_000_000
+        first = clock.monotonic_ns()
+        assert clock.monotonic_ns() >= first
+
+    def test_coarse(self) -> None:
+        clock = CoarseClock()
+        # the coarse clocks can lag the precise ones by a tick
+        assert abs(clock.time_ns() - time.time_ns()) < 100_000_000
+        assert abs((clock.now() - datetime.now()).total_seconds()) < 0.1
+        first = clock.monotonic_ns()
+        time.sleep(0.02)
+        assert clock.monotonic_ns() > first
+
+    def test_simulated(self) -> None:
+        clock = SimulatedClock(START)
+        assert clock.now() == START
+        assert clock.monotonic_ns() == 0
+        assert clock.time_ns() == round(START.timestamp() * 1e9)
+        clock.sleep(1.5)
+        clock.advance(0.25)
+        assert clock.monotonic_ns() == 1_750_000_000
+        assert clock.now() == datetime(2026, 10, 19, 9, 30, 1, 750000)
+
+    def test_tick(self) -> None:
+        clock = SimulatedClock(START, tick=0.001)
+        assert clock.monotonic_ns() == 0
+        assert clock.monotonic_ns() == 1_000_000
+        assert clock.now() == datetime(2026, 10, 19, 9, 30, 0, 2000)
+
+
+class TestHeaderClock():
+
+    def test_header(self) -> None:
+        clock = SimulatedClock(START)
+        header = StartStopHeader('aFunc', clock)
+        header.set_start_time()
+        clock.sleep(2)
+        header.set_end_time()
+        assert header.elapsed_ns == 2_000_000_000
+        assert header.build_end_msgs() == [
+            'Ending aFunc on Mon Oct 19 2026 09:30:02',
+            'Elapsed time: 0:00:02']
+        assert StartStopHeader('aFunc').clock is SYSTEM_CLOCK
+
+    def test_set_clock(self, restore_clock: None) -> None:
+        clock = SimulatedClock(START)
+        assert set_clock(clock) is SYSTEM_CLOCK
+        assert StartStopHeader('aFunc').clock is clock
+        other = SimulatedClock()
+        assert StartStopHeader('aFunc', other).clock is other
+        assert set_clock(None) is clock
+        assert StartStopHeader('aFunc').clock is SYSTEM_CLOCK
+
+    def test_time_box(self, restore_clock: None) -> None:
+        clock = SimulatedClock(START)
+        set_clock(clock)
+        out = io.StringIO()
+        registry = StatsRegistry()
+
+        @time_box(file=out, stats=registry)
+        def aFunc() -> None:
+            clock.sleep(0.25)
+
+        aFunc()
+        assert '* Starting aFunc on Mon Oct 19 2026 09:30:00 *' \
+            in out.getvalue()
+        assert '* Elapsed time: 0:00:00.250000 ' in out.getvalue()
+        func_stats, = registry
+        assert func_stats.total_ns == 250_000_000
+
+    def test_time_box_clock(self) -> None:
+        clock = SimulatedClock(START)
+        out = io.StringIO()
+
+        @time_box(file=out, clock=clock, format='jsonl')
+        def aFunc() -> None:
+            clock.sleep(0.5)
+
+        @time_box(file=out, clock=clock, format='jsonl')
+        def bFunc() -> None:
+            clock.sleep(0.1)
+            raise ValueError('failed')
+
+        aFunc()
+        with pytest.raises(ValueError):
+            bFunc()
+        start_ns = round(START.timestamp() * 1e9)
+        events = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [(event['event'], event['ts_ns'] - start_ns,
+                 event.get('elapsed_ns')) for event in events] == [
+            ('start', 0, None),
+            ('end', 500_000_000, 500_000_000),
+            ('start', 500_000_000, None),
+            ('end', 600_000_000, 100_000_000)]
+        assert events[3]['status'] == 'error'
+
+    def test_threshold(self, capsys: Any) -> None:
+        clock = SimulatedClock(START)
+
+        @time_box(clock=clock, threshold=1.0)
+        def aFunc(seconds: float) -> None:
+            clock.sleep(seconds)
+
+        aFunc(0.5)
+        assert capsys.readouterr().out == ''
+        aFunc(1.5)
+        out = capsys.readouterr().out
+        assert '* Starting aFunc on Mon Oct 19 2026 09:30:00 ' in out
+        assert 'Threshold of 0:00:01 exceeded by 0:00:00.500000' in out
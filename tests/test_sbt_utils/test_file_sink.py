@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 17:31:08 2026
+
+@author: Scott Tuttle
+"""
+
+import gzip
+import os
+import time
+import pytest
+
+from typing import Any, Callable
+
+from sbt_utils.file_sink import RotatingFileSink
+from sbt_utils.flower_box import print_flower_box_msg
+from sbt_utils.time_hdr import time_box
+
+
+def read(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestRotatingFileSink():
+
+    def test_file_object(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path)
+        assert sink.name == path
+        assert sink.mode == 'a'
+        assert sink.writable()
+        assert not sink.readable()
+        assert not sink.closed
+        sink.close()
+        assert sink.closed
+        sink.close()
+        with pytest.raises(ValueError):
+            sink.write('late')
+
+    def test_append(self, tmp_path: Any) -> None:
+        path = tmp_path / 'boxes.log'
+        path.write_text('old\n')
+        with RotatingFileSink(str(path)) as sink:
+            sink.write('new\n')
+        assert read(str(path)) == 'old\nnew\n'
+
+    def test_buffer_size(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, buffer_size=10, flush_interval=60)
+        sink.write('12345')
+        assert read(path) == ''
+        sink.write('67890')
+        assert read(path) == '1234567890'
+        sink.close()
+
+    def test_flush_coalescing(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, flush_interval=60)
+        # the first flush after a quiet period writes at once
+        sink._last_write -= 60
+        sink.write('a\n')
+        sink.flush()
+        assert read(path) == 'a\n'
+        # later flushes within the interval are left to the thread
+        sink.write('b\n')
+        sink.flush()
+        assert read(path) == 'a\n'
+        sink.close()
+        assert read(path) == 'a\nb\n'
+
+    def test_flush_interval_zero(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, flush_interval=0)
+        assert sink._thread is None
+        sink.write('a\n')
+        sink.flush()
+        assert read(path) == 'a\n'
+        sink.close()
+
+    def test_flush_thread(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, flush_interval=0.02)
+        sink.write('a\n')
+        assert wait_for(lambda: read(path) == 'a\n')
+        sink.close()
+
+    def test_rotate_size(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, flush_interval=0, max_bytes=10,
+                                backup_count=2)
+        for line in ('line1\n', 'line2\n', 'line3\n', 'line4\n'):
+            sink.write(line)
+            sink.flush()
+        sink.close()
+        assert read(path) == 'line4\n'
+        assert read(path + '.1') == 'line3\n'
+        assert read(path + '.2') == 'line2\n'
+        assert not os.path.exists(path + '.3')
+
+    def test_rotate_no_backups(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, flush_interval=0, max_bytes=10,
+                                backup_count=0)
+        for line in ('line1\n', 'line2\n'):
+            sink.write(line)
+            sink.flush()
+        sink.close()
+        assert read(path) == 'line2\n'
+        assert os.listdir(str(tmp_path)) == ['boxes.log']
+
+    def test_rotate_interval(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, flush_interval=0,
+                                rotate_interval=3600)
+        sink.write('line1\n')
+        sink.flush()
+        sink.write('line2\n')
+        sink.flush()
+        assert read(path) == 'line1\nline2\n'
+        sink._opened -= 3600
+        sink.write('line3\n')
+        sink.flush()
+        sink.close()
+        assert read(path) == 'line3\n'
+        assert read(path + '.1') == 'line1\nline2\n'
+
+    def test_compress(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path, flush_interval=0, max_bytes=10,
+                                compress=True)
+        for line in ('line1\n', 'line2\n', 'line3\n'):
+            sink.write(line)
+            sink.flush()
+        sink.close()
+        assert read(path) == 'line3\n'
+        with gzip.open(path + '.1.gz', 'rt') as f:
+            assert f.read() == 'line2\n'
+        with gzip.open(path + '.2.gz', 'rt') as f:
+            assert f.read() == 'line1\n'
+        assert not os.path.exists(path + '.1')
+
+    def test_print_flower_box_msg(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        with RotatingFileSink(path) as sink:
+            print_flower_box_msg(['Hello', 'World'], file=sink, flush=True)
+        assert read(path) == ('\n'
+                              '*********\n'
+                              '* Hello *\n'
+                              '* World *\n'
+                              '*********\n')
+
+    def test_time_box(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'boxes.log')
+        sink = RotatingFileSink(path)
+
+        @time_box(file=sink, flush=True)
+        def aFunc() -> None:
+            print('working', file=sink)
+
+        aFunc()
+        sink.close()
+        text = read(path)
+        assert '* Starting aFunc on ' in text
+        assert 'working\n' in text
+        assert '* Elapsed time: ' in text
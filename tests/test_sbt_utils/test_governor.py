@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:44:58 2026
+
+@author: Scott Tuttle
+"""
+
+import asyncio
+import io
+import json
+import pytest
+
+from typing import Any, List, Optional
+
+from sbt_utils.governor import LEVEL_COUNT, LEVEL_FULL, LEVEL_SAMPLE, \
+    OverheadGovernor
+from sbt_utils.prometheus import render_metrics
+from sbt_utils.stats import FuncStats, StatsRegistry
+from sbt_utils.time_hdr import _BoxRunner, time_box
+
+
+def make_governor(out: io.StringIO, *,
+                  func_stats: Optional[FuncStats] = None,
+                  format: str = 'box') -> OverheadGovernor:
+    runner = _BoxRunner('aFunc', file=out, func_stats=func_stats,
+                        format=format)
+    governor = OverheadGovernor(runner, 0.01, window=3,
+                                max_sample_every=100)
+    governor._skip = False
+    return governor
+
+
+def feed(governor: OverheadGovernor, overhead_ns: int,
+         run_ns: int) -> None:
+    for _ in range(governor.window):
+        governor._measure(overhead_ns, run_ns)
+
+
+class TestOverheadGovernor():
+
+    def test_within_budget(self) -> None:
+        out = io.StringIO()
+        governor = make_governor(out)
+        feed(governor, 10, 1000)
+        assert governor.level == LEVEL_FULL
+        assert out.getvalue() == ''
+
+    def test_first_call_skipped(self) -> None:
+        governor = make_governor(io.StringIO())
+        governor._skip = True
+        governor._measure(1_000_000, 1)
+        assert governor._timed == 0
+        assert not governor._skip
+
+    def test_downgrades(self) -> None:
+        out = io.StringIO()
+        governor = make_governor(out)
+
+        feed(governor, 50, 1000)
+        assert governor.level == LEVEL_SAMPLE
+        assert governor.sample_every == 5
+        assert out.getvalue().count('Overhead budget exceeded') == 1
+        assert '* time_box overhead 5.0% of run time (budget 1.0%)' \
+            in out.getvalue()
+        assert '* now timing 1 in 5 calls and counting the others' \
+            in out.getvalue()
+
+        # sampled calls at the expected cost keep the level
+        feed(governor, 50, 1000)
+        assert governor.sample_every == 5
+
+        # sparser sampling is not reported again
+        feed(governor, 1000, 1000)
+        assert governor.level == LEVEL_SAMPLE
+        assert governor.sample_every == 100
+        assert out.getvalue().count('Overhead budget exceeded') == 1
+
+        feed(governor, 5000, 1000)
+        assert governor.level == LEVEL_COUNT
+        assert out.getvalue().count('Overhead budget exceeded') == 2
+        assert '* now only counting calls' in out.getvalue()
+
+        # the count level is final
+        feed(governor, 5000, 1000)
+        assert out.getvalue().count('Overhead budget exceeded') == 2
+
+    def test_jsonl_report(self) -> None:
+        out = io.StringIO()
+        governor = make_governor(out, format='jsonl')
+        feed(governor, 50, 1000)
+        assert json.loads(out.getvalue()) == {
+            'event': 'downgrade', 'function': 'aFunc', 'level': 'sample',
+            'sample_every': 5, 'overhead': 0.05, 'budget': 0.01}
+
+    def test_sampling(self) -> None:
+        func_stats = FuncStats('aFunc')
+        governor = make_governor(io.StringIO(), func_stats=func_stats)
+        governor.level = LEVEL_SAMPLE
+        governor.sample_every = 4
+        for value in range(8):
+            assert governor.call(abs, (-value,), {}) == value
+        assert func_stats.untimed_count == 6
+        assert func_stats.count == 2
+        assert governor.untimed_calls == 0
+
+        governor.level = LEVEL_COUNT
+        governor.call(abs, (-1,), {})
+        assert func_stats.untimed_count == 7
+        assert func_stats.count == 2
+
+    def test_untimed_without_stats(self) -> None:
+        governor = make_governor(io.StringIO())
+        governor.level = LEVEL_COUNT
+        calls: List[int] = []
+        for _ in range(3):
+            governor.call(calls.append, (1,), {})
+        assert calls == [1, 1, 1]
+        assert governor.untimed_calls == 3
+
+
+class TestTimeBoxOverheadBudget():
+
+    def test_hot_function(self) -> None:
+        out = io.StringIO()
+        registry = StatsRegistry()
+
+        @time_box(overhead_budget=0.01, file=out, stats=registry)
+        def aFunc(value: int) -> int:
+            return value + 1
+
+        for value in range(2000):
+            assert aFunc(value) == value + 1
+        governor = getattr(aFunc, '_time_box_runner').governor
+        assert governor.level == LEVEL_SAMPLE
+        assert governor.sample_every == 1000
+        assert out.getvalue().count('Overhead budget exceeded') == 1
+
+        func_stats, = registry
+        assert func_stats.count + func_stats.untimed_count == 2000
+        assert func_stats.untimed_count > 1800
+        assert 'untimed calls' in func_stats.summary_msgs()[0]
+        assert ('time_box_calls_total{function="' + func_stats.name
+                + '"} 2000' in render_metrics(registry))
+
+    def test_slow_function(self, capsys: Any) -> None:
+        import time
+
+        @time_box(overhead_budget=0.5, engine='wrapt')
+        def aFunc() -> None:
+            time.sleep(0.001)
+
+        for _ in range(3):
+            aFunc()
+        assert 'Overhead budget' not in capsys.readouterr().out
+        assert getattr(aFunc, '_time_box_runner', None) is None
+
+    def test_exception(self) -> None:
+        registry = StatsRegistry()
+
+        @time_box(overhead_budget=0.01, file=io.StringIO(), stats=registry)
+        def aFunc() -> None:
+            raise ValueError('failed')
+
+        with pytest.raises(ValueError):
+            aFunc()
+        func_stats, = registry
+        assert func_stats.error_count == 1
+
+    def test_async(self) -> None:
+        out = io.StringIO()
+
+        @time_box(overhead_budget=0.01, file=out)
+        async def aFunc(value: int) -> int:
+            return value * 2
+
+        async def run() -> int:
+            total = 0
+            for value in range(300):
+                total += await aFunc(value)
+            return total
+
+        assert asyncio.run(run()) == 2 * sum(range(300))
+        governor = getattr(aFunc, '_time_box_runner').governor
+        assert governor.level == LEVEL_SAMPLE
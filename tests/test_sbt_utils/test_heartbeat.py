@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 01:42:27 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import json
+import threading
+import time
+
+from datetime import datetime
+from typing import Any, List
+
+from sbt_utils.clock import SimulatedClock
+from sbt_utils.heartbeat import HeartbeatScheduler, get_scheduler
+from sbt_utils.time_hdr import time_box
+
+
+class Runner():
+    """Records the heartbeats in place of a _BoxRunner."""
+
+    def __init__(self) -> None:
+        self.beats: List[Any] = []
+
+    def write_heartbeat(self, call: Any) -> None:
+        if call == 'failing':
+            raise ValueError('write failed')
+        self.beats.append((call, time.monotonic()))
+
+
+def wait_idle(scheduler: HeartbeatScheduler) -> None:
+    for _ in range(100):
+        if scheduler._thread is None:
+            return
+        time.sleep(0.01)
+
+
+class TestScheduler():
+
+    def test_order(self) -> None:
+        # Any, since the runner and the calls are stand-ins
+        scheduler: Any = HeartbeatScheduler()
+        runner = Runner()
+        slow = scheduler.schedule(runner, 'slow', 0.2)
+        fast = scheduler.schedule(runner, 'fast', 0.05)
+        time.sleep(0.23)
+        slow.cancel()
+        fast.cancel()
+        calls = [call for call, _ in runner.beats]
+        # the later, shorter interval is not held up by the earlier one
+        assert calls[:3] == ['fast', 'fast', 'fast']
+        assert calls.count('slow') == 1
+        assert 4 <= calls.count('fast') <= 5
+        wait_idle(scheduler)
+        assert scheduler._thread is None
+        assert len(scheduler) == 0
+
+    def test_cancel(self) -> None:
+        # Any, since the runner and the calls are stand-ins
+        scheduler: Any = HeartbeatScheduler()
+        runner = Runner()
+        heartbeat = scheduler.schedule(runner, 'call', 0.02)
+        time.sleep(0.05)
+        heartbeat.cancel()
+        count = len(runner.beats)
+        assert count >= 1
+        time.sleep(0.05)
+        assert len(runner.beats) == count
+
+    def test_compact(self) -> None:
+        # Any, since the runner and the calls are stand-ins
+        scheduler: Any = HeartbeatScheduler()
+        runner = Runner()
+        live = scheduler.schedule(runner, 'live', 60)
+        for i in range(1000):
+            scheduler.schedule(runner, i, 60).cancel()
+            # the cancelled heartbeats are dropped as the heap grows
+            assert len(scheduler) <= 64
+        assert any(entry[2] is live for entry in scheduler._heap)
+        live.cancel()
+        assert runner.beats == []
+
+    def test_error(self, monkeypatch: Any) -> None:
+        errors: List[Any] = []
+        monkeypatch.setattr(threading, 'excepthook', errors.append)
+        scheduler: Any = HeartbeatScheduler()
+        runner = Runner()
+        failing = scheduler.schedule(runner, 'failing', 0.02)
+        live = scheduler.schedule(runner, 'live', 0.02)
+        time.sleep(0.07)
+        # the failing heartbeat is reported once and cancelled
+        assert [type(args.exc_value) for args in errors] == [ValueError]
+        assert errors[0].thread.name == 'time_box_heartbeat'
+        assert failing.cancelled
+        assert not live.cancelled
+        assert len(runner.beats) >= 2
+        live.cancel()
+        wait_idle(scheduler)
+        assert scheduler._thread is None
+
+    def test_thread_cleared(self, monkeypatch: Any) -> None:
+        scheduler: Any = HeartbeatScheduler()
+
+        def broken() -> None:
+            raise RuntimeError('broken')
+
+        monkeypatch.setattr(scheduler, '_next_due', broken)
+        monkeypatch.setattr(threading, 'excepthook', lambda args: None)
+        scheduler.schedule(Runner(), 'call', 60)
+        wait_idle(scheduler)
+        # a later call can start a new thread
+        assert scheduler._thread is None
+
+    def test_shared(self) -> None:
+        assert get_scheduler() is get_scheduler()
+
+
+class TestTimeBox():
+
+    def test_many_calls(self) -> None:
+        out = io.StringIO()
+
+        @time_box(file=out, heartbeat=0.05)
+        def aFunc(seconds: float) -> None:
+            time.sleep(seconds)
+
+        before = set(threading.enumerate())
+        threads = [threading.Thread(target=aFunc, args=(0.12,))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        started = set(threading.enumerate()) - before - set(threads)
+        for thread in threads:
+            thread.join()
+        assert [thread.name for thread in started] == ['time_box_heartbeat']
+        text = out.getvalue()
+        assert 40 <= text.count('Still running aFunc (started on ') <= 60
+        # no heartbeat follows the end message of a call
+        assert text.rstrip().endswith('*' * 10)
+        last_end = text.rfind('Elapsed time: 0:00:00.1')
+        assert 'Still running' not in text[last_end:]
+        wait_idle(get_scheduler())
+        assert get_scheduler()._thread is None
+
+    def test_box(self) -> None:
+        clock = SimulatedClock(datetime(2026, 10, 20, 1, 30))
+        out = io.StringIO()
+
+        @time_box(file=out, heartbeat=0.05, clock=clock)
+        def aFunc() -> None:
+            clock.advance(90)
+            time.sleep(0.07)
+
+        aFunc()
+        assert ('* Still running aFunc (started on Tue Oct 20 2026 '
+                '01:30:00) *') in out.getvalue()
+        assert '* Elapsed time: 0:01:30' in out.getvalue()
+
+    def test_jsonl(self) -> None:
+        clock = SimulatedClock(datetime(2026, 10, 20, 1, 30))
+        out = io.StringIO()
+
+        @time_box(file=out, heartbeat=0.05, clock=clock, format='jsonl')
+        def aFunc() -> None:
+            clock.advance(2)
+            time.sleep(0.07)
+            raise ValueError('failed')
+
+        try:
+            aFunc()
+        except ValueError:
+            pass
+        events = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [event['event'] for event in events] == [
+            'start', 'heartbeat', 'end']
+        assert events[1]['elapsed_ns'] == 2_000_000_000
+        assert events[1]['function'] == events[0]['function']
+        assert events[2]['status'] == 'error'
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:02:41 2026
+
+@author: Scott Tuttle
+"""
+
+import importlib
+import json
+import sys
+
+import pytest
+
+from typing import Any, Iterator
+
+from sbt_utils.import_hook import AutoTimeBoxConfig, HookRule, \
+    install_import_hook, uninstall_import_hook, ENV_VAR, ENV_FILE_VAR, \
+    PUBLIC_NAMES
+
+
+@pytest.fixture
+def pkg_dir(tmp_path: Any) -> Iterator[Any]:
+    """Create a package with two modules on sys.path"""
+    pkg = tmp_path / 'hook_pkg'
+    pkg.mkdir()
+    (pkg / '__init__.py').write_text('')
+    (pkg / 'mod_a.py').write_text('def load_data():\n'
+                                  '    return "loaded"\n'
+                                  'def save_data():\n'
+                                  '    return "saved"\n'
+                                  'def _helper():\n'
+                                  '    return "helped"\n')
+    (pkg / 'mod_b.py').write_text('def load_data():\n'
+                                  '    return "b loaded"\n')
+    sys.path.insert(0, str(tmp_path))
+    yield pkg
+    sys.path.remove(str(tmp_path))
+    for name in [n for n in sys.modules if n.startswith('hook_pkg')]:
+        del sys.modules[name]
+
+
+class TestAutoTimeBoxConfig():
+
+    def test_from_string(self) -> None:
+        config = AutoTimeBoxConfig.from_string(
+            'legacy.*:load_*, save_* ; thirdparty.client;')
+        assert config.rules == [
+            HookRule('legacy.*', ('load_*', 'save_*')),
+            HookRule('thirdparty.client', (PUBLIC_NAMES,))]
+        assert config.options == {}
+
+    def test_from_json(self) -> None:
+        config = AutoTimeBoxConfig.from_json(json.dumps(
+            {'rules': [{'module': 'legacy.*', 'functions': ['load_*'],
+                        'exclude': ['load_temp']},
+                       {'module': 'other'}],
+             'options': {'threshold': 0.5, 'file': 'stderr'}}))
+        assert config.rules == [
+            HookRule('legacy.*', ('load_*',), ('load_temp',)),
+            HookRule('other', (PUBLIC_NAMES,), ())]
+        assert config.options == {'threshold': 0.5, 'file': sys.stderr}
+
+    def test_from_env(self, tmp_path: Any) -> None:
+        assert AutoTimeBoxConfig.from_env({}) is None
+
+        config = AutoTimeBoxConfig.from_env({ENV_VAR: 'a.b:c'})
+        assert config is not None
+        assert config.rules == [HookRule('a.b', ('c',))]
+
+        config = AutoTimeBoxConfig.from_env(
+            {ENV_VAR: '{"rules": [{"module": "x"}]}'})
+        assert config is not None
+        assert config.rules == [HookRule('x')]
+
+        config_path = tmp_path / 'config.json'
+        config_path.write_text('{"rules": [{"module": "y"}],'
+                               ' "options": {"threshold": 1}}')
+        config = AutoTimeBoxConfig.from_env({ENV_FILE_VAR: str(config_path)})
+        assert config is not None
+        assert config.rules == [HookRule('y')]
+        assert config.options == {'threshold': 1}
+
+    def test_patterns_for(self) -> None:
+        config = AutoTimeBoxConfig([HookRule('pkg.*', ('load_*',)),
+                                    HookRule('pkg.mod', ('save',), ('x',)),
+                                    HookRule('other', ('run',))])
+        assert config.patterns_for('pkg.mod') == (['load_*', 'save'], ['x'])
+        assert config.patterns_for('other') == (['run'], [])
+        assert config.patterns_for('unrelated') == ([], [])
+
+
+class TestImportHook():
+
+    def test_install_from_env(self, monkeypatch: Any) -> None:
+        monkeypatch.delenv(ENV_VAR, raising=False)
+        monkeypatch.delenv(ENV_FILE_VAR, raising=False)
+        assert install_import_hook() is None
+
+        monkeypatch.setenv(ENV_VAR, 'hook_pkg.*')
+        finder = install_import_hook()
+        try:
+            assert finder is not None
+            assert sys.meta_path[0] is finder
+        finally:
+            uninstall_import_hook(finder)
+        assert finder not in sys.meta_path
+        uninstall_import_hook(None)
+
+    def test_instrument_on_import(self, pkg_dir: Any, capsys: Any) -> None:
+        finder = install_import_hook(
+            AutoTimeBoxConfig.from_string('hook_pkg.mod_a:load_*'))
+        try:
+            mod_a = importlib.import_module('hook_pkg.mod_a')
+            mod_b = importlib.import_module('hook_pkg.mod_b')
+        finally:
+            uninstall_import_hook(finder)
+
+        assert mod_a.load_data() == 'loaded'
+        assert mod_a.save_data() == 'saved'
+        assert mod_b.load_data() == 'b loaded'
+
+        out = capsys.readouterr().out
+        assert out.count('* Starting load_data on ') == 1
+        assert '* Starting save_data on ' not in out
+
+        assert finder is not None
+        assert list(finder.registries) == ['hook_pkg.mod_a']
+        assert mod_a.time_box_stats['load_data'].count == 1
+        assert not hasattr(mod_b, 'time_box_stats')
+
+    def test_options(self, pkg_dir: Any, capsys: Any) -> None:
+        finder = install_import_hook(
+            AutoTimeBoxConfig([HookRule('hook_pkg.*')],
+                              {'file': 'stderr'}))
+        try:
+            mod_a = importlib.import_module('hook_pkg.mod_a')
+        finally:
+            uninstall_import_hook(finder)
+
+        mod_a.load_data()
+        mod_a.save_data()
+        mod_a._helper()
+        err = capsys.readouterr().err
+        assert '* Starting load_data on ' in err
+        assert '* Starting save_data on ' in err
+        assert '* Starting _helper on ' not in err
+
+    def test_no_match(self) -> None:
+        finder = install_import_hook(AutoTimeBoxConfig.from_string('x.y'))
+        try:
+            assert finder is not None
+            assert finder.find_spec('json', None) is None
+            assert finder.find_spec('sbt_utils.stats', None) is None
+        finally:
+            uninstall_import_hook(finder)
+        finder = install_import_hook(AutoTimeBoxConfig([]))
+        try:
+            assert finder is not None
+            assert finder.find_spec('json', None) is None
+        finally:
+            uninstall_import_hook(finder)
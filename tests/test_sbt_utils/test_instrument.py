@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:20:16 2026
+
+@author: Scott Tuttle
+"""
+
+import asyncio
+import io
+import sys
+import types
+
+import pytest
+
+from typing import Any
+
+from sbt_utils.instrument import instrument_module, time_box_class
+from sbt_utils.stats import StatsRegistry
+from sbt_utils.time_hdr import time_box
+
+
+def count_boxes(text: str, func_name: str) -> int:
+    """Return the number of start messages issued for func_name"""
+    return text.count('* Starting ' + func_name + ' on ')
+
+
+class TestTimeBoxClass():
+
+    @staticmethod
+    def build_class() -> Any:
+        class Sample:
+            def __init__(self) -> None:
+                self._value = 1
+
+            def method(self, aInt: int) -> int:
+                return aInt + self._value
+
+            @staticmethod
+            def static_method(aInt: int) -> int:
+                return aInt * 2
+
+            @classmethod
+            def class_method(cls, aInt: int) -> str:
+                return cls.__name__ + str(aInt)
+
+            @property
+            def value(self) -> int:
+                return self._value
+
+            @value.setter
+            def value(self, new_value: int) -> None:
+                self._value = new_value
+
+            async def async_method(self, aInt: int) -> int:
+                await asyncio.sleep(0)
+                return aInt * 3
+
+            def _private(self) -> int:
+                return 7
+
+            @time_box
+            def already_boxed(self) -> int:
+                return 8
+
+        return Sample
+
+    def test_all_kinds(self, capsys: Any) -> None:
+        Sample = time_box_class(self.build_class())
+        obj = Sample()
+
+        assert obj.method(1) == 2
+        assert Sample.static_method(2) == 4
+        assert obj.static_method(2) == 4
+        assert Sample.class_method(3) == 'Sample3'
+        assert obj.value == 1
+        obj.value = 5
+        assert obj.value == 5
+        assert asyncio.run(obj.async_method(2)) == 6
+        assert obj._private() == 7
+        assert obj.already_boxed() == 8
+
+        out = capsys.readouterr().out
+        for func_name in ('method', 'class_method', 'async_method',
+                          'already_boxed'):
+            assert count_boxes(out, func_name) == 1
+        assert count_boxes(out, 'static_method') == 2
+        assert count_boxes(out, 'value') == 3
+        assert count_boxes(out, '_private') == 0
+        assert count_boxes(out, '__init__') == 0
+
+        stats = Sample.time_box_stats
+        prefix = 'TestTimeBoxClass.build_class.<locals>.Sample.'
+        assert stats[prefix + 'method'].count == 1
+        assert stats[prefix + 'static_method'].count == 2
+        assert stats[prefix + 'class_method'].count == 1
+        assert stats[prefix + 'async_method'].count == 1
+        assert stats[prefix + 'value'].count == 2
+        assert stats[prefix + 'value.setter'].count == 1
+        assert prefix + '_private' not in stats
+        assert prefix + 'already_boxed' not in stats
+
+    def test_include_exclude(self, capsys: Any) -> None:
+        Sample = time_box_class(self.build_class(), include='*method',
+                                exclude=['static*', 'async*'],
+                                file=sys.stderr)
+        obj = Sample()
+        obj.method(1)
+        Sample.static_method(1)
+        Sample.class_method(1)
+        assert obj.value == 1
+
+        err = capsys.readouterr().err
+        assert count_boxes(err, 'method') == 1
+        assert count_boxes(err, 'class_method') == 1
+        assert count_boxes(err, 'static_method') == 0
+        assert count_boxes(err, 'value') == 0
+        assert len(Sample.time_box_stats) == 2
+
+    def test_decorator_with_args(self) -> None:
+        registry = StatsRegistry()
+        null = io.StringIO()
+
+        @time_box_class(stats=registry, file=null, threshold=10)
+        class Sample:
+            def method(self) -> int:
+                return 42
+
+        assert Sample().method() == 42
+        assert getattr(Sample, 'time_box_stats') is registry
+        assert len(registry) == 1
+        assert null.getvalue() == ''
+
+    def test_disabled(self, capsys: Any) -> None:
+        enabled = False
+
+        Sample = time_box_class(self.build_class(),
+                                time_box_enabled=lambda: enabled)
+        obj = Sample()
+        obj.method(1)
+        assert capsys.readouterr().out == ''
+        enabled = True
+        obj.method(1)
+        assert count_boxes(capsys.readouterr().out, 'method') == 1
+
+    def test_exception(self, capsys: Any) -> None:
+        @time_box_class
+        class Sample:
+            def method(self) -> None:
+                raise ValueError('bad')
+
+        with pytest.raises(ValueError):
+            Sample().method()
+        stats = list(getattr(Sample, 'time_box_stats'))
+        assert stats[0].error_count == 1
+
+    def test_options(self) -> None:
+        null = io.StringIO()
+
+        @time_box_class(file=null, engine='fast')
+        class Sample:
+            def method(self) -> int:
+                return 42
+
+        assert Sample().method() == 42
+        assert len(getattr(Sample, 'time_box_stats')) == 1
+        with pytest.raises(ValueError, match='engine must be auto or fast'):
+            time_box_class(self.build_class(), engine='wrapt')
+        with pytest.raises(TypeError, match="'bogus'"):
+            time_box_class(self.build_class(), bogus=True)
+        # the values are checked as time_box checks them
+        with pytest.raises(ValueError, match='format must be one of'):
+            time_box_class(self.build_class(), format='xml')
+        with pytest.raises(ValueError, match='engine must be one of'):
+            time_box_class(self.build_class(), engine='slow')
+
+    def test_runner_options(self) -> None:
+        import inspect
+        from sbt_utils.instrument import _RUNNER_OPTIONS
+        from sbt_utils.time_hdr import _BoxRunner
+
+        # the options passed on are those of the _BoxRunner that _wrap does
+        # not set itself
+        params = set(inspect.signature(_BoxRunner).parameters)
+        assert _RUNNER_OPTIONS == params - {'func_name', 'qualname',
+                                            'func_stats'}
+        module = types.ModuleType('empty')
+        with pytest.raises(TypeError, match="'bogus'"):
+            instrument_module(module, bogus=True)
+
+
+class TestInstrumentModule():
+
+    @staticmethod
+    def build_module() -> types.ModuleType:
+        module = types.ModuleType('sample_module')
+        code = ('from os.path import join\n'
+                'def func_a(aInt):\n'
+                '    return aInt + 1\n'
+                'def func_b():\n'
+                '    return "b"\n'
+                'def _hidden():\n'
+                '    return "h"\n'
+                'class Sample:\n'
+                '    def method(self):\n'
+                '        return "m"\n')
+        exec(code, module.__dict__)
+        return module
+
+    def test_instrument_module(self, capsys: Any) -> None:
+        module = self.build_module()
+        registry = instrument_module(module)
+        assert module.time_box_stats is registry
+
+        assert module.func_a(1) == 2
+        assert module.func_b() == 'b'
+        assert module._hidden() == 'h'
+        assert module.Sample().method() == 'm'
+        assert module.join('a', 'b') == 'a' + '/' + 'b'
+
+        out = capsys.readouterr().out
+        assert count_boxes(out, 'func_a') == 1
+        assert count_boxes(out, 'func_b') == 1
+        assert count_boxes(out, 'method') == 1
+        assert count_boxes(out, '_hidden') == 0
+        assert count_boxes(out, 'join') == 0
+        assert sorted(fs.name for fs in registry) == ['Sample.method',
+                                                      'func_a', 'func_b']
+
+    def test_pattern(self, capsys: Any) -> None:
+        module = self.build_module()
+        registry = instrument_module(module, 'func_*', exclude='func_b',
+                                     file=sys.stderr)
+        module.func_a(1)
+        module.func_b()
+        module.Sample().method()
+        err = capsys.readouterr().err
+        assert count_boxes(err, 'func_a') == 1
+        assert count_boxes(err, 'func_b') == 0
+        assert count_boxes(err, 'method') == 0
+        assert len(registry) == 1
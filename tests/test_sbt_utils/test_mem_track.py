@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:47:10 2026
+
+@author: Scott Tuttle
+"""
+
+import tracemalloc
+
+from typing import List
+
+from sbt_utils.mem_track import MemoryTracker, MemoryUsage, \
+    format_memory_usage
+
+
+class TestMemoryTracker():
+
+    def test_start_stop(self) -> None:
+        assert not tracemalloc.is_tracing()
+        tracker = MemoryTracker()
+        tracker.start()
+        assert tracemalloc.is_tracing()
+        keep: List[bytes] = [bytes(1000) for _ in range(100)]
+        usage = tracker.stop()
+        assert not tracemalloc.is_tracing()
+
+        assert usage.net_bytes >= 100 * 1000
+        assert usage.peak_bytes >= usage.net_bytes
+        assert usage.net_blocks >= 100
+        del keep
+
+    def test_freed_memory_shows_in_peak_only(self) -> None:
+        tracker = MemoryTracker()
+        tracker.start()
+        temp = bytes(1_000_000)
+        del temp
+        usage = tracker.stop()
+        assert usage.net_bytes < 1_000_000
+        assert usage.peak_bytes >= 1_000_000
+
+    def test_nested(self) -> None:
+        outer = MemoryTracker()
+        outer.start()
+        inner = MemoryTracker()
+        inner.start()
+        temp = bytes(2_000_000)
+        del temp
+        inner_usage = inner.stop()
+        assert tracemalloc.is_tracing()
+        outer_usage = outer.stop()
+        assert not tracemalloc.is_tracing()
+
+        assert inner_usage.peak_bytes >= 2_000_000
+        assert outer_usage.peak_bytes >= 2_000_000
+
+    def test_already_tracing(self) -> None:
+        tracemalloc.start()
+        try:
+            tracker = MemoryTracker()
+            tracker.start()
+            tracker.stop()
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+
+def test_format_memory_usage() -> None:
+    usage = MemoryUsage(net_bytes=1234, peak_bytes=5678, net_blocks=-3)
+    assert format_memory_usage(usage) == \
+        'Memory: net +1,234 bytes, peak 5,678 bytes, net blocks -3'
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:05:12 2026
+
+@author: Scott Tuttle
+"""
+
+import os
+import pstats
+import threading
+import time
+
+import pytest
+
+from typing import Any, List
+
+from sbt_utils.profilers import CProfileProfiler, SampleProfiler, \
+    TimeBoxProfiler, make_profiler
+from sbt_utils.time_hdr import time_box
+
+
+def busy_inner(seconds: float) -> int:
+    """Spin for the given number of seconds"""
+    count = 0
+    end_time = time.perf_counter() + seconds
+    while time.perf_counter() < end_time:
+        count += 1
+    return count
+
+
+def busy_outer(seconds: float) -> int:
+    return busy_inner(seconds)
+
+
+class TestSampleProfiler():
+
+    def test_time_box_profile(self, tmp_path: Any, capsys: Any) -> None:
+        profiler = SampleProfiler(interval=0.001, output_dir=str(tmp_path))
+
+        @time_box(profile=profiler)
+        def aFunc() -> int:
+            return busy_outer(0.2)
+
+        assert aFunc() > 0
+        lines = capsys.readouterr().out.split('\n')
+        assert lines[8].startswith('* Profile: ')
+        assert ' samples at 1.0 ms intervals' in lines[8]
+        assert 'test_profilers.py:busy_inner:' in lines[9]
+
+        key = aFunc.__qualname__
+        stacks = profiler.stacks[key]
+        assert sum(stacks.values()) > 3
+        # the stacks start at the wrapped function, not the caller
+        for stack in stacks:
+            assert stack.startswith('test_profilers.py:aFunc:')
+            assert 'test_time_box_profile' not in stack
+        assert any('busy_outer' in s and 'busy_inner' in s for s in stacks)
+
+        assert os.listdir(str(tmp_path)) == []
+        profiler.save()
+        files = os.listdir(str(tmp_path))
+        assert files == [key.replace('<', '_').replace('>', '_')
+                         + '.collapsed']
+        with open(os.path.join(str(tmp_path), files[0])) as collapsed:
+            for line in collapsed:
+                stack, count = line.rsplit(' ', 1)
+                assert stacks[stack] == int(count)
+
+    def test_merge_and_thread_stop(self, tmp_path: Any) -> None:
+        profiler = SampleProfiler(interval=0.001, output_dir=None)
+        for _ in range(2):
+            token = profiler.start('aFunc', None)
+            busy_inner(0.1)
+            msgs = profiler.stop(token)
+            assert msgs[0].startswith('Profile: ')
+        assert sum(profiler.stacks['aFunc'].values()) > 3
+        for stack in profiler.stacks['aFunc']:
+            assert 'test_merge_and_thread_stop' in stack
+        # the sampler thread exits at its next wake up, which can be later
+        # than the interval when sampling is slow
+        deadline = time.perf_counter() + 1.0
+        while ('time_box_sampler' in [t.name for t in threading.enumerate()]
+               and time.perf_counter() < deadline):
+            time.sleep(0.001)
+        assert 'time_box_sampler' not in [t.name for t in
+                                          threading.enumerate()]
+        profiler.save()  # no output_dir, nothing written
+
+    def test_per_call(self, tmp_path: Any) -> None:
+        profiler = SampleProfiler(interval=0.001, output_dir=str(tmp_path),
+                                  per_call=True)
+        paths: List[str] = []
+        for _ in range(2):
+            token = profiler.start('aFunc', None)
+            time.sleep(0.02)
+            msgs = profiler.stop(token)
+            assert msgs[-1].startswith('Profile written to ')
+            paths.append(msgs[-1][len('Profile written to '):])
+        assert paths[0] != paths[1]
+        assert sorted(os.listdir(str(tmp_path))) == sorted(
+            os.path.basename(path) for path in paths)
+
+    def test_threads(self) -> None:
+        profiler = SampleProfiler(interval=0.001, output_dir=None)
+
+        @time_box(profile=profiler, threshold=10)
+        def aFunc() -> int:
+            return busy_inner(0.1)
+
+        threads = [threading.Thread(target=aFunc) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sum(profiler.stacks[aFunc.__qualname__].values()) > 0
+
+    def test_nested(self) -> None:
+        profiler = SampleProfiler(interval=0.001, output_dir=None)
+
+        @time_box(profile=profiler, threshold=10)
+        def inner() -> int:
+            return busy_inner(0.1)
+
+        @time_box(profile=profiler, threshold=10)
+        def outer() -> int:
+            return inner()
+
+        outer()
+        inner_samples = sum(profiler.stacks[inner.__qualname__].values())
+        outer_samples = sum(profiler.stacks[outer.__qualname__].values())
+        assert inner_samples > 3
+        assert outer_samples >= inner_samples
+
+
+class TestCProfileProfiler():
+
+    @staticmethod
+    def call_counts(stats: pstats.Stats, name: str) -> int:
+        """Return the number of calls of the named function in stats"""
+        return sum(entry[1] for func, entry in
+                   stats.stats.items()  # type: ignore
+                   if func[2] == name)
+
+    def test_time_box_profile(self, tmp_path: Any, capsys: Any) -> None:
+        profiler = CProfileProfiler(output_dir=str(tmp_path), top=3)
+
+        @time_box(profile=profiler)
+        def aFunc() -> int:
+            return busy_outer(0.02)
+
+        aFunc()
+        aFunc()
+
+        out = capsys.readouterr().out
+        lines = out.split('\n')
+        assert lines[8].startswith('* Profile: ')
+        assert ' function calls in ' in lines[8]
+        assert 'test_profilers.py:' \
+            + str(busy_inner.__code__.co_firstlineno) + '(busy_inner)' in out
+        assert 'profilers.py' not in out.replace('test_profilers.py', '')
+        hotspot_lines = [line for line in lines[9:]
+                         if line.startswith('*   ')]
+        assert len(hotspot_lines) == 6  # 3 per call
+
+        key = aFunc.__qualname__
+        merged = profiler.stats[key]
+        assert self.call_counts(merged, 'busy_inner') == 2
+        assert self.call_counts(merged, 'busy_outer') == 2
+
+        # merged in memory, nothing written until save
+        assert os.listdir(str(tmp_path)) == []
+        profiler.save()
+        files = os.listdir(str(tmp_path))
+        assert len(files) == 1
+        assert files[0].endswith('.pstats')
+        loaded = pstats.Stats(os.path.join(str(tmp_path), files[0]))
+        assert self.call_counts(loaded, 'busy_inner') == 2
+
+    def test_per_call(self, tmp_path: Any) -> None:
+        profiler = CProfileProfiler(output_dir=str(tmp_path), per_call=True)
+        for _ in range(3):
+            token = profiler.start('aFunc', None)
+            busy_inner(0.001)
+            msgs = profiler.stop(token)
+            assert msgs[-1].startswith('Profile written to ')
+        files = os.listdir(str(tmp_path))
+        assert len(files) == 3
+        for file_name in files:
+            loaded = pstats.Stats(os.path.join(str(tmp_path), file_name))
+            assert self.call_counts(loaded, 'busy_inner') == 1
+        assert self.call_counts(profiler.stats['aFunc'], 'busy_inner') == 3
+
+    def test_nested(self) -> None:
+        profiler_1 = CProfileProfiler(output_dir=None)
+        profiler_2 = CProfileProfiler(output_dir=None)
+
+        @time_box(profile=profiler_2, threshold=10)
+        def inner() -> int:
+            return busy_inner(0.001)
+
+        @time_box(profile=profiler_1, threshold=10)
+        def outer() -> int:
+            return inner()
+
+        outer()
+        assert self.call_counts(profiler_1.stats[outer.__qualname__],
+                                'busy_inner') == 1
+        assert inner.__qualname__ not in profiler_2.stats
+        assert profiler_2.stop(None) == [
+            'Profile: not taken, the thread was already profiled']
+
+        inner()
+        assert self.call_counts(profiler_2.stats[inner.__qualname__],
+                                'busy_inner') == 1
+
+
+def test_make_profiler() -> None:
+    assert isinstance(make_profiler('sample'), SampleProfiler)
+    assert isinstance(make_profiler('cprofile'), CProfileProfiler)
+    profiler = SampleProfiler(output_dir=None)
+    assert make_profiler(profiler) is profiler
+    with pytest.raises(ValueError):
+        make_profiler('bogus')
+    # start, stop, and save are abstract
+    with pytest.raises(TypeError):
+        TimeBoxProfiler(output_dir=None)  # type: ignore[abstract]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 13:52:40 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import urllib.error
+import urllib.request
+import pytest
+
+from sbt_utils.prometheus import CONTENT_TYPE, MetricsServer, \
+    render_metrics, start_metrics_server
+from sbt_utils.stats import StatsRegistry, default_registry
+from sbt_utils.time_hdr import time_box
+
+
+class TestRenderMetrics():
+
+    def test_render(self) -> None:
+        registry = StatsRegistry(histogram_bounds=(0.001, 0.01))
+        registry.get('bFunc').record(500_000)
+        registry.get('bFunc').record(5_000_000, error=True)
+        registry.get('bFunc').record(50_000_000)
+        registry.get('aFunc').record(1_000_000)
+
+        assert render_metrics(registry, prefix='app') == (
+            '# HELP app_calls_total Calls of the functions wrapped by '
+            'time_box.\n'
+            '# TYPE app_calls_total counter\n'
+            'app_calls_total{function="aFunc"} 1\n'
+            'app_calls_total{function="bFunc"} 3\n'
+            '# HELP app_errors_total Calls that raised an exception.\n'
+            '# TYPE app_errors_total counter\n'
+            'app_errors_total{function="aFunc"} 0\n'
+            'app_errors_total{function="bFunc"} 1\n'
+            '# HELP app_duration_seconds Elapsed time of the calls.\n'
+            '# TYPE app_duration_seconds histogram\n'
+            'app_duration_seconds_bucket{function="aFunc",le="0.001"} 1\n'
+            'app_duration_seconds_bucket{function="aFunc",le="0.01"} 1\n'
+            'app_duration_seconds_bucket{function="aFunc",le="+Inf"} 1\n'
+            'app_duration_seconds_sum{function="aFunc"} 0.001\n'
+            'app_duration_seconds_count{function="aFunc"} 1\n'
+            'app_duration_seconds_bucket{function="bFunc",le="0.001"} 1\n'
+            'app_duration_seconds_bucket{function="bFunc",le="0.01"} 2\n'
+            'app_duration_seconds_bucket{function="bFunc",le="+Inf"} 3\n'
+            'app_duration_seconds_sum{function="bFunc"} 0.0555\n'
+            'app_duration_seconds_count{function="bFunc"} 3\n')
+
+    def test_empty_registry(self) -> None:
+        lines = render_metrics(StatsRegistry()).splitlines()
+        assert len(lines) == 6
+        assert lines[1] == '# TYPE time_box_calls_total counter'
+
+    def test_label_escaping(self) -> None:
+        registry = StatsRegistry()
+        registry.get('a"b\\c\nd').record(1)
+        assert 'time_box_calls_total{function="a\\"b\\\\c\\nd"} 1\n' in \
+            render_metrics(registry)
+
+
+class TestMetricsServer():
+
+    def test_scrape(self) -> None:
+        registry = StatsRegistry()
+
+        @time_box(stats=registry, file=io.StringIO())
+        def aFunc() -> None:
+            pass
+
+        aFunc()
+        aFunc()
+        server = MetricsServer(registry, port=0).start()
+        try:
+            assert server.port != 0
+            with urllib.request.urlopen(server.url) as response:
+                assert response.headers['Content-Type'] == CONTENT_TYPE
+                text = response.read().decode()
+            assert ('time_box_calls_total{function="TestMetricsServer.'
+                    'test_scrape.<locals>.aFunc"} 2') in text
+
+            url = server.url.replace('/metrics', '/other')
+            with pytest.raises(urllib.error.HTTPError) as exc:
+                urllib.request.urlopen(url)
+            assert exc.value.code == 404
+        finally:
+            server.stop()
+        server.stop()
+
+    def test_start_metrics_server(self) -> None:
+        default_registry.get('test_start_metrics_server').record(10)
+        server = start_metrics_server(port=0, prefix='app')
+        try:
+            with urllib.request.urlopen(server.url) as response:
+                text = response.read().decode()
+            assert ('app_calls_total{function="test_start_metrics_server"} '
+                    '1') in text
+        finally:
+            server.stop()
+            default_registry.reset()
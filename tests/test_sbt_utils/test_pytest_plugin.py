@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 00:36:19 2026
+
+@author: Scott Tuttle
+"""
+
+import pytest
+
+from types import SimpleNamespace
+from typing import Any, List
+
+from sbt_utils.pytest_plugin import ItemTimes, TimeBoxPlugin, budget_ns
+
+pytest_plugins = ['pytester']
+
+TESTS = """
+import time
+import pytest
+
+@pytest.fixture
+def slow_fixture():
+    time.sleep(0.05)
+    yield 1
+
+@pytest.fixture(scope='session')
+def session_fixture():
+    return 2
+
+def test_fast(session_fixture):
+    pass
+
+def test_slow(slow_fixture, session_fixture):
+    time.sleep(0.1)
+
+@pytest.mark.time_budget(1000)
+def test_within_budget():
+    pass
+
+@pytest.mark.time_budget(ms=10)
+def test_over_budget():
+    time.sleep(0.05)
+
+@pytest.mark.time_budget(10)
+def test_failed_over_budget():
+    time.sleep(0.05)
+    assert False
+
+@pytest.mark.time_budget(-1)
+def test_bad_budget():
+    pass
+"""
+
+
+def run(pytester: Any, *args: str) -> Any:
+    pytester.makepyfile(test_timed=TESTS)
+    # the plugin is already imported by this module
+    return pytester.runpytest('-p', 'sbt_utils.pytest_plugin', '-W',
+                              'ignore::pytest.PytestAssertRewriteWarning',
+                              *args)
+
+
+def marker(*args: Any, **kwargs: Any) -> Any:
+    return SimpleNamespace(args=args, kwargs=kwargs)
+
+
+class TestBudget():
+
+    def test_budget_ns(self) -> None:
+        assert budget_ns(marker(50)) == 50_000_000
+        assert budget_ns(marker(ms=0.5)) == 500_000
+        for bad in ([], [0], [True], ['10']):
+            with pytest.raises(ValueError):
+                budget_ns(marker(*bad))
+
+    def test_budgets(self, pytester: Any) -> None:
+        result = run(pytester)
+        result.assert_outcomes(passed=3, failed=3)
+        result.stdout.fnmatch_lines([
+            '*time_budget of 10.000ms exceeded: the call took *ms*',
+            '*time_budget needs a positive number of milliseconds, not -1*'])
+        # a test that failed anyway is not reported as over budget
+        assert 'test_failed_over_budget - assert False' in result.stdout.str()
+        assert 'Slowest' not in result.stdout.str()
+
+
+class TestSummary():
+
+    def test_summary(self, pytester: Any) -> None:
+        result = run(pytester, '--time-box', '--time-box-slowest=2')
+        out = result.stdout.str()
+        assert '* Slowest 2 of 6 tests (total ' in out
+        lines = out.splitlines()
+        slowest = lines.index(next(line for line in lines
+                                   if '* Slowest 2 of 6' in line))
+        assert 'test_timed.py::test_slow (setup ' in lines[slowest + 1]
+        assert 'over_budget (setup ' in lines[slowest + 2]
+        assert '* Slowest 2 of 2 fixtures (setup) ' in out
+        assert '* slow_fixture: calls 1, errors 0, mean 5' in out
+        assert '* session_fixture: calls 1, errors 0, ' in out
+        assert '* Over time budget: test_timed.py::test_over_budget ' in out
+
+    def test_xdist_reports(self, pytester: Any) -> None:
+        # reports sent from an xdist worker are serialized and rebuilt on
+        # the controller, where the plugin aggregates them
+        reports: List[Any] = []
+
+        class Collector():
+            def pytest_runtest_logreport(self, report: Any) -> None:
+                reports.append(report)
+
+        pytester.makepyfile(test_timed=TESTS)
+        pytester.runpytest('-p', 'sbt_utils.pytest_plugin',
+                           plugins=[Collector()])
+        config = pytester.parseconfigure('-p', 'sbt_utils.pytest_plugin',
+                                         '--time-box')
+        controller = TimeBoxPlugin(config)
+        for report in reports:
+            data = config.hook.pytest_report_to_serializable(
+                config=config, report=report)
+            controller.pytest_runtest_logreport(
+                config.hook.pytest_report_from_serializable(
+                    config=config, data=data))
+        times = controller.item_times()
+        assert len(times) == 6
+        assert times[0].nodeid == 'test_timed.py::test_slow'
+        assert times[0].call_ns >= 100_000_000
+        assert times[0].setup_ns >= 50_000_000
+        assert controller.fixtures['slow_fixture'].count == 1
+        assert controller.over_budget == ['test_timed.py::test_over_budget']
+
+    def test_item_times(self) -> None:
+        times = ItemTimes('test_a.py::test_a', 1_000, 2_000_000, 3_000)
+        assert times.total_ns == 2_004_000
+        assert times.msg() == ('2.004ms test_a.py::test_a (setup 1.000us, '
+                               'call 2.000ms, teardown 3.000us)')
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:02:51 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import os
+import socket
+import sqlite3
+import threading
+import time
+import pytest
+
+from typing import Any, Callable, List
+
+from sbt_utils.sinks import BatchingSink, SQLiteSink, Span, SpanSink, \
+    StatsDSink, STATUS_ERROR, current_pid
+from sbt_utils.time_hdr import time_box
+
+
+def make_span(function: str = 'aFunc', duration_ns: int = 100) -> Span:
+    return Span(function, 1_700_000_000.0, duration_ns, 'MainThread', 1,
+                'ok')
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class ListSink(BatchingSink):
+    def open_batches(self) -> None:
+        self.batches: List[List[Span]] = []
+
+    def write_batch(self, spans: List[Span]) -> None:
+        self.batches.append(spans)
+
+
+class FailingSink(ListSink):
+    def write_batch(self, spans: List[Span]) -> None:
+        if spans[0].function == 'fail':
+            raise OSError('disk full')
+        self.batches.append(spans)
+
+
+class TestSpanSink():
+
+    def test_base(self) -> None:
+        # emit, and write_batch of BatchingSink, are abstract
+        with pytest.raises(TypeError):
+            SpanSink()  # type: ignore[abstract]
+        with pytest.raises(TypeError):
+            BatchingSink()  # type: ignore[abstract]
+
+        class NullSink(SpanSink):
+            def emit(self, span: Span) -> None:
+                pass
+
+        sink = NullSink()
+        sink.emit(make_span())
+        sink.flush()
+        sink.close()
+
+    def test_current_pid(self) -> None:
+        assert current_pid() == os.getpid()
+
+
+class TestBatchingSink():
+
+    def test_batch_size_wakes_writer(self) -> None:
+        sink = ListSink(batch_size=3, flush_interval=60)
+        sink.emit(make_span('a'))
+        sink.emit(make_span('b'))
+        time.sleep(0.05)
+        assert sink.batches == []
+        sink.emit(make_span('c'))
+        assert wait_for(lambda: len(sink.batches) == 1)
+        assert [s.function for s in sink.batches[0]] == ['a', 'b', 'c']
+        sink.close()
+
+    def test_flush_interval(self) -> None:
+        sink = ListSink(batch_size=1000, flush_interval=0.02)
+        sink.emit(make_span())
+        assert wait_for(lambda: len(sink.batches) == 1)
+        sink.close()
+
+    def test_flush_and_close(self) -> None:
+        sink = ListSink(batch_size=1000, flush_interval=60)
+        sink.emit(make_span('a'))
+        sink.flush()
+        assert [[s.function for s in b] for b in sink.batches] == [['a']]
+        sink.flush()
+        assert len(sink.batches) == 1
+
+        sink.emit(make_span('b'))
+        sink.close()
+        assert [[s.function for s in b] for b in sink.batches] == \
+            [['a'], ['b']]
+        assert not sink._thread.is_alive()
+        sink.close()
+
+    def test_threads(self) -> None:
+        sink = ListSink(batch_size=50, flush_interval=0.01)
+
+        def emit_many() -> None:
+            for i in range(1000):
+                sink.emit(make_span(duration_ns=i))
+
+        threads = [threading.Thread(target=emit_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sink.close()
+        assert sum(len(b) for b in sink.batches) == 4000
+
+    def test_write_error(self, monkeypatch: Any) -> None:
+        errors: List[Any] = []
+        monkeypatch.setattr(threading, 'excepthook', errors.append)
+        sink = FailingSink(batch_size=2, flush_interval=60)
+        sink.emit(make_span('fail'))
+        sink.emit(make_span('b'))
+        assert wait_for(lambda: len(errors) == 1)
+        assert type(errors[0].exc_value) is OSError
+        assert sink.dropped == 2
+        # the writer thread goes on with the next batch
+        sink.emit(make_span('c'))
+        sink.emit(make_span('d'))
+        assert wait_for(lambda: len(sink.batches) == 1)
+        assert sink._thread.is_alive()
+        # flush raises on the caller's thread
+        sink.emit(make_span('fail'))
+        with pytest.raises(OSError):
+            sink.flush()
+        assert sink.dropped == 3
+        sink.close()
+
+    def test_emit_after_close(self) -> None:
+        sink = ListSink(batch_size=1000, flush_interval=60)
+        sink.emit(make_span('a'))
+        sink.close()
+        sink.emit(make_span('b'))
+        sink.emit(make_span('c'))
+        assert [[s.function for s in b] for b in sink.batches] == [['a']]
+        assert sink.dropped == 2
+        assert len(sink._spans) == 0
+
+
+class TestSQLiteSink():
+
+    def test_time_box(self, tmp_path: Any) -> None:
+        path = os.path.join(str(tmp_path), 'spans.db')
+        sink = SQLiteSink(path, flush_interval=60)
+
+        @time_box(sink=sink, file=io.StringIO())
+        def aFunc(fail: bool = False) -> None:
+            if fail:
+                raise ValueError('failed')
+
+        before = time.time()
+        aFunc()
+        with pytest.raises(ValueError):
+            aFunc(True)
+        sink.close()
+
+        with sqlite3.connect(path) as db:
+            assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            rows = db.execute('SELECT function, start, duration_ns, thread, '
+                              'process, status FROM spans ORDER BY id'
+                              ).fetchall()
+        assert [(r[0], r[3], r[4], r[5]) for r in rows] == [
+            ('TestSQLiteSink.test_time_box.<locals>.aFunc', 'MainThread',
+             os.getpid(), 'ok'),
+            ('TestSQLiteSink.test_time_box.<locals>.aFunc', 'MainThread',
+             os.getpid(), 'error')]
+        assert all(before - 1 <= r[1] <= time.time() for r in rows)
+        assert all(r[2] >= 0 for r in rows)
+
+    def test_threshold_and_batches(self, tmp_path: Any) -> None:
+        path = os.path.join(str(tmp_path), 'spans.db')
+        sink = SQLiteSink(path, table='calls', batch_size=100,
+                          flush_interval=0.05)
+
+        @time_box(sink=sink, threshold=10)
+        def aFunc() -> None:
+            pass
+
+        for _ in range(250):
+            aFunc()
+
+        def written() -> int:
+            with sqlite3.connect(path) as db:
+                return int(db.execute('SELECT COUNT(*) FROM calls'
+                                      ).fetchone()[0])
+
+        assert wait_for(lambda: written() == 250)
+        sink.close()
+
+        # reopening appends to the existing table
+        sink = SQLiteSink(path, table='calls')
+        sink.emit(make_span())
+        sink.close()
+        assert written() == 251
+
+    def test_bad_table(self, tmp_path: Any) -> None:
+        with pytest.raises(ValueError):
+            SQLiteSink(os.path.join(str(tmp_path), 'x.db'),
+                       table='spans; DROP TABLE x')
+
+
+@pytest.fixture
+def listener() -> Any:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(5.0)
+    yield sock
+    sock.close()
+
+
+def receive(sock: Any, count: int) -> List[bytes]:
+    return [sock.recv(65536) for _ in range(count)]
+
+
+class TestStatsDSink():
+
+    def test_time_box(self, listener: Any) -> None:
+        port = listener.getsockname()[1]
+        sink = StatsDSink(port=port, flush_interval=60)
+
+        @time_box(sink=sink, file=io.StringIO())
+        def aFunc(fail: bool = False) -> None:
+            if fail:
+                raise ValueError('failed')
+
+        aFunc()
+        with pytest.raises(ValueError):
+            aFunc(fail=True)
+        sink.close()
+
+        lines = receive(listener, 1)[0].decode().split('\n')
+        name = 'time_box.TestStatsDSink.test_time_box._locals_.aFunc'
+        assert len(lines) == 3
+        assert lines[0].startswith(name + ':')
+        assert lines[0].endswith('|ms')
+        float(lines[0][len(name) + 1:-3])
+        assert lines[1].startswith(name + ':')
+        assert lines[2] == name + '.errors:1|c'
+
+    def test_packing(self, listener: Any) -> None:
+        port = listener.getsockname()[1]
+        sink = StatsDSink(port=port, prefix='app', mtu=100,
+                          flush_interval=60)
+        for i in range(20):
+            sink.emit(Span('f' + str(i), 0.0, 1_500_000, 'MainThread', 1,
+                           STATUS_ERROR if i == 19 else 'ok'))
+        sink.flush()
+
+        lines: List[str] = []
+        while len(lines) < 21:
+            packet = listener.recv(65536)
+            assert len(packet) <= 100
+            lines.extend(packet.decode().split('\n'))
+        assert lines[0] == 'app.f0:1.5|ms'
+        assert lines[19] == 'app.f19:1.5|ms'
+        assert lines[20] == 'app.f19.errors:1|c'
+        assert len(lines) == 21
+        sink.close()
+
+    def test_batch_size(self, listener: Any) -> None:
+        port = listener.getsockname()[1]
+        sink = StatsDSink(port=port, batch_size=2, flush_interval=60)
+        sink.emit(make_span('a'))
+        sink.emit(make_span('b'))
+        packet = receive(listener, 1)[0]
+        assert packet == b'time_box.a:0.0001|ms\ntime_box.b:0.0001|ms'
+        sink.close()
+
+    def test_no_listener(self) -> None:
+        # sending to a closed port must not raise on the writer thread
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        sink = StatsDSink(port=port)
+        sink.emit(make_span())
+        sink.flush()
+        sink.emit(make_span())
+        sink.close()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:31:52 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import pytest
+import threading
+
+from typing import Any
+
+from sbt_utils.mem_track import MemoryUsage
+from sbt_utils.stats import DEFAULT_HISTOGRAM_BOUNDS, Bucket, FuncStats, \
+    StatsRegistry, TimeSeries, format_ns
+from sbt_utils.time_hdr import lap, time_box
+
+
+class TestFuncStats():
+
+    def test_record(self) -> None:
+        func_stats = FuncStats('aFunc')
+        assert func_stats.mean_ns == 0.0
+
+        func_stats.record(300)
+        func_stats.record(100)
+        func_stats.record(200, error=True)
+
+        assert func_stats.count == 3
+        assert func_stats.error_count == 1
+        assert func_stats.total_ns == 600
+        assert func_stats.min_ns == 100
+        assert func_stats.max_ns == 300
+        assert func_stats.mean_ns == 200.0
+        assert func_stats.mem_count == 0
+
+    def test_histogram(self) -> None:
+        func_stats = FuncStats('aFunc', histogram_bounds=(0.001, 0.01))
+        assert func_stats.histogram_bounds == (0.001, 0.01)
+        for elapsed_ns in (1, 1_000_000, 1_000_001, 10_000_000, 10**10):
+            func_stats.record(elapsed_ns)
+        assert func_stats.histogram == [2, 2, 1]
+
+        assert FuncStats('bFunc').histogram_bounds == \
+            DEFAULT_HISTOGRAM_BOUNDS
+        registry = StatsRegistry(histogram_bounds=[0.5])
+        assert registry.get('cFunc').histogram == [0, 0]
+
+    def test_record_untimed(self) -> None:
+        func_stats = FuncStats('aFunc')
+        func_stats.record(100)
+        assert 'untimed' not in func_stats.summary_msgs()[0]
+        func_stats.record_untimed()
+        func_stats.record_untimed()
+        assert func_stats.untimed_count == 2
+        assert func_stats.count == 1
+        assert func_stats.mean_ns == 100.0
+        assert func_stats.summary_msgs()[0].endswith(', untimed calls 2')
+
+    def test_record_untimed_threads(self) -> None:
+        func_stats = FuncStats('aFunc')
+
+        def count() -> None:
+            for _ in range(10_000):
+                func_stats.record_untimed()
+
+        threads = [threading.Thread(target=count) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert func_stats.untimed_count == 80_000
+
+    def test_record_memory(self) -> None:
+        func_stats = FuncStats('aFunc')
+        func_stats.record(10, memory=MemoryUsage(net_bytes=100,
+                                                 peak_bytes=500,
+                                                 net_blocks=2))
+        func_stats.record(10, memory=MemoryUsage(net_bytes=-40,
+                                                 peak_bytes=300,
+                                                 net_blocks=-1))
+        assert func_stats.mem_count == 2
+        assert func_stats.mem_net_bytes == 60
+        assert func_stats.mem_peak_bytes == 500
+        assert func_stats.mem_net_blocks == 1
+        assert len(func_stats.summary_msgs()) == 2
+
+    def test_record_phases(self) -> None:
+        func_stats = FuncStats('aFunc')
+        func_stats.record(10)
+        assert func_stats.phase_ns == {}
+        func_stats.record(4_000, phases=[('load', 3_000), ('(rest)', 1_000)])
+        func_stats.record(2_000, phases=[('load', 1_000), ('write', 1_000)])
+        assert func_stats.phase_ns == {'load': 4_000, '(rest)': 1_000,
+                                       'write': 1_000}
+        assert func_stats.phase_counts == {'load': 2, '(rest)': 1,
+                                           'write': 1}
+        assert func_stats.summary_msgs()[1] == (
+            '    phases: load 2.000us (66.7%), (rest) 1.000us (16.7%), '
+            'write 1.000us (16.7%)')
+
+
+class TestStatsRegistry():
+
+    def test_get(self) -> None:
+        registry = StatsRegistry()
+        func_stats = registry.get('aFunc')
+        assert registry.get('aFunc') is func_stats
+        assert registry['aFunc'] is func_stats
+        assert 'aFunc' in registry
+        assert 'bFunc' not in registry
+        assert len(registry) == 1
+        assert list(registry) == [func_stats]
+
+        with pytest.raises(KeyError):
+            registry['bFunc']
+
+    def test_reset(self) -> None:
+        registry = StatsRegistry(interval=1.0)
+        out = io.StringIO()
+
+        @time_box(stats=registry, file=out)
+        def aFunc() -> None:
+            lap('work')
+
+        aFunc()
+        [func_stats] = registry
+        func_stats.record_untimed()
+        registry.reset()
+        # the entry is zeroed in place, not replaced
+        assert list(registry) == [func_stats]
+        assert (func_stats.count, func_stats.untimed_count,
+                func_stats.total_ns, func_stats.max_ns) == (0, 0, 0, 0)
+        assert sum(func_stats.histogram) == 0
+        assert func_stats.phase_ns == {}
+        assert func_stats.series is not None
+        assert func_stats.series.window(60).calls == 0
+
+        aFunc()
+        assert func_stats.count == 1
+        assert sum(func_stats.histogram) == 1
+        assert func_stats.series.window(60).calls == 1
+        assert func_stats.phase_counts['work'] == 1
+
+    def test_print_summary(self, capsys: Any) -> None:
+        registry = StatsRegistry()
+        registry.get('bFunc').record(2_000_000)
+        registry.get('aFunc').record(1_500)
+
+        registry.print_summary()
+        captured = capsys.readouterr().out
+
+        lines = captured.split('\n')
+        assert lines[2] == '* Function statistics' + ' ' * (
+            len(lines[1]) - len('* Function statistics') - 1) + '*'
+        assert lines[3].startswith('* aFunc: calls 1, errors 0, '
+                                   'mean 1.500us')
+        assert lines[4].startswith('* bFunc: calls 1, errors 0, '
+                                   'mean 2.000ms')
+
+    def test_series(self, capsys: Any) -> None:
+        registry = StatsRegistry(interval=30, buckets=10)
+        series = registry.get('aFunc').series
+        assert series is not None
+        assert series.interval == 30
+        assert series.size == 10
+        registry.get('aFunc').record(1_000)
+        assert series.window(30).calls == 1
+
+        registry.print_summary(trend=True)
+        lines = capsys.readouterr().out.split('\n')
+        assert lines[4].startswith('*     trend per 30s: [')
+        assert lines[4].rstrip(' *').endswith('1.000us .. 1.000us')
+
+        assert StatsRegistry(interval=None).get('aFunc').series is None
+
+
+MINUTE = 60 * 1_000_000_000
+
+
+class TestTimeSeries():
+
+    def test_record_and_buckets(self) -> None:
+        series = TimeSeries(interval=60, size=4)
+        series.record(100, now_ns=5 * MINUTE)
+        series.record(300, now_ns=5 * MINUTE + 59 * 1_000_000_000)
+        series.record(50, now_ns=7 * MINUTE)
+
+        assert series.buckets(now_ns=7 * MINUTE) == [
+            Bucket(240.0, 0, 0, 0),
+            Bucket(300.0, 2, 400, 300),
+            Bucket(360.0, 0, 0, 0),
+            Bucket(420.0, 1, 50, 50)]
+        assert series.buckets(2, now_ns=7 * MINUTE) == [
+            Bucket(360.0, 0, 0, 0),
+            Bucket(420.0, 1, 50, 50)]
+        assert series.buckets(2, now_ns=7 * MINUTE)[1].mean_ns == 50.0
+        assert Bucket(0.0, 0, 0, 0).mean_ns == 0.0
+
+    def test_lazy_rotation(self) -> None:
+        series = TimeSeries(interval=60, size=3)
+        series.record(100, now_ns=1 * MINUTE)
+        series.record(200, now_ns=2 * MINUTE)
+
+        # minute 1 has left the ring even though its slot was not reused
+        assert [b.calls for b in series.buckets(now_ns=4 * MINUTE)] == \
+            [1, 0, 0]
+        assert series.window(300, now_ns=4 * MINUTE).calls == 1
+
+        # minute 4 reuses the slot of minute 1
+        series.record(400, now_ns=4 * MINUTE)
+        assert series.buckets(now_ns=4 * MINUTE) == [
+            Bucket(120.0, 1, 200, 200),
+            Bucket(180.0, 0, 0, 0),
+            Bucket(240.0, 1, 400, 400)]
+
+    def test_window(self) -> None:
+        series = TimeSeries(interval=60, size=60)
+        for minute in range(10):
+            series.record(minute * 1000, now_ns=minute * MINUTE)
+
+        assert series.window(60, now_ns=9 * MINUTE) == \
+            Bucket(540.0, 1, 9000, 9000)
+        assert series.window(90, now_ns=9 * MINUTE) == \
+            Bucket(480.0, 2, 17000, 9000)
+        assert series.window(3600, now_ns=9 * MINUTE).calls == 10
+
+    def test_trend_msg(self) -> None:
+        series = TimeSeries(interval=60, size=10)
+        for minute, elapsed in ((0, 1000), (1, 2000), (3, 8000)):
+            series.record(elapsed, now_ns=minute * MINUTE)
+        assert series.trend_msg(5, now_ns=4 * MINUTE) == \
+            'per 1m: [.: # ] 1.000us .. 8.000us'
+        assert TimeSeries(interval=3600).trend_msg(3) == \
+            'per 1h: [   ] 0ns .. 0ns'
+        assert TimeSeries(interval=0.5).trend_msg(1) == \
+            'per 0.5s: [ ] 0ns .. 0ns'
+
+
+@pytest.mark.parametrize('ns, expected',
+                         [(0, '0ns'),
+                          (999, '999ns'),
+                          (1_000, '1.000us'),
+                          (2_500_000, '2.500ms'),
+                          (3_000_000_000, '3.000s')])
+def test_format_ns(ns: int, expected: str) -> None:
+    assert format_ns(ns) == expected
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 02:58:40 2026
+
+@author: Scott Tuttle
+"""
+
+import io
+import pytest
+
+from datetime import datetime
+from typing import Any, Iterator, List
+
+from sbt_utils.clock import SimulatedClock
+from sbt_utils.throughput import TimeIter, time_iter
+
+START = datetime(2026, 10, 20, 3, 0)
+
+
+def timed(clock: SimulatedClock, seconds: List[float]) -> Iterator[str]:
+    """Yield one item per entry of seconds, each after that many seconds."""
+    for i, delay in enumerate(seconds):
+        clock.advance(delay)
+        yield 'x' * i
+
+
+class TestTimeIter():
+
+    def test_counts(self) -> None:
+        clock = SimulatedClock(START)
+        out = io.StringIO()
+        timer = time_iter(timed(clock, [0.5, 1.0, 0.5, 2.0]), file=out,
+                          clock=clock)
+        assert list(timer) == ['', 'x', 'xx', 'xxx']
+        assert timer.label == 'timed'
+        assert timer.count == 4
+        assert timer.nbytes == 6
+        assert timer.latencies_ns() == [5e8, 5e8, 1e9, 2e9]
+        text = out.getvalue()
+        assert '* Starting timed on Tue Oct 20 2026 03:00:00 ' in text
+        assert '* Ending timed on Tue Oct 20 2026 03:00:04 ' in text
+        assert '* Items: 4 (1.0 per second) ' in text
+        assert '* Bytes: 6 (1.5 per second) ' in text
+        assert ('* Latency per item: p50 750.000ms, p90 1.700s, p99 1.970s, '
+                'max 2.000s *') in text
+
+    def test_unsized(self) -> None:
+        out = io.StringIO()
+        timer = time_iter(iter([b'ab', 1, b'cd']), label='mixed', file=out)
+        assert list(timer) == [b'ab', 1, b'cd']
+        assert timer.count == 3
+        assert timer.nbytes is None
+        assert 'Bytes' not in out.getvalue()
+        timer = time_iter([b'ab'], file=out, count_bytes=False)
+        list(timer)
+        assert timer.label == 'list'
+        assert timer.nbytes is None
+
+    def test_sampling(self) -> None:
+        clock = SimulatedClock(START)
+        timer = TimeIter(timed(clock, [0.001] * 1000), file=io.StringIO(),
+                         max_samples=64, clock=clock)
+        for _ in timer:
+            assert len(timer.sample_ns) <= 65
+        # the interval doubled four times, from 1 to 16 items
+        assert timer.sample_every == 16
+        assert timer.every == 1
+        assert len(timer.sample_ns) == 1000 // 16 + 1
+        assert timer.sample_ns[1] - timer.sample_ns[0] == 16_000_000
+        assert set(timer.latencies_ns()) == {1_000_000}
+        assert timer.build_msgs()[-1].endswith(' (means of 16 items)')
+
+    def test_iterate_again(self) -> None:
+        clock = SimulatedClock(START)
+        items = [b'ab'] * 200
+        timer = TimeIter(items, file=io.StringIO(), max_samples=64,
+                         clock=clock)
+        list(timer)
+        assert (timer.count, timer.nbytes, timer.sample_every) == \
+            (200, 400, 4)
+        for item in timer:
+            # the counts start afresh rather than from the first iteration
+            assert timer.count == 0
+            assert timer.sample_every == 1
+            break
+        assert timer.count == 1
+        list(timer)
+        assert (timer.count, timer.nbytes, timer.sample_every) == \
+            (200, 400, 4)
+        assert len(timer.sample_ns) == 200 // 4 + 1
+
+    def test_every(self) -> None:
+        clock = SimulatedClock(START)
+        timer = TimeIter(timed(clock, [0.001] * 100), file=io.StringIO(),
+                         every=25, clock=clock)
+        list(timer)
+        assert len(timer.sample_ns) == 5
+        with pytest.raises(ValueError):
+            TimeIter([], every=0)
+        with pytest.raises(ValueError):
+            TimeIter([], max_samples=1)
+
+    def test_stopped_early(self) -> None:
+        clock = SimulatedClock(START)
+        out = io.StringIO()
+        for item in time_iter(timed(clock, [1.0] * 10), file=out,
+                              clock=clock):
+            if len(item) == 2:
+                break
+        assert '* Items: 3 (1.0 per second) ' in out.getvalue()
+
+    def test_error(self, capsys: Any) -> None:
+        def failing() -> Iterator[int]:
+            yield 1
+            raise ValueError('failed')
+
+        timer = time_iter(failing())
+        with pytest.raises(ValueError):
+            list(timer)
+        assert timer.count == 1
+        out = capsys.readouterr().out
+        assert '* Starting failing on ' in out
+        assert 'Ending' not in out
+
+    def test_empty(self) -> None:
+        out = io.StringIO()
+        timer: TimeIter[str] = time_iter([], file=out)
+        assert list(timer) == []
+        assert timer.build_msgs() == ['Items: 0 (0.0 per second)',
+                                      'Bytes: 0 (0.0 per second)']
@@ -9,10 +9,12 @@ Created on Wed Apr 22 15:48:21 2020
 
 
 from datetime import datetime, timedelta
+import inspect
 import pytest
 import sys
+import time
 
-from typing import Any, Callable, cast, Tuple, Union
+from typing import Any, Callable, cast, List, Tuple, Union
 
 from sbt_utils.time_hdr import StartStopHeader as StartStopHeader
 from sbt_utils.time_hdr import time_box as time_box
@@ -1361,3 +1363,523 @@ class TestTimeBoxDocstrings():
             print('this is sample text for the datetime format example')
 
         aFunc6()
+
+
+class TestTimeBoxTrackMemory():
+
+    def test_track_memory(self, capsys: Any) -> None:
+        @time_box(track_memory=True)
+        def aFunc() -> bytes:
+            return bytes(100_000)
+
+        ret_value = aFunc()
+        assert len(ret_value) == 100_000
+
+        lines = capsys.readouterr().out.split('\n')
+        assert lines[6].startswith('* Ending aFunc on ')
+        assert lines[7].startswith('* Elapsed time: ')
+        assert lines[8].startswith('* Memory: net +')
+        assert 'bytes, peak ' in lines[8]
+        assert 'bytes, net blocks +' in lines[8]
+        assert lines[9] == '*' * len(lines[8])
+
+    def test_track_memory_off(self, capsys: Any) -> None:
+        @time_box
+        def aFunc() -> None:
+            pass
+
+        aFunc()
+        assert 'Memory:' not in capsys.readouterr().out
+
+
+class TestTimeBoxStats():
+
+    def test_stats(self, capsys: Any) -> None:
+        from sbt_utils.stats import StatsRegistry
+        registry = StatsRegistry()
+
+        @time_box(stats=registry)
+        def aFunc(aInt: int) -> int:
+            if aInt < 0:
+                raise ValueError('negative')
+            return aInt * 2
+
+        assert aFunc(1) == 2
+        assert aFunc(2) == 4
+        with pytest.raises(ValueError):
+            aFunc(-1)
+
+        func_stats = registry[aFunc.__qualname__]
+        assert func_stats.count == 3
+        assert func_stats.error_count == 1
+        assert func_stats.min_ns > 0
+        assert func_stats.max_ns >= func_stats.min_ns
+        assert func_stats.mem_count == 0
+
+    def test_stats_with_memory(self, capsys: Any) -> None:
+        from sbt_utils.stats import StatsRegistry
+        registry = StatsRegistry()
+
+        @time_box(stats=registry, track_memory=True)
+        def aFunc() -> bytes:
+            return bytes(100_000)
+
+        aFunc()
+        func_stats = registry[aFunc.__qualname__]
+        assert func_stats.mem_count == 1
+        assert func_stats.mem_net_bytes >= 100_000
+        assert func_stats.mem_peak_bytes >= 100_000
+
+    def test_stats_disabled(self, capsys: Any) -> None:
+        from sbt_utils.stats import StatsRegistry
+        registry = StatsRegistry()
+
+        @time_box(stats=registry, time_box_enabled=False)
+        def aFunc() -> None:
+            pass
+
+        aFunc()
+        assert registry[aFunc.__qualname__].count == 0
+
+
+class TestTimeBoxThreshold():
+
+    def test_under_threshold(self, capsys: Any) -> None:
+        @time_box(threshold=10)
+        def aFunc() -> int:
+            print('in aFunc')
+            return 42
+
+        assert aFunc() == 42
+        assert capsys.readouterr().out == 'in aFunc\n'
+
+    def test_over_threshold(self, capsys: Any) -> None:
+        import time
+
+        @time_box(threshold=0.01)
+        def aFunc() -> int:
+            time.sleep(0.02)
+            return 42
+
+        assert aFunc() == 42
+        lines = capsys.readouterr().out.split('\n')
+        assert lines[0] == ''
+        assert lines[1] == '*' * len(lines[2])
+        assert lines[2].startswith('* Starting aFunc on ')
+        assert lines[3].startswith('* Ending aFunc on ')
+        assert lines[4].startswith('* Elapsed time: 0:00:00.0')
+        assert lines[5].startswith('* Threshold of 0:00:00.010000 '
+                                   'exceeded by 0:00:00.0')
+        assert lines[6] == lines[1]
+        assert len(lines) == 8
+
+    def test_failed_over_threshold(self, capsys: Any) -> None:
+        from sbt_utils.clock import SimulatedClock
+
+        clock = SimulatedClock(datetime(2026, 10, 21, 9, 0))
+
+        @time_box(threshold=1, clock=clock)
+        def aFunc(seconds: float) -> None:
+            clock.advance(seconds)
+            raise ValueError('failed')
+
+        with pytest.raises(ValueError):
+            aFunc(0.5)
+        assert capsys.readouterr().out == ''
+        with pytest.raises(ValueError):
+            aFunc(3)
+        lines = capsys.readouterr().out.split('\n')
+        assert lines[2].startswith('* Starting aFunc on Wed Oct 21 2026 '
+                                   '09:00:00 ')
+        assert lines[3].startswith('* Ending aFunc on Wed Oct 21 2026 '
+                                   '09:00:03 ')
+        assert lines[4].startswith('* Elapsed time: 0:00:03 ')
+        assert lines[5].startswith('* Threshold of 0:00:01 exceeded by '
+                                   '0:00:02 ')
+        assert lines[6].startswith('* Raised ValueError ')
+        assert len(lines) == 9
+
+    def test_threshold_with_memory_and_stats(self, capsys: Any) -> None:
+        from sbt_utils.stats import StatsRegistry
+        registry = StatsRegistry()
+
+        @time_box(threshold=0, track_memory=True, stats=registry)
+        def aFunc() -> None:
+            pass
+
+        aFunc()
+        lines = capsys.readouterr().out.split('\n')
+        assert lines[5].startswith('* Threshold of 0:00:00 exceeded by ')
+        assert lines[6].startswith('* Memory: net ')
+        assert registry[aFunc.__qualname__].count == 1
+
+    def test_print_start_end_msg(self, capsys: Any) -> None:
+        hdr = StartStopHeader('TestName')
+        hdr.set_start_time()
+        hdr.set_end_time()
+        assert hdr.elapsed_ns >= 0
+        hdr.print_start_end_msg(extra_msgs=['extra'])
+        msg1 = '* ' + hdr.build_start_msg()
+        msg2 = '* ' + hdr.build_end_msgs()[0]
+        flower_len = max(len(msg1), len(msg2)) + 2
+        lines = capsys.readouterr().out.split('\n')
+        assert lines[1] == '*' * flower_len
+        assert lines[2].startswith(msg1)
+        assert lines[3].startswith(msg2)
+        assert lines[5].startswith('* extra ')
+
+
+class TestTimeBoxEngine():
+
+    def test_auto_uses_fast_for_functions(self, capsys: Any) -> None:
+        def aFunc(a: int, b: int = 2) -> int:
+            """aFunc doc"""
+            return a + b
+
+        boxed = time_box(aFunc)
+        assert type(boxed) is type(aFunc)
+        assert boxed.__wrapped__ is aFunc  # type: ignore
+        assert boxed.__name__ == 'aFunc'
+        assert boxed.__doc__ == 'aFunc doc'
+        assert str(inspect.signature(boxed)) == '(a: int, b: int = 2) -> int'
+        assert boxed(1) == 3
+        assert '* Starting aFunc on ' in capsys.readouterr().out
+
+    def test_wrapt_engine(self, capsys: Any) -> None:
+        def aFunc(a: int) -> int:
+            return a * 2
+
+        boxed = time_box(aFunc, engine='wrapt')
+        assert type(boxed) is not type(aFunc)
+        assert boxed.__name__ == 'aFunc'
+        assert boxed(4) == 8
+        assert '* Ending aFunc on ' in capsys.readouterr().out
+
+    @pytest.mark.parametrize('engine', ['auto', 'fast', 'wrapt'])
+    def test_methods(self, engine: str, capsys: Any) -> None:
+        class Doubler():
+            def __init__(self, factor: int) -> None:
+                self.factor = factor
+
+            @time_box(engine=engine)
+            def double(self, value: int) -> int:
+                return value * self.factor
+
+        assert Doubler(2).double(3) == 6
+        assert '* Starting double on ' in capsys.readouterr().out
+
+    def test_auto_uses_wrapt_for_descriptors(self, capsys: Any) -> None:
+        class AClass():
+            @time_box
+            @classmethod
+            def name(cls) -> str:
+                return cls.__name__
+
+        assert type(vars(AClass)['name']) is not classmethod
+        assert AClass.name() == 'AClass'
+        assert '* Starting name on ' in capsys.readouterr().out
+
+    @pytest.mark.parametrize('engine', ['fast', 'wrapt'])
+    def test_enabled(self, engine: str, capsys: Any) -> None:
+        def aFunc() -> int:
+            return 42
+
+        assert time_box(aFunc, time_box_enabled=False,
+                        engine=engine) is aFunc
+
+        enabled = [False]
+        boxed = time_box(aFunc, time_box_enabled=lambda: enabled[0],
+                         engine=engine)
+        assert boxed() == 42
+        assert capsys.readouterr().out == ''
+        enabled[0] = True
+        assert boxed() == 42
+        assert '* Starting aFunc on ' in capsys.readouterr().out
+
+    def test_bad_engine(self) -> None:
+        with pytest.raises(ValueError):
+            time_box(engine='slow')
+
+
+class TestTimeBoxJsonl():
+
+    def events(self, text: str) -> List[Any]:
+        import json
+        assert text.endswith('\n')
+        return [json.loads(line) for line in text.splitlines()]
+
+    @pytest.mark.parametrize('engine', ['fast', 'wrapt'])
+    def test_start_end(self, engine: str, capsys: Any) -> None:
+        @time_box(format='jsonl', engine=engine)
+        def aFunc(a: int) -> int:
+            return a * 2
+
+        before = time.time_ns()
+        assert aFunc(4) == 8
+        after = time.time_ns()
+        start, end = self.events(capsys.readouterr().out)
+        qualname = 'TestTimeBoxJsonl.test_start_end.<locals>.aFunc'
+        assert start == {'event': 'start', 'function': qualname,
+                         'ts_ns': start['ts_ns']}
+        assert set(end) == {'event', 'function', 'ts_ns', 'elapsed_ns',
+                            'status'}
+        assert end['event'] == 'end'
+        assert end['function'] == qualname
+        assert end['status'] == 'ok'
+        assert before <= start['ts_ns'] <= end['ts_ns'] <= after
+        assert isinstance(end['elapsed_ns'], int)
+        assert 0 <= end['elapsed_ns'] <= after - before
+
+    def test_compact(self, capsys: Any) -> None:
+        @time_box(format='jsonl')
+        def aFunc() -> None:
+            pass
+
+        aFunc()
+        out = capsys.readouterr().out
+        assert out.startswith('{"event":"start","function":')
+        assert ' ' not in out
+
+    def test_error(self, capsys: Any) -> None:
+        @time_box(format='jsonl')
+        def aFunc() -> None:
+            raise ValueError('failed')
+
+        with pytest.raises(ValueError):
+            aFunc()
+        start, end = self.events(capsys.readouterr().out)
+        assert end['status'] == 'error'
+
+    def test_escaping(self, capsys: Any) -> None:
+        def aFunc() -> None:
+            pass
+
+        aFunc.__qualname__ = 'a "quoted" \\ name'
+        time_box(aFunc, format='jsonl')()
+        start, end = self.events(capsys.readouterr().out)
+        assert start['function'] == 'a "quoted" \\ name'
+
+    def test_threshold(self, capsys: Any) -> None:
+        @time_box(format='jsonl', threshold=0.05)
+        def aFunc(delay: float) -> None:
+            time.sleep(delay)
+
+        aFunc(0)
+        assert capsys.readouterr().out == ''
+        aFunc(0.06)
+        start, end = self.events(capsys.readouterr().out)
+        assert start['event'] == 'start'
+        assert end['threshold_ns'] == 50_000_000
+        assert end['elapsed_ns'] > 50_000_000
+
+    def test_track_memory(self, capsys: Any) -> None:
+        @time_box(format='jsonl', track_memory=True)
+        def aFunc() -> List[int]:
+            return list(range(1000))
+
+        aFunc()
+        start, end = self.events(capsys.readouterr().out)
+        assert end['extra'][0].startswith('Memory: ')
+
+    def test_file_and_flush(self) -> None:
+        class File():
+            def __init__(self) -> None:
+                self.writes: List[str] = []
+                self.flushes = 0
+
+            def write(self, text: str) -> int:
+                self.writes.append(text)
+                return len(text)
+
+            def flush(self) -> None:
+                self.flushes += 1
+
+        file: Any = File()
+
+        @time_box(format='jsonl', file=file, flush=True)
+        def aFunc() -> None:
+            pass
+
+        aFunc()
+        assert len(file.writes) == 2
+        assert file.flushes == 2
+
+    def test_bad_format(self) -> None:
+        with pytest.raises(ValueError):
+            time_box(format='xml')
+
+
+class TestTimeBoxLap():
+
+    def test_header_laps(self) -> None:
+        from sbt_utils.clock import SimulatedClock
+        clock = SimulatedClock(datetime(2026, 10, 20, 2, 0))
+        header = StartStopHeader('aFunc', clock)
+        assert header.phase_times() == []
+        header.set_start_time()
+        for _ in range(2):
+            clock.sleep(1)
+            header.lap('load')
+            clock.sleep(0.5)
+            header.lap('write')
+        clock.sleep(1)
+        header.set_end_time()
+        assert header.phase_times() == [('load', 2_000_000_000),
+                                        ('write', 1_000_000_000),
+                                        ('(rest)', 1_000_000_000)]
+        assert header.build_end_msgs() == [
+            'Ending aFunc on Tue Oct 20 2026 02:00:04',
+            'Elapsed time: 0:00:04',
+            'Phase   Elapsed time  Percent',
+            'load    0:00:02         50.0%',
+            'write   0:00:01         25.0%',
+            '(rest)  0:00:01         25.0%']
+
+    def test_no_laps(self) -> None:
+        header = StartStopHeader('aFunc')
+        header.set_start_time()
+        header.set_end_time()
+        assert header.build_phase_msgs() == []
+        assert len(header.build_end_msgs()) == 2
+
+    def test_lap_in_time_box(self, capsys: Any) -> None:
+        from sbt_utils.clock import SimulatedClock
+        from sbt_utils.time_hdr import current_header, lap
+        clock = SimulatedClock(datetime(2026, 10, 20, 2, 0))
+
+        @time_box(clock=clock)
+        def inner() -> None:
+            clock.sleep(5)  # not a phase of outer
+            lap('inner')
+
+        @time_box(clock=clock)
+        def outer() -> None:
+            header = current_header()
+            assert header is not None and header.func_name == 'outer'
+            clock.sleep(1)
+            lap('load')
+            inner()
+            assert current_header() is header
+            lap('transform')
+
+        assert current_header() is None
+        lap('ignored')  # nothing to record outside of time_box
+        outer()
+        assert current_header() is None
+        out = capsys.readouterr().out
+        assert '* load       0:00:01         16.7%' in out
+        assert '* transform  0:00:05         83.3%' in out
+        assert '* inner   0:00:05        100.0%' in out
+
+    def test_lap_in_tasks(self) -> None:
+        import asyncio
+        import io
+        from sbt_utils.time_hdr import lap
+        from sbt_utils.stats import StatsRegistry
+        registry = StatsRegistry()
+
+        @time_box(file=io.StringIO(), stats=registry)
+        async def aFunc(name: str) -> None:
+            await asyncio.sleep(0.01)
+            lap(name)
+
+        async def main() -> None:
+            await asyncio.gather(aFunc('a'), aFunc('b'))
+
+        asyncio.run(main())
+        func_stats = registry[aFunc.__qualname__]
+        assert func_stats.phase_counts == {'a': 1, 'b': 1, '(rest)': 2}
+
+    def test_stats_and_jsonl(self, capsys: Any) -> None:
+        import json
+        from sbt_utils.clock import SimulatedClock
+        from sbt_utils.stats import StatsRegistry
+        from sbt_utils.time_hdr import lap
+        clock = SimulatedClock(datetime(2026, 10, 20, 2, 0))
+        registry = StatsRegistry()
+
+        @time_box(clock=clock, stats=registry, format='jsonl')
+        def aFunc(fail: bool) -> None:
+            clock.sleep(0.25)
+            lap('load')
+            if fail:
+                raise ValueError('failed')
+            clock.sleep(0.75)
+            lap('write')
+
+        aFunc(False)
+        with pytest.raises(ValueError):
+            aFunc(True)
+        events = [json.loads(line)
+                  for line in capsys.readouterr().out.splitlines()]
+        assert events[1]['phases'] == {'load': 250_000_000,
+                                       'write': 750_000_000, '(rest)': 0}
+        assert events[3]['phases'] == {'load': 250_000_000, '(rest)': 0}
+        func_stats = registry[aFunc.__qualname__]
+        assert func_stats.phase_ns == {'load': 500_000_000,
+                                       'write': 750_000_000, '(rest)': 0}
+        assert func_stats.summary_msgs()[1] == (
+            '    phases: load 250.000ms (40.0%), write 750.000ms (60.0%), '
+            '(rest) 0ns (0.0%)')
+
+
+class TestTimeHdrLazyImport():
+
+    def loaded_after(self, code: str) -> List[str]:
+        import os
+        import subprocess
+        # run from the tests directory so that the wrapt stub in the repo
+        # root does not shadow the installed package
+        report = ('\nimport sys\nprint(" ".join(m for m in ("datetime", '
+                  '"functools", "inspect", "typing", "wrapt", '
+                  '"sbt_utils.flower_box") if m in sys.modules))')
+        output = subprocess.run([sys.executable, '-c', code + report],
+                                check=True, stdout=subprocess.PIPE,
+                                universal_newlines=True,
+                                cwd=os.path.dirname(__file__)).stdout
+        return output.split()
+
+    def test_import_is_light(self) -> None:
+        assert self.loaded_after(
+            'from sbt_utils.time_hdr import time_box') == []
+
+    def test_first_call_loads_datetime(self) -> None:
+        loaded = self.loaded_after(
+            'import os\n'
+            'from sbt_utils.time_hdr import time_box\n'
+            'time_box(lambda: None, file=open(os.devnull, "w"))()')
+        assert 'datetime' in loaded
+        assert 'sbt_utils.flower_box' in loaded
+        assert 'inspect' not in loaded
+        assert 'wrapt' not in loaded
+
+    def test_threaded_first_call(self) -> None:
+        # the first calls of several threads all find the names unloaded
+        code = ('import io, threading\n'
+                'from sbt_utils.time_hdr import time_box\n'
+                'aFunc = time_box(lambda: None, file=io.StringIO())\n'
+                'barrier = threading.Barrier(16)\n'
+                'errors = []\n'
+                'def run():\n'
+                '    barrier.wait()\n'
+                '    try:\n'
+                '        aFunc()\n'
+                '    except Exception as exc:\n'
+                '        errors.append(repr(exc))\n'
+                'threads = [threading.Thread(target=run) for _ in range(16)]\n'
+                'for thread in threads:\n'
+                '    thread.start()\n'
+                'for thread in threads:\n'
+                '    thread.join()\n'
+                'print("errors", len(errors))')
+        for _ in range(5):
+            loaded = self.loaded_after(code)
+            assert loaded[:2] == ['errors', '0']
+            assert 'sbt_utils.flower_box' in loaded
+
+    def test_dt_format(self) -> None:
+        import sbt_utils.time_hdr as time_hdr
+        assert time_hdr.DT_Format('%H:%M') == '%H:%M'
+        assert time_hdr.DT_Format is DT_Format
+        with pytest.raises(AttributeError):
+            getattr(time_hdr, 'no_such_name')
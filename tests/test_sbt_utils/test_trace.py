@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 03:52:16 2026
+
+@author: Scott Tuttle
+"""
+
+import asyncio
+import gzip
+import io
+import json
+import os
+import pytest
+import subprocess
+import sys
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sbt_utils.clock import SimulatedClock
+from sbt_utils.time_hdr import time_box
+from sbt_utils.trace import MergeSummary, TRACE_ID_ENV, _env_trace_id, \
+    get_trace_id, main, merge_traces, new_trace_id, set_trace_id, trace, \
+    trace_env
+
+
+def write_events(path: str, events: List[Dict[str, Any]]) -> str:
+    with open(path, 'w') as f:
+        for event in events:
+            f.write(json.dumps(event, separators=(',', ':')) + '\n')
+    return path
+
+
+def event(name: str, ts_ns: int, mono_ns: Optional[int] = None,
+          pid: int = 1, trace_id: str = 't1',
+          proc: Optional[str] = None) -> Dict[str, Any]:
+    result: Dict[str, Any] = {'event': name, 'ts_ns': ts_ns}
+    if mono_ns is not None:
+        result.update(trace_id=trace_id, pid=pid,
+                      proc='p' + str(pid) if proc is None else proc,
+                      mono_ns=mono_ns)
+    return result
+
+
+def merged(out: io.StringIO) -> List[Any]:
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class TestTraceId():
+
+    def test_trace(self) -> None:
+        assert get_trace_id() is None
+        with trace('job-1') as trace_id:
+            assert trace_id == get_trace_id() == 'job-1'
+            # a nested trace keeps the current id
+            with trace() as nested:
+                assert nested == 'job-1'
+            with trace('job-2'):
+                assert get_trace_id() == 'job-2'
+            assert get_trace_id() == 'job-1'
+        assert get_trace_id() is None
+        with trace() as trace_id:
+            assert len(trace_id) == 32
+        assert new_trace_id() != new_trace_id()
+
+    def test_invalid(self) -> None:
+        for bad in ('', 'a b', 'a"b', 'x' * 129):
+            with pytest.raises(ValueError):
+                set_trace_id(bad)
+            with pytest.raises(ValueError):
+                with trace(bad):
+                    pass
+        assert get_trace_id() is None
+
+    def test_tasks(self) -> None:
+        async def task(trace_id: str) -> Optional[str]:
+            with trace(trace_id):
+                await asyncio.sleep(0.01)
+                return get_trace_id()
+
+        async def main() -> List[Optional[str]]:
+            return list(await asyncio.gather(task('a'), task('b')))
+
+        assert asyncio.run(main()) == ['a', 'b']
+
+    def test_env(self, monkeypatch: Any) -> None:
+        monkeypatch.setenv(TRACE_ID_ENV, 'from-parent')
+        assert _env_trace_id() == 'from-parent'
+        monkeypatch.setenv(TRACE_ID_ENV, 'not valid')
+        assert _env_trace_id() is None
+        assert TRACE_ID_ENV not in trace_env({TRACE_ID_ENV: 'old'})
+        with trace('job-1'):
+            env = trace_env({'PATH': '/bin'})
+        assert env == {'PATH': '/bin', TRACE_ID_ENV: 'job-1'}
+
+    def test_subprocess(self) -> None:
+        code = ('from sbt_utils.trace import get_trace_id, trace\n'
+                'with trace() as trace_id:\n'
+                '    print(get_trace_id(), trace_id)\n')
+        with trace('job-1'):
+            # run from the tests directory so that the wrapt stub in the
+            # repo root does not shadow the installed package
+            output = subprocess.run([sys.executable, '-c', code],
+                                    check=True, stdout=subprocess.PIPE,
+                                    universal_newlines=True,
+                                    env=trace_env(),
+                                    cwd=os.path.dirname(__file__)).stdout
+        assert output.split() == ['job-1', 'job-1']
+
+
+class TestTimeBoxTrace():
+
+    def test_events(self) -> None:
+        clock = SimulatedClock(datetime(2026, 10, 20, 4, 0))
+        out = io.StringIO()
+
+        @time_box(file=out, format='jsonl', clock=clock)
+        def aFunc() -> None:
+            clock.sleep(0.5)
+
+        @time_box(file=out, format='jsonl', clock=clock, threshold=0.1)
+        def bFunc() -> None:
+            clock.sleep(0.25)
+
+        aFunc()
+        with trace('job-1'):
+            aFunc()
+            bFunc()
+        events = merged(out)
+        assert set(events[0]) == {'event', 'function', 'ts_ns'}
+        assert events[2]['proc'] == events[5]['proc']
+        assert len(events[2]['proc']) == 16
+        assert [(e['event'], e['trace_id'], e['pid'], e['mono_ns'])
+                for e in events[2:]] == [
+            ('start', 'job-1', os.getpid(), 500_000_000),
+            ('end', 'job-1', os.getpid(), 1_000_000_000),
+            ('start', 'job-1', os.getpid(), 1_000_000_000),
+            ('end', 'job-1', os.getpid(), 1_250_000_000)]
+
+
+class TestMerge():
+
+    def test_merge(self, tmp_path: Any) -> None:
+        a = write_events(str(tmp_path / 'a.jsonl'), [
+            event('a_start', 1000, 100),
+            # the wall clock was stepped back during the call
+            event('a_end', 800, 400)])
+        b = write_events(str(tmp_path / 'b.jsonl'), [
+            event('b_start', 1200, 50, pid=2),
+            event('b_end', 1250, 100, pid=2),
+            event('b_untraced', 1280)])
+        out = io.StringIO()
+        assert merge_traces([a, b], out) == MergeSummary(5, 0, 0)
+        events = merged(out)
+        assert [(e['event'], e['corrected_ns']) for e in events] == [
+            ('a_start', 1000), ('b_start', 1200), ('b_end', 1250),
+            ('b_untraced', 1280), ('a_end', 1300)]
+        assert events[0] == dict(event('a_start', 1000, 100),
+                                 corrected_ns=1000, source=a)
+
+    def test_rotated_files(self, tmp_path: Any) -> None:
+        # one process, whose wall clock was stepped back between its files
+        a = write_events(str(tmp_path / 'a.jsonl.1'), [
+            event('a1', 1000, 100, pid=5)])
+        b = write_events(str(tmp_path / 'a.jsonl'), [
+            event('a2', 500, 300, pid=5), event('other', 700, 0, pid=6)])
+        out = io.StringIO()
+        merge_traces([a, b], out)
+        assert [(e['event'], e['corrected_ns']) for e in merged(out)] == [
+            ('other', 700), ('a1', 1000), ('a2', 1200)]
+
+    def test_same_pid(self, tmp_path: Any) -> None:
+        # pid 1 of two containers, told apart by their proc ids
+        a = write_events(str(tmp_path / 'a.jsonl'), [
+            event('a', 1_000_000, 10, proc='host-a')])
+        b = write_events(str(tmp_path / 'b.jsonl'), [
+            event('b', 2_000_000, 999_999_999, proc='host-b')])
+        out = io.StringIO()
+        merge_traces([a, b], out)
+        assert [(e['event'], e['corrected_ns']) for e in merged(out)] == [
+            ('a', 1_000_000), ('b', 2_000_000)]
+        # without proc ids, a pid only stands for one process within a file
+        for path in (a, b):
+            with open(path) as f:
+                events = [json.loads(line) for line in f]
+            for e in events:
+                del e['proc']
+            write_events(path, events)
+        out = io.StringIO()
+        merge_traces([a, b], out)
+        assert [e['corrected_ns'] for e in merged(out)] == [
+            1_000_000, 2_000_000]
+
+    def test_offsets_and_trace_id(self, tmp_path: Any) -> None:
+        a = write_events(str(tmp_path / 'a.jsonl'), [
+            event('a1', 1000, 0), event('other', 1500, 500, trace_id='t2'),
+            event('a2', 2000, 1000)])
+        b = write_events(str(tmp_path / 'b.jsonl'), [
+            event('b1', 1600, 0, pid=2)])
+        out = io.StringIO()
+        merge_traces([a, b], out, trace_id='t1', offsets={b: -1000})
+        assert [(e['event'], e['corrected_ns']) for e in merged(out)] == [
+            ('b1', 600), ('a1', 1000), ('a2', 2000)]
+
+    def test_window(self, tmp_path: Any) -> None:
+        path = write_events(str(tmp_path / 'a.jsonl'), [
+            event('e' + str(ts), ts) for ts in (10, 30, 20, 40, 5, 50)])
+        out = io.StringIO()
+        assert merge_traces([path], out, window=4) == MergeSummary(6, 0, 0)
+        assert [e['corrected_ns'] for e in merged(out)] == [
+            5, 10, 20, 30, 40, 50]
+        out = io.StringIO()
+        # 5 is more events out of place than the window holds
+        assert merge_traces([path], out, window=1) == MergeSummary(6, 0, 1)
+        assert [e['corrected_ns'] for e in merged(out)] == [
+            10, 20, 30, 5, 40, 50]
+        with pytest.raises(ValueError):
+            merge_traces([path], out, window=0)
+
+    def test_skipped_and_gzip(self, tmp_path: Any) -> None:
+        path = str(tmp_path / 'a.jsonl.gz')
+        with gzip.open(path, 'wt') as f:
+            f.write('{"event":"start","ts_ns":10}\n'
+                    '\n'
+                    '[1, 2]\n'
+                    '{"event":"no time"}\n'
+                    '{"event":"text time","ts_ns":"10"}\n'
+                    '{"event":"end","ts_ns":20}\n'
+                    '{"event":"extra","ts_ns":30} trailing\n'
+                    '{"event":"two","ts_ns":30}{"ts_ns":40}\n'
+                    '{"event":"end","ts_')
+        out = io.StringIO()
+        assert merge_traces([path], out) == MergeSummary(2, 7, 0)
+        assert [e['event'] for e in merged(out)] == ['start', 'end']
+
+    def test_many_files(self, tmp_path: Any) -> None:
+        paths = [write_events(str(tmp_path / (str(i) + '.jsonl')),
+                              [event('e', ts, ts - i * 7, pid=i)
+                               for ts in range(i, 3000, 10)])
+                 for i in range(10)]
+        out = io.StringIO()
+        assert merge_traces(paths, out, window=4).events == 3000
+        times = [e['corrected_ns'] for e in merged(out)]
+        assert times == list(range(3000))
+
+    def test_main(self, tmp_path: Any, capsys: Any) -> None:
+        a = write_events(str(tmp_path / 'a.jsonl'), [event('a', 100)])
+        b = write_events(str(tmp_path / 'b.jsonl'), [event('b', 50)])
+        output = str(tmp_path / 'out.jsonl')
+        assert main([a, b, '-o', output, '--offset', b + '=100']) == 0
+        with open(output) as f:
+            assert [json.loads(line)['event'] for line in f] == ['a', 'b']
+        assert 'merged 2 events, skipped 0 lines, 0 events later' \
+            in capsys.readouterr().err
+        assert main([a, b]) == 0
+        assert capsys.readouterr().out.startswith('{"event":"b"')
+        with pytest.raises(SystemExit):
+            main([a, '--offset', 'no-equals'])